@@ -0,0 +1,366 @@
+import itertools
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # analytics is optional; callers fall back to SQL
+    np = None
+
+import database
+from repositories import archive, connection
+from repositories import sales as sales_repo
+from repositories.records import SalesColumns
+from repositories.reports import ReportRow
+
+ENABLED = os.environ.get('SIS_ANALYTICS', '1') != '0'
+
+_engines = {}
+_engines_lock = threading.Lock()
+_versions = itertools.count(1)
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def available() -> bool:
+    return np is not None and ENABLED
+
+
+def get_engine() -> Optional['SalesAnalytics']:
+    if not available():
+        return None
+    with _engines_lock:
+        engine = _engines.get(database.DB_NAME)
+        if engine is None:
+            engine = _engines[database.DB_NAME] = SalesAnalytics()
+        return engine
+
+
+def invalidate() -> None:
+    # Call after deleting or rewriting sales rows in bulk (archiving, purges).
+    with _engines_lock:
+        _engines.pop(database.DB_NAME, None)
+
+
+def _month_key(ordinals):
+    # day ordinal -> year*12 + month-1, vectorised via datetime64; 0 (no date) stays 0
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    days = (ordinals - _EPOCH).astype('datetime64[D]')
+    keys = days.astype('datetime64[M]').astype(np.int64) + 1970 * 12
+    return np.where(ordinals > 0, keys, 0)
+
+
+def _period_key(period) -> int:
+    # 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' -> month key
+    text = str(period)
+    return int(text[:4]) * 12 + (int(text[5:7]) - 1 if len(text) >= 7 else 0)
+
+
+def _sales_deletes(c) -> Optional[int]:
+    # sales_delete_count is kept by a trigger (migrate_sales_deletes.py); an
+    # unmigrated file has neither, so a delete there goes unnoticed until
+    # invalidate()
+    try:
+        row = c.execute('SELECT deletes FROM sales_delete_count WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+class SalesAnalytics:
+    # Sales history held as NumPy columns, loaded incrementally by id watermark
+    # and folded into month x product matrices (qty and row counts, for all
+    # sales and for active sales). Queries sum a few month rows and apply the
+    # current product price/cost per product, which is what the SQL reports do,
+    # so nothing scans per-sale data at query time. Ranges are month-granular:
+    # 'YYYY', 'YYYY-MM', or a date which is truncated to its month.
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cols = SalesColumns()
+        self._updated_mark = None
+        self._product_sig = None
+        self._k0 = None
+        self._state = None
+        self._archived = None
+        self._deletes = None
+        # changes whenever a refresh saw new, edited or repriced data; unique
+        # across engines so a rebuilt engine never matches an old version
+        self.version = 0
+        self.qty_all = self.rows_all = self.qty_active = self.rows_active = None
+
+    # -- loading -----------------------------------------------------------
+
+    def refresh(self, conn=None) -> 'SalesAnalytics':
+        with self._lock, connection(conn) as c:
+            cols = self._cols
+            last_id = cols.id[-1] if len(cols) else 0
+            deletes = _sales_deletes(c)
+            if deletes != self._deletes and last_id:
+                # a sale was deleted (here, by another till or through the
+                # API); there is no row left to subtract, so reload
+                self._cols = cols = SalesColumns()
+                self._updated_mark = None
+                self.qty_all = None
+                self._state = None
+                last_id = 0
+            self._deletes = deletes
+            before = len(cols)
+            mark = c.execute('SELECT MAX(updated_at) FROM sales').fetchone()[0]
+            sales_repo.load_columns(after_id=last_id, columns=cols, conn=c)
+
+            sig = c.execute('SELECT COUNT(*), MAX(id), MAX(updated_at) FROM products').fetchone()
+            if sig != self._product_sig:
+                self._load_products(c)
+                self._product_sig = sig
+
+            if self.qty_all is None:
+                self._load_archived(c)
+                self._build()
+            elif len(cols) > before:
+                self._add(self._columns(slice(before, None)), 1)
+
+            if self._updated_mark is not None and mark and mark >= self._updated_mark and last_id:
+                self._apply_edits(c.execute(
+                    sales_repo.COLUMNS_SQL + ' WHERE updated_at >= ? AND +id <= ?',
+                    (self._updated_mark, last_id)
+                ).fetchall())
+            self._updated_mark = mark
+            state = (mark, len(cols), sig)
+            if state != self._state:
+                self._state = state
+                self.version = next(_versions)
+        return self
+
+    def _load_products(self, c):
+        rows = c.execute(
+            'SELECT p.id, p.name, p.price, p.cost_price, p.is_active, c.name '
+            'FROM products p LEFT JOIN categories c ON p.category_id = c.id'
+        ).fetchall()
+        size = (max(r[0] for r in rows) + 1) if rows else 1
+        self.known = np.zeros(size, dtype=bool)
+        self.price = np.zeros(size)
+        self.cost = np.zeros(size)
+        self.product_active = np.zeros(size, dtype=bool)
+        # codes follow sort order so grouped results come out already sorted
+        self.names = sorted({r[1] for r in rows}, key=lambda v: (v is not None, v or ''))
+        self.categories = sorted({r[5] for r in rows}, key=lambda v: (v is not None, v or ''))
+        name_codes = {name: i for i, name in enumerate(self.names)}
+        cat_codes = {cat: i for i, cat in enumerate(self.categories)}
+        self.name_code = np.zeros(size, dtype=np.int32)
+        self.cat_code = np.zeros(size, dtype=np.int32)
+        for pid, name, price, cost, active, cat in rows:
+            self.known[pid] = True
+            self.price[pid] = price or 0.0
+            self.cost[pid] = cost or 0.0
+            self.product_active[pid] = bool(active)
+            self.name_code[pid] = name_codes[name]
+            self.cat_code[pid] = cat_codes[cat]
+        if self.qty_all is not None:
+            self._grow(0, size)
+
+    def _load_archived(self, c):
+        # months moved out by archiving.py, which drops the engine afterwards,
+        # so the rollup is only read when an engine is first built
+        rows = archive.rollup(conn=c)
+        if not rows:
+            self._archived = None
+            return
+        months, pid, active, qty, lines = zip(*rows)
+        self._archived = (np.array([_period_key(m) for m in months], dtype=np.int64),
+                          np.array(pid, dtype=np.int64), np.array(active, dtype=np.float64),
+                          np.array(qty, dtype=np.float64), np.array(lines, dtype=np.float64))
+
+    def _columns(self, index):
+        cols = self._cols
+        return (np.frombuffer(cols.day, dtype=np.int32)[index],
+                np.frombuffer(cols.prod_id, dtype=np.int32)[index],
+                np.frombuffer(cols.qty, dtype=np.int32)[index],
+                np.frombuffer(cols.is_active, dtype=np.int8)[index])
+
+    def _matrix_rows(self, day):
+        # row 0 collects sales without a usable date; months start at row 1
+        keys = _month_key(day)
+        return np.where(keys > 0, keys - self._k0 + 1, 0)
+
+    def _build(self):
+        day, pid, qty, active = self._columns(slice(None))
+        dated = day[day > 0]
+        keys = _month_key(dated) if len(dated) else np.zeros(0, dtype=np.int64)
+        arch = self._archived
+        if arch is not None:
+            keys = np.concatenate([keys, arch[0]])
+        if len(keys):
+            self._k0 = int(keys.min())
+            months = int(keys.max()) - self._k0 + 2
+        else:
+            self._k0 = _period_key(date.today().isoformat())
+            months = 1
+        size = max(len(self.known), int(pid.max()) + 1 if len(pid) else 0,
+                   int(arch[1].max()) + 1 if arch is not None else 0)
+        flat = self._matrix_rows(day) * size + pid
+        cells = months * size
+        active = active.astype(np.float64)
+
+        def count(weights=None):
+            return np.bincount(flat, weights=weights, minlength=cells).reshape(months, size).astype(np.float64)
+
+        self.qty_all = count(qty)
+        self.rows_all = count()
+        self.qty_active = count(qty * active)
+        self.rows_active = count(active)
+        if arch is not None:
+            month, prod, arch_active, arch_qty, lines = arch
+            at = (month - self._k0 + 1, prod)
+            np.add.at(self.qty_all, at, arch_qty)
+            np.add.at(self.rows_all, at, lines)
+            np.add.at(self.qty_active, at, arch_qty * arch_active)
+            np.add.at(self.rows_active, at, lines * arch_active)
+        self._grow(0, len(self.known))
+
+    def _grow(self, months, size):
+        old_months, old_size = self.qty_all.shape
+        if months <= old_months and size <= old_size:
+            return
+        pad = ((0, max(0, months - old_months)), (0, max(0, size - old_size)))
+        self.qty_all = np.pad(self.qty_all, pad)
+        self.rows_all = np.pad(self.rows_all, pad)
+        self.qty_active = np.pad(self.qty_active, pad)
+        self.rows_active = np.pad(self.rows_active, pad)
+
+    def _add(self, columns, sign):
+        day, pid, qty, active = columns
+        if not len(day):
+            return
+        dated = day[day > 0]
+        if len(dated) and int(_month_key(dated.min())) < self._k0:
+            # backdated before the first cached month: cheaper to rebuild once
+            # (the columns already hold the new values)
+            self._build()
+            return
+        rows = self._matrix_rows(day)
+        self._grow(int(rows.max()) + 1, int(pid.max()) + 1)
+        at = (rows, pid)
+        qty = qty.astype(np.float64) * sign
+        active = active.astype(np.float64)
+        np.add.at(self.qty_all, at, qty)
+        np.add.at(self.rows_all, at, sign)
+        np.add.at(self.qty_active, at, qty * active)
+        np.add.at(self.rows_active, at, active * sign)
+
+    def _apply_edits(self, rows):
+        if not rows:
+            return
+        cols = self._cols
+        ids = np.frombuffer(cols.id, dtype=np.int64)
+        fresh = np.array(rows, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(ids, fresh[:, 0]), len(ids) - 1)
+        found = ids[pos] == fresh[:, 0]
+        pos, fresh = pos[found], fresh[found, 1:]
+        old = np.column_stack(self._columns(pos)).astype(np.int64)
+        # rows stamped in the same second as the last mark come back every
+        # time; only the ones whose values actually changed are re-bucketed
+        changed = (old != fresh).any(axis=1)
+        if not changed.any():
+            return
+        pos, old, fresh = pos[changed], old[changed], fresh[changed]
+        self._add(tuple(old.T), -1)
+        for p, (day, prod_id, qty, active) in zip(pos.tolist(), fresh.tolist()):
+            cols.day[p], cols.prod_id[p], cols.qty[p], cols.is_active[p] = day, prod_id, qty, active
+        self._add(tuple(fresh.T), 1)
+
+    # -- queries -------------------------------------------------------------
+
+    def _months(self, start, end):
+        months = self.qty_all.shape[0]
+        if start is None and end is None:
+            return slice(0, months)
+        lo = max(1, _period_key(start) - self._k0 + 1) if start else 1
+        hi = min(months, _period_key(end) - self._k0 + 2) if end else months
+        return slice(lo, max(lo, hi))
+
+    def _per_product(self, start, end, active_only):
+        rows = self._months(start, end)
+        size = len(self.known)
+        if active_only:
+            # sales of deactivated products drop out, like the SQL reports
+            keep = self.known & self.product_active
+            qty, count = self.qty_active, self.rows_active
+        else:
+            keep = self.known
+            qty, count = self.qty_all, self.rows_all
+        return qty[rows, :size].sum(axis=0) * keep, count[rows, :size].sum(axis=0) * keep
+
+    def monthly_history(self, before: str, months: int):
+        # active-sale qty per product id for the `months` whole months before
+        # the month of `before`, oldest first; inactive products are zeroed
+        with self._lock:
+            size = len(self.known)
+            out = np.zeros((months, size))
+            last = _period_key(before) - self._k0 + 1
+            first = last - months
+            lo, hi = max(first, 1), min(last, self.qty_active.shape[0])
+            if hi > lo:
+                out[lo - first:hi - first] = self.qty_active[lo:hi, :size]
+            return out * (self.known & self.product_active)
+
+    def sales_by_category(self, start: Optional[str] = None, end: Optional[str] = None,
+                          active_only: bool = False) -> Tuple[List, List]:
+        with self._lock:
+            qty_by_product, rows = self._per_product(start, end, active_only)
+            n = len(self.categories)
+            sales = np.bincount(self.cat_code, weights=qty_by_product * self.price, minlength=n)
+            present = np.bincount(self.cat_code, weights=rows, minlength=n) > 0
+            present = np.flatnonzero(present).tolist()
+            return [self.categories[i] for i in present], sales[present].tolist()
+
+    def product_summary(self, year: str, month: str = 'All') -> List[ReportRow]:
+        if month != 'All':
+            start = end = f"{year}-{int(month):02d}"
+        else:
+            start, end = f"{year}-01", f"{year}-12"
+        with self._lock:
+            qty_by_product, rows = self._per_product(start, end, True)
+            n = len(self.names)
+            tot_qty = np.bincount(self.name_code, weights=qty_by_product, minlength=n)
+            tot_cost = np.bincount(self.name_code, weights=qty_by_product * self.cost, minlength=n)
+            tot_sales = np.bincount(self.name_code, weights=qty_by_product * self.price, minlength=n)
+            present = np.flatnonzero(np.bincount(self.name_code, weights=rows, minlength=n) > 0)
+            names = self.names
+            return list(map(ReportRow._make, zip(
+                [names[i] for i in present.tolist()], tot_qty[present].astype(np.int64).tolist(),
+                tot_cost[present].tolist(), tot_sales[present].tolist())))
+
+    def by_period(self, start: Optional[str] = None, end: Optional[str] = None,
+                  active_only: bool = True) -> Tuple[List[str], List[int], List[float]]:
+        with self._lock:
+            rows = self._months(start, end)
+            rows = slice(max(1, rows.start), rows.stop)
+            size = len(self.known)
+            keep = (self.known & self.product_active if active_only else self.known).astype(np.float64)
+            qty = (self.qty_active if active_only else self.qty_all)[rows, :size]
+            count = (self.rows_active if active_only else self.rows_all)[rows, :size] @ keep
+            qty_sum = qty @ keep
+            sales_sum = qty @ (self.price * keep)
+            first = self._k0 + rows.start - 1
+        periods = [(f"{k // 12:04d}-{k % 12 + 1:02d}", int(q), s)
+                   for k, q, s, c in zip(range(first, first + len(count)), qty_sum.tolist(),
+                                         sales_sum.tolist(), count.tolist()) if c]
+        if not periods:
+            return [], [], []
+        labels, qtys, sales = zip(*periods)
+        return list(labels), list(qtys), list(sales)
+
+    def top_products(self, n: int = 10, start: Optional[str] = None, end: Optional[str] = None,
+                     by: str = 'sales') -> List[Tuple[str, float]]:
+        with self._lock:
+            qty_by_product, _ = self._per_product(start, end, True)
+            score = qty_by_product * self.price if by == 'sales' else qty_by_product
+            n = min(n, int((score > 0).sum()))
+            if n <= 0:
+                return []
+            top = np.argpartition(score, -n)[-n:]
+            top = top[np.argsort(score[top])[::-1]]
+            return [(self.names[self.name_code[i]], float(score[i])) for i in top]
@@ -0,0 +1,193 @@
+import http.client
+import importlib
+import json
+import os
+import threading
+from typing import List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from repositories.records import InventoryRow, ProductRow, SaleRow
+from repositories.reports import ReportRow
+from repositories.warehouses import LocationStock
+
+# Thin-client mode for the Tk frames: with SIS_API_URL set (for example
+# http://till-server:8765) the sales, products, inventory and report screens
+# talk to api_server.py instead of opening system.db themselves. backend()
+# hands a frame either the local repository module or a remote stand-in with
+# the same functions, so the frames do not care which one they get.
+
+API_URL = os.environ.get('SIS_API_URL', '')
+TIMEOUT = float(os.environ.get('SIS_API_TIMEOUT', 10))
+
+
+class ApiClientError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiClient:
+    # one keep-alive connection per thread; ETags make repeated reads of
+    # unchanged data a 304 with no body
+
+    def __init__(self, base_url: str, timeout: float = TIMEOUT):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.etags = {}
+        return conn
+
+    def request(self, method: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None):
+        if params:
+            path += '?' + urlencode({k: v for k, v in params.items() if v not in (None, '')})
+        headers = {'Content-Type': 'application/json'}
+        payload = json.dumps(body).encode() if body is not None else None
+        if method == 'GET' and path in getattr(self._local, 'etags', {}):
+            headers['If-None-Match'] = self._local.etags[path][0]
+        for attempt in (1, 2):
+            conn = self._connection()
+            sent = False
+            try:
+                conn.request(method, path, payload, headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # the server closed an idle keep-alive socket; reconnect once.
+                # A write that went out may have been committed before the
+                # reply was lost, so only reads, or writes that never left,
+                # are sent again: a sale must not be recorded twice.
+                conn.close()
+                self._local.conn = None
+                if attempt == 2 or (sent and method != 'GET'):
+                    raise
+        if response.status == 304:
+            return self._local.etags[path][1]
+        result = json.loads(data or b'null')
+        if response.status >= 400:
+            raise ApiClientError(response.status, (result or {}).get('error', response.reason))
+        etag = response.getheader('ETag')
+        if method == 'GET' and etag:
+            self._local.etags[path] = (etag, result)
+        return result
+
+    def rows(self, path: str, **params) -> List[list]:
+        return self.request('GET', path, params)['rows']
+
+
+class RemoteSales:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def list_sales(self, term: str = '', start: str = '', end: str = '', active: Optional[bool] = None,
+                   conn=None) -> List[SaleRow]:
+        flag = None if active is None else int(active)
+        return [SaleRow(*r) for r in self.client.rows('/api/sales', term=term, start=start, end=end,
+                                                        active=flag)]
+
+    def add_sale(self, receipt_no, date, prod_id, qty, notes, is_active, conn=None) -> int:
+        return self.client.request('POST', '/api/sales', body={
+            'receipt_no': receipt_no, 'date': date, 'prod_id': prod_id, 'qty': qty,
+            'notes': notes, 'is_active': is_active})['id']
+
+    def update_sale(self, sale_id, receipt_no, qty, notes, is_active, conn=None) -> None:
+        self.client.request('PUT', f'/api/sales/{sale_id}', body={
+            'receipt_no': receipt_no, 'qty': qty, 'notes': notes, 'is_active': is_active})
+
+    def delete_sale(self, sale_id, conn=None) -> None:
+        self.client.request('DELETE', f'/api/sales/{sale_id}')
+
+
+class RemoteProducts:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def list_products(self, term: str = '', conn=None) -> List[ProductRow]:
+        return [ProductRow(*r) for r in self.client.rows('/api/products', term=term)]
+
+    def list_names(self, conn=None) -> List[tuple]:
+        return [tuple(r) for r in self.client.rows('/api/products/names')]
+
+    def save_product(self, product_id, sku, name, description, category_id, cost, price, qty,
+                     warehouse_id, active, conn=None) -> int:
+        body = {'sku': sku, 'name': name, 'description': description, 'category_id': category_id,
+                'cost_price': cost, 'price': price, 'quantity': qty, 'warehouse_id': warehouse_id,
+                'is_active': active}
+        if product_id:
+            return self.client.request('PUT', f'/api/products/{product_id}', body=body)['id']
+        return self.client.request('POST', '/api/products', body=body)['id']
+
+    def delete_product(self, product_id, conn=None) -> None:
+        self.client.request('DELETE', f'/api/products/{product_id}')
+
+
+class RemoteInventory:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def list_inventory(self, term: str = '', warehouse_id: Optional[int] = None,
+                       conn=None) -> List[InventoryRow]:
+        return [InventoryRow(*r) for r in self.client.rows('/api/inventory', term=term,
+                                                             warehouse_id=warehouse_id)]
+
+
+class RemoteReports:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def years(self, conn=None) -> List[str]:
+        return [r[0] for r in self.client.rows('/api/reports/years')]
+
+    def product_summary(self, year: str, month: str = 'All', conn=None) -> List[ReportRow]:
+        return [ReportRow(*r) for r in self.client.rows('/api/reports/summary', year=year, month=month)]
+
+
+class RemoteLookups:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def category_names(self, conn=None) -> List[str]:
+        return [name for _, name in self.client.rows('/api/categories')]
+
+    def category_id(self, name: str, conn=None) -> Optional[int]:
+        return next((cid for cid, n in self.client.rows('/api/categories') if n == name), None)
+
+
+class RemoteWarehouses:
+    def __init__(self, client: ApiClient):
+        self.client = client
+
+    def active_names(self, conn=None) -> List[str]:
+        return [name for _, name in self.client.rows('/api/warehouses')]
+
+    def warehouse_id(self, name: str, conn=None) -> Optional[int]:
+        return next((wid for wid, n in self.client.rows('/api/warehouses') if n == name), None)
+
+    def product_locations(self, product_id: int, conn=None) -> List[LocationStock]:
+        return [LocationStock(*r) for r in self.client.rows(f'/api/products/{product_id}/locations')]
+
+
+REMOTES = {'sales': RemoteSales, 'products': RemoteProducts, 'inventory': RemoteInventory,
+           'reports': RemoteReports, 'lookups': RemoteLookups, 'warehouses': RemoteWarehouses}
+_client: Optional[ApiClient] = None
+
+
+def remote() -> bool:
+    return bool(API_URL)
+
+
+def backend(name: str):
+    # the repository module, or its remote stand-in in thin-client mode
+    global _client
+    if not remote():
+        return importlib.import_module(f'repositories.{name}')
+    if _client is None:
+        _client = ApiClient(API_URL)
+    return REMOTES[name](_client)
@@ -0,0 +1,417 @@
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import analytics
+import database
+import maintenance
+from repositories import inventory, lookups, products, reports, sales, warehouses
+
+# Local JSON API so several tills can share one store database. Reads run on
+# a small pool of read-only connections; every write goes through one writer
+# thread, which commits queued writes together (each in its own savepoint) so
+# tills never fight over the SQLite write lock. GET responses are cached until
+# the database changes, whoever changed it.
+
+DEFAULT_PORT = int(os.environ.get('SIS_API_PORT', 8765))
+READERS = int(os.environ.get('SIS_API_READERS', 4))
+CACHE_ENTRIES = 512
+WRITE_BATCH = 64
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _connect(read_only: bool) -> sqlite3.Connection:
+    conn = sqlite3.connect(database.DB_NAME, check_same_thread=False, isolation_level=None,
+                           factory=database.Connection)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA busy_timeout = 5000')
+    if read_only:
+        conn.execute('PRAGMA query_only = 1')
+    return conn
+
+
+class ReadPool:
+    def __init__(self, size: int):
+        self._idle = queue.Queue()
+        for _ in range(max(1, size)):
+            self._idle.put(_connect(read_only=True))
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class Writer(threading.Thread):
+    # The only connection that writes. Jobs queued while a commit is in
+    # flight are committed together; a failing job rolls back to its own
+    # savepoint without affecting the others.
+
+    def __init__(self):
+        super().__init__(name='api-writer', daemon=True)
+        self.jobs = queue.Queue()
+        self.generation = 0
+
+    def submit(self, func: Callable, *args, **kwargs):
+        future = Future()
+        self.jobs.put((func, args, kwargs, future))
+        return future.result()
+
+    def run(self):
+        conn = _connect(read_only=False)
+        while True:
+            try:
+                job = self.jobs.get(timeout=maintenance.IDLE_SECONDS)
+            except queue.Empty:
+                # no writes for a while: a bounded ANALYZE / vacuum step on
+                # this connection, so it never competes for the write lock
+                maintenance.idle_step(conn)
+                continue
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self.jobs.put(None)
+                    break
+                batch.append(job)
+            self._commit(conn, batch)
+        conn.close()
+
+    def _commit(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for func, args, kwargs, _ in batch:
+                conn.execute('SAVEPOINT api_write')
+                try:
+                    outcomes.append((func(*args, conn=conn, **kwargs), None))
+                    conn.execute('RELEASE api_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO api_write')
+                    conn.execute('RELEASE api_write')
+                    outcomes.append((None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            outcomes = [(None, e)] * len(batch)
+        self.generation += 1
+        for (_, _, _, future), (result, error) in zip(batch, outcomes):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stop(self):
+        self.jobs.put(None)
+
+
+class ResponseCache:
+    # Encoded GET bodies keyed by path and query. An entry is only served
+    # while the database is unchanged: the writer's generation covers this
+    # server's writes, the database and WAL file stats cover everyone else's.
+
+    def __init__(self, size: int = CACHE_ENTRIES):
+        self.size = size
+        self._entries: 'OrderedDict[str, Tuple[tuple, bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def state(writer: Writer) -> tuple:
+        stats = []
+        for path in (database.DB_NAME, database.DB_NAME + '-wal'):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return (writer.generation,) + tuple(stats)
+
+    def get(self, key: str, state: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != state:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: str, state: tuple, body: bytes) -> str:
+        etag = f'"{abs(hash((key, state))):x}"'
+        with self._lock:
+            self._entries[key] = (state, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return etag
+
+
+# -- endpoints -------------------------------------------------------------------
+
+def _rows(rows) -> Dict:
+    rows = [list(r) for r in rows]
+    return {'count': len(rows), 'rows': rows}
+
+
+def _flag(value: Optional[str]) -> Optional[bool]:
+    if value in (None, ''):
+        return None
+    return value.lower() in ('1', 'true', 'yes', 'active')
+
+
+def _int(value, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be an integer")
+
+
+def get_products(api, conn, q, body):
+    return _rows(products.list_products(q.get('term', ''), conn=conn))
+
+
+def get_product_names(api, conn, q, body):
+    return _rows(products.list_names(conn=conn))
+
+
+def get_product_locations(api, conn, q, body, product_id):
+    return _rows(warehouses.product_locations(int(product_id), conn=conn))
+
+
+def get_categories(api, conn, q, body):
+    return _rows(lookups.category_choices(conn=conn))
+
+
+def get_warehouses(api, conn, q, body):
+    return _rows(warehouses.active_choices(conn=conn))
+
+
+def get_inventory(api, conn, q, body):
+    warehouse_id = q.get('warehouse_id')
+    return _rows(inventory.list_inventory(q.get('term', ''), _int(warehouse_id, 'warehouse_id')
+                                          if warehouse_id else None, conn=conn))
+
+
+def get_sales(api, conn, q, body):
+    return _rows(sales.list_sales(q.get('term', ''), q.get('start', ''), q.get('end', ''),
+                                  _flag(q.get('active')), conn=conn))
+
+
+def get_report_years(api, conn, q, body):
+    return _rows([y] for y in reports.years(conn=conn))
+
+
+def get_report_summary(api, conn, q, body):
+    year, month = q.get('year'), q.get('month', 'All')
+    if not year:
+        raise ApiError(400, "year is required")
+    engine = analytics.get_engine()
+    if engine is not None:
+        return _rows(engine.refresh(conn=conn).product_summary(year, month))
+    return _rows(reports.product_summary(year, month, conn=conn))
+
+
+def _fields(body, *names):
+    try:
+        return [body[n] for n in names]
+    except KeyError as e:
+        raise ApiError(400, f"missing field {e.args[0]}")
+
+
+def post_sale(api, conn, q, body):
+    receipt_no, date, prod_id, qty = _fields(body, 'receipt_no', 'date', 'prod_id', 'qty')
+    sale_id = api.writer.submit(sales.add_sale, receipt_no, date, _int(prod_id, 'prod_id'),
+                                _int(qty, 'qty'), body.get('notes', ''), _int(body.get('is_active', 1), 'is_active'))
+    return {'id': sale_id}
+
+
+def put_sale(api, conn, q, body, sale_id):
+    receipt_no, qty = _fields(body, 'receipt_no', 'qty')
+    api.writer.submit(sales.update_sale, int(sale_id), receipt_no, _int(qty, 'qty'), body.get('notes', ''),
+                      _int(body.get('is_active', 1), 'is_active'))
+    return {'id': int(sale_id)}
+
+
+def delete_sale(api, conn, q, body, sale_id):
+    api.writer.submit(sales.delete_sale, int(sale_id))
+    return {'id': int(sale_id)}
+
+
+def save_product(api, conn, q, body, product_id=None):
+    fields = ('sku', 'name', 'description', 'category_id', 'cost_price', 'price', 'quantity',
+              'warehouse_id', 'is_active')
+    values = _fields(body, *fields)
+    return {'id': api.writer.submit(products.save_product, int(product_id) if product_id else None, *values)}
+
+
+def delete_product(api, conn, q, body, product_id):
+    api.writer.submit(products.delete_product, int(product_id))
+    return {'id': int(product_id)}
+
+
+def get_health(api, conn, q, body):
+    return {'ok': True, 'db': database.DB_NAME, 'cache_hits': api.cache.hits, 'cache_misses': api.cache.misses}
+
+
+ROUTES: List[Tuple[str, 're.Pattern', Callable]] = [
+    ('GET', re.compile(r'/api/health'), get_health),
+    ('GET', re.compile(r'/api/products'), get_products),
+    ('GET', re.compile(r'/api/products/names'), get_product_names),
+    ('GET', re.compile(r'/api/products/(\d+)/locations'), get_product_locations),
+    ('POST', re.compile(r'/api/products'), save_product),
+    ('PUT', re.compile(r'/api/products/(\d+)'), save_product),
+    ('DELETE', re.compile(r'/api/products/(\d+)'), delete_product),
+    ('GET', re.compile(r'/api/categories'), get_categories),
+    ('GET', re.compile(r'/api/warehouses'), get_warehouses),
+    ('GET', re.compile(r'/api/inventory'), get_inventory),
+    ('GET', re.compile(r'/api/sales'), get_sales),
+    ('POST', re.compile(r'/api/sales'), post_sale),
+    ('PUT', re.compile(r'/api/sales/(\d+)'), put_sale),
+    ('DELETE', re.compile(r'/api/sales/(\d+)'), delete_sale),
+    ('GET', re.compile(r'/api/reports/years'), get_report_years),
+    ('GET', re.compile(r'/api/reports/summary'), get_report_summary),
+]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so a till reuses its socket
+    server_version = 'SalesInventoryAPI/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _route(self, method: str, path: str):
+        for route_method, pattern, func in ROUTES:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                return func, match.groups()
+        if any(p.fullmatch(path) for _, p, _ in ROUTES):
+            raise ApiError(405, f"{method} not allowed on {path}")
+        raise ApiError(404, f"no such endpoint {path}")
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _handle(self, method: str):
+        api = self.server
+        url = urlsplit(self.path)
+        try:
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                # the rest of the stream cannot be framed, so drop the socket
+                self.close_connection = True
+                raise ApiError(400, "bad Content-Length")
+            # read before routing: a body left unread on a kept-alive socket
+            # would be parsed as the next request
+            raw = self.rfile.read(length) if length > 0 else b''
+            func, groups = self._route(method, url.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if method == 'GET':
+                key = url.path + '?' + url.query
+                state = ResponseCache.state(api.writer)
+                cached = api.cache.get(key, state)
+                if cached is not None:
+                    body, etag = cached
+                    if self.headers.get('If-None-Match') == etag:
+                        self._send(304, b'', etag)
+                    else:
+                        self._send(200, body, etag)
+                    return
+                with api.readers.connection() as conn:
+                    body = json.dumps(func(api, conn, query, None, *groups)).encode()
+                self._send(200, body, api.cache.put(key, state, body))
+                return
+            try:
+                payload = json.loads(raw or b'{}')
+            except ValueError:
+                raise ApiError(400, "body is not valid JSON")
+            self._send(200, json.dumps(func(api, None, query, payload, *groups)).encode())
+        except ApiError as e:
+            self._send(e.status, json.dumps({'error': str(e)}).encode())
+        except (ValueError, sqlite3.IntegrityError) as e:
+            self._send(400, json.dumps({'error': str(e)}).encode())
+        except Exception as e:
+            self._send(500, json.dumps({'error': f"{type(e).__name__}: {e}"}).encode())
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, readers: int = READERS,
+                 verbose: bool = False):
+        # WAL lets the readers carry on while the writer commits
+        with database.get_connection() as conn:
+            conn.execute('PRAGMA journal_mode = WAL')
+        self.readers = ReadPool(readers)
+        self.writer = Writer()
+        self.writer.start()
+        self.cache = ResponseCache()
+        self.verbose = verbose
+        super().__init__((host, port), ApiHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.writer.stop()
+        self.writer.join()
+        self.readers.close()
+
+
+def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, readers: int = READERS,
+          verbose: bool = False) -> None:
+    server = ApiServer(host, port, readers, verbose)
+    print(f"serving {database.DB_NAME} on http://{host}:{server.server_address[1]}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
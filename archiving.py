@@ -0,0 +1,103 @@
+import re
+import threading
+from datetime import date
+from typing import Callable, List, NamedTuple, Optional
+
+import analytics
+import database
+from jobs import Cancelled
+from repositories import archive, now
+
+# Moves closed months of sales out of the hot database into
+# <db>_archive.db. Each month is copied into the archive and committed
+# first; then, in one transaction on the hot database, it is summed into
+# sales_archived, logged, and the copied rows are deleted. A crash between
+# the two steps leaves the month in both files, and the next run simply
+# copies it again (INSERT OR REPLACE) before deleting.
+
+KEEP_MONTHS = 24
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class ArchiveResult(NamedTuple):
+    months: List[str]
+    rows: int
+    archived_before: Optional[str]
+    path: str
+
+
+def cutoff_month(keep_months: int, today: Optional[date] = None) -> str:
+    # the current month plus keep_months full months before it stay hot
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - keep_months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _ensure_archive(c) -> List[str]:
+    # same columns as the hot table, without its foreign keys (products stay
+    # in the hot file); columns added to sales since are appended
+    hot = c.execute('PRAGMA main.table_info(sales)').fetchall()
+    defs = ', '.join('id INTEGER PRIMARY KEY' if name == 'id' else f'{name} {decl}'
+                     for _, name, decl, *_ in hot)
+    c.execute(f'CREATE TABLE IF NOT EXISTS {archive.SCHEMA}.sales ({defs})')
+    cold = {r[1] for r in c.execute(f'PRAGMA {archive.SCHEMA}.table_info(sales)')}
+    for _, name, decl, *_ in hot:
+        if name not in cold:
+            c.execute(f'ALTER TABLE {archive.SCHEMA}.sales ADD COLUMN {name} {decl}')
+    c.execute(f'CREATE INDEX IF NOT EXISTS {archive.SCHEMA}.idx_sales_date ON sales(date)')
+    database.invalidate_columns()
+    return [r[1] for r in hot]
+
+
+def archive_sales(keep_months: int = KEEP_MONTHS, today: Optional[date] = None,
+                  progress: Progress = None, cancel: Optional[threading.Event] = None) -> ArchiveResult:
+    cutoff = cutoff_month(keep_months, today)
+    conn = database.get_connection()
+    moved: List[str] = []
+    rows = 0
+    try:
+        archive.attach(conn, create=True)
+        cols = ', '.join(_ensure_archive(conn))
+        conn.commit()
+        months = [m for (m,) in conn.execute(
+            'SELECT DISTINCT substr(date, 1, 7) FROM sales WHERE date < ? ORDER BY 1', (cutoff,))
+            if m and re.fullmatch(r'\d{4}-\d{2}', m)]
+        outbox = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'change_outbox'").fetchone()
+        for done, month in enumerate(months):
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            span = (month, archive.next_month(month))
+            with conn:
+                conn.execute(f'INSERT OR REPLACE INTO {archive.SCHEMA}.sales ({cols}) '
+                             f'SELECT {cols} FROM main.sales WHERE date >= ? AND date < ?', span)
+            copied = (f'FROM main.sales WHERE date >= ? AND date < ? AND id IN '
+                      f'(SELECT id FROM {archive.SCHEMA}.sales WHERE date >= ? AND date < ?)')
+            with conn:
+                mark = conn.execute('SELECT IFNULL(MAX(seq), 0) FROM change_outbox').fetchone()[0] if outbox else 0
+                conn.execute(f'''
+                    INSERT INTO sales_archived (month, prod_id, is_active, qty, lines)
+                    SELECT ?, prod_id, CASE WHEN is_active THEN 1 ELSE 0 END, SUM(qty), COUNT(*) {copied}
+                    GROUP BY 2, 3
+                    ON CONFLICT(month, prod_id, is_active) DO UPDATE SET
+                        qty = qty + excluded.qty, lines = lines + excluded.lines
+                ''', (month,) + span + span)
+                count = conn.execute(f'DELETE {copied}', span + span).rowcount
+                if outbox:
+                    # archived rows are not deleted as far as head office is
+                    # concerned; sync.py reads them from the archive
+                    conn.execute("DELETE FROM change_outbox WHERE seq > ? AND table_name = 'sales' "
+                                 "AND op = 'delete'", (mark,))
+                conn.execute('INSERT INTO sales_archive_log (month, rows, archived_at) VALUES (?, ?, ?) '
+                             'ON CONFLICT(month) DO UPDATE SET rows = rows + excluded.rows, '
+                             'archived_at = excluded.archived_at', (month, count, now()))
+            moved.append(month)
+            rows += count
+            if progress:
+                progress(done + 1, len(months))
+    finally:
+        conn.close()
+        if moved:
+            # the cached history still holds the moved rows as sales
+            analytics.invalidate()
+    return ArchiveResult(moved, rows, archive.archived_before(), archive.archive_path())
@@ -0,0 +1,221 @@
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import database
+from jobs import Cancelled
+from repositories import archive
+
+# Online backups through SQLite's backup API, so the tills keep selling while
+# the copy is taken. The copy runs PAGES pages at a time and sleeps between
+# steps; each step only holds a read lock, and in WAL mode (which the API
+# server turns on) readers never block writers. The finished copy is
+# optionally gzipped, checked with PRAGMA integrity_check, and older backups
+# beyond KEEP are removed. The sales archive, if there is one, is backed up
+# alongside.
+
+PAGES = 1024
+SLEEP = 0.01
+KEEP = 14
+MAX_RESTARTS = 3
+STAMP = '%Y%m%d-%H%M%S'
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class BackupResult(NamedTuple):
+    source: str
+    path: str
+    pages: int
+    seconds: float
+    size: int
+    verified: Optional[bool]
+    removed: List[str]
+    restarts: int = 0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def backup_dir(db_path: Optional[str] = None) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path or database.DB_NAME)), 'backups')
+
+
+def _name(db_path: str) -> str:
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def list_backups(dest: str, db_path: Optional[str] = None) -> List[str]:
+    # newest first
+    name = _name(db_path or database.DB_NAME)
+    paths = glob.glob(os.path.join(dest, f'{name}-*.db')) + glob.glob(os.path.join(dest, f'{name}-*.db.gz'))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def verify(path: str) -> bool:
+    # integrity_check on the copy; gzipped copies are unpacked to a temp file
+    tmp = None
+    if path.endswith('.gz'):
+        fd, tmp = tempfile.mkstemp(suffix='.db')
+        with os.fdopen(fd, 'wb') as out, gzip.open(path, 'rb') as src:
+            shutil.copyfileobj(src, out)
+    try:
+        # immutable: no -wal/-shm files are created next to the copy, even
+        # for backups taken before they were switched out of WAL mode
+        conn = sqlite3.connect(f"file:{tmp or path}?mode=ro&immutable=1", uri=True)
+        try:
+            return conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+
+class _Restarting(Exception):
+    pass
+
+
+def _copy(source: str, target: str, pages: int, sleep: float, progress: Progress,
+          cancel: Optional[threading.Event], standalone: bool = True) -> Tuple[int, int]:
+    # standalone: the copy is a file of its own, not the live database, so it
+    # leaves WAL mode and opens without -wal/-shm files beside it
+    src = sqlite3.connect(source, isolation_level=None)
+    dst = sqlite3.connect(target)
+    state = {'total': 0, 'done': None, 'restarts': 0}
+
+    def step(status, remaining, total):
+        done = total - remaining
+        if status == sqlite3.SQLITE_OK and state['done'] is not None and done <= state['done']:
+            # a step that copied pages without getting further: another
+            # connection wrote and the copy started over
+            state['restarts'] += 1
+            if state['restarts'] > MAX_RESTARTS:
+                raise _Restarting()
+        state['total'], state['done'] = total, done
+        if progress:
+            progress(done, total)
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        if remaining and sleep:
+            # the backup API itself only sleeps when the source is locked
+            time.sleep(sleep)
+
+    try:
+        src.execute('PRAGMA busy_timeout = 5000')
+        if src.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            # a read transaction held across the steps pins one snapshot, so
+            # the copy never restarts, and in WAL mode writers carry on
+            src.execute('BEGIN')
+            src.execute('SELECT COUNT(*) FROM sqlite_master')
+        try:
+            src.backup(dst, pages=pages, progress=step)
+        except _Restarting:
+            # rollback journal under steady writes: copy in one step instead,
+            # which holds the read lock only as long as the copy itself
+            src.backup(dst, pages=-1)
+        if src.in_transaction:
+            src.execute('COMMIT')
+        if standalone:
+            dst.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        dst.close()
+        src.close()
+    return state['total'], state['restarts']
+
+
+def _compress(path: str) -> str:
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb', compresslevel=6) as out:
+        shutil.copyfileobj(src, out, 1 << 20)
+    os.remove(path)
+    return path + '.gz'
+
+
+def rotate(dest: str, keep: int = KEEP, db_path: Optional[str] = None) -> List[str]:
+    removed = list_backups(dest, db_path)[keep:] if keep > 0 else []
+    for path in removed:
+        for name in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(name):
+                os.remove(name)
+    return removed
+
+
+def backup(dest: Optional[str] = None, pages: int = PAGES, sleep: float = SLEEP, compress: bool = False,
+           keep: int = KEEP, check: bool = True, db_path: Optional[str] = None,
+           progress: Progress = None, cancel: Optional[threading.Event] = None) -> List[BackupResult]:
+    db_path = db_path or database.DB_NAME
+    dest = dest or backup_dir(db_path)
+    os.makedirs(dest, exist_ok=True)
+    stamp = datetime.now().strftime(STAMP)
+    results = []
+    for source in (db_path, archive.archive_path(db_path)):
+        if source != db_path and not os.path.exists(source):
+            continue
+        path = os.path.join(dest, f'{_name(source)}-{stamp}.db')
+        n = 1
+        while os.path.exists(path) or os.path.exists(path + '.gz'):
+            n += 1
+            path = os.path.join(dest, f'{_name(source)}-{stamp}-{n}.db')
+        partial = path + '.partial'
+        start = time.perf_counter()
+        try:
+            copied, restarts = _copy(source, partial, pages, sleep, progress, cancel)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        seconds = time.perf_counter() - start
+        # only complete copies get a name rotation and restores will pick up
+        os.replace(partial, path)
+        if compress:
+            path = _compress(path)
+        verified = verify(path) if check else None
+        size = os.path.getsize(path)
+        removed = rotate(dest, keep, source)
+        results.append(BackupResult(source, path, copied, seconds, size, verified, removed, restarts))
+    return results
+
+
+def restore(path: str, db_path: Optional[str] = None) -> str:
+    # writes a verified backup over the database through the backup API, so
+    # a running app sees a consistent file; keeps the replaced one aside
+    db_path = db_path or database.DB_NAME
+    if not verify(path):
+        raise ValueError(f"{path} failed the integrity check; not restoring it")
+    tmp = None
+    if path.endswith('.gz'):
+        fd, tmp = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(db_path)))
+        with os.fdopen(fd, 'wb') as out, gzip.open(path, 'rb') as src:
+            shutil.copyfileobj(src, out)
+    try:
+        if os.path.exists(db_path):
+            aside = f"{db_path}.before-restore-{datetime.now().strftime(STAMP)}"
+            _copy(db_path, aside, -1, 0, None, None)
+        _copy(tmp or path, db_path, -1, 0, None, None, standalone=False)
+    finally:
+        if tmp:
+            os.remove(tmp)
+    return db_path
+
+
+def run_schedule(every_minutes: float, report: Callable[[List[BackupResult], Optional[Exception]], None],
+                 **options) -> None:
+    # blocking loop for cli.py backup --every; a failed run is reported and
+    # retried at the next slot instead of ending the schedule
+    while True:
+        started = time.monotonic()
+        try:
+            report(backup(**options), None)
+        except (sqlite3.Error, OSError) as e:
+            report([], e)
+        time.sleep(max(0.0, every_minutes * 60 - (time.monotonic() - started)))
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence
+
+import database
+import exports
+from repositories import reports
+
+# Month-end reporting: every requested month (and optionally each full year)
+# as PDF and/or data files in one run. Sales are scanned once, split into id
+# slices aggregated in parallel by worker processes with their own read-only
+# connections; month totals are then combined into every period that needs
+# them instead of re-querying, and the files are written in parallel too.
+
+SLICES_PER_WORKER = 4
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _open_worker(db_path: str):
+    global _conn
+    _conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _aggregate(task):
+    first_id, last_id, start, end = task
+    return reports.monthly_quantities(first_id, last_id, start, end, conn=_conn)
+
+
+def _write(task):
+    period, rows, out_dir, formats = task
+    year, _, month = period.partition('-')
+    base = os.path.join(out_dir, f"sales_report_{period}")
+    paths = []
+    for ext in formats:
+        if ext == '.pdf':
+            paths += exports.cached_report_pdf(base + ext, year, month or 'All', rows)
+            continue
+        writer = exports.open_data_writer(base + ext, exports.REPORT_COLUMNS)
+        try:
+            if rows:
+                writer.write(list(zip(*rows)))
+            paths += writer.close()
+        except BaseException:
+            writer.discard()
+            raise
+    return paths
+
+
+@contextmanager
+def _pool(workers: int, db_path: str):
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_open_worker, initargs=(db_path,)) as pool:
+            yield pool.map
+    else:
+        _open_worker(db_path)
+        yield map
+
+
+def next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + 1:04d}-01" if mon == 12 else f"{year:04d}-{mon + 1:02d}"
+
+
+def month_range(first: str, last: str) -> List[str]:
+    months = []
+    while first <= last:
+        months.append(first)
+        first = next_month(first)
+    return months
+
+
+def last_months(count: int, today: Optional[date] = None) -> List[str]:
+    # the `count` months ending with the current one
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - (count - 1)
+    return month_range(f"{index // 12:04d}-{index % 12 + 1:02d}", f"{today:%Y-%m}")
+
+
+def _slices(first_id: int, last_id: int, count: int):
+    step = max((last_id - first_id + count) // count, 1)
+    return [(lo, min(lo + step - 1, last_id)) for lo in range(first_id, last_id + 1, step)]
+
+
+def _report_rows(parts: Sequence[Dict[int, int]], catalog) -> List[tuple]:
+    # same shape and order as reports.product_summary: per product name,
+    # active products only, sorted by name
+    totals = {}
+    for part in parts:
+        for pid, qty in part.items():
+            if pid in catalog:
+                totals[pid] = totals.get(pid, 0) + qty
+    by_name = {}
+    for pid, qty in totals.items():
+        name, cost, price = catalog[pid]
+        row = by_name.get(name)
+        if row is None:
+            by_name[name] = [qty, qty * cost, qty * price]
+        else:
+            row[0] += qty
+            row[1] += qty * cost
+            row[2] += qty * price
+    return [(name,) + tuple(by_name[name]) for name in sorted(by_name)]
+
+
+def generate(out_dir: str, months: Sequence[str], yearly: bool = False,
+             formats: Sequence[str] = ('.pdf', '.csv'), workers: Optional[int] = None,
+             progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    for ext in formats:
+        if ext != '.pdf' and ext not in exports.data_formats():
+            raise ValueError(f"Unsupported report format '{ext}'")
+    os.makedirs(out_dir, exist_ok=True)
+    months = sorted(set(months))
+    workers = workers or os.cpu_count() or 1
+    db_path = os.path.abspath(database.DB_NAME)
+
+    first_id, last_id = reports.sales_id_range()
+    catalog = {pid: (name, cost or 0, price or 0) for pid, name, cost, price in reports.active_prices()}
+    start, end = months[0] + '-01', next_month(months[-1]) + '-01'
+
+    # a year is reported only when all of its months were requested
+    periods = {month: [month] for month in months}
+    if yearly:
+        for year in sorted({month[:4] for month in months}):
+            full = month_range(f"{year}-01", f"{year}-12")
+            if all(month in periods for month in full):
+                periods[year] = full
+
+    paths = []
+    done = 0
+    with _pool(workers, db_path) as run:
+        totals: Dict[str, Dict[int, int]] = {month: {} for month in months}
+        if first_id is not None:
+            tasks = [(lo, hi, start, end) for lo, hi in _slices(first_id, last_id, workers * SLICES_PER_WORKER)]
+            for part in run(_aggregate, tasks):
+                for month, pid, qty in part:
+                    per = totals[month]
+                    per[pid] = per.get(pid, 0) + (qty or 0)
+        for month, pid, qty in reports.archived_quantities(start, end):
+            per = totals[month]
+            per[pid] = per.get(pid, 0) + (qty or 0)
+
+        tasks = ((period, _report_rows([totals[m] for m in members], catalog), out_dir, formats)
+                 for period, members in periods.items())
+        if progress:
+            progress(0, len(periods))
+        for written in run(_write, tasks):
+            paths += written
+            done += 1
+            if progress:
+                progress(done, len(periods))
+    return paths
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import analytics
+from benchmarks import queries
+from benchmarks.seed import PROJECT_DIR, parse_count, seed
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_cases(conn, with_exports=True):
+    years = queries.report_years(conn)
+    year = years[1] if len(years) > 1 else (years[0] if years else '2000')
+    cases = [
+        ('sales.load_sales', lambda c: queries.sales_load_sales(c)),
+        ('sales.load_sales[search]', lambda c: queries.sales_load_sales(c, term='Product 00001')),
+        ('sales.load_sales[range]', lambda c: queries.sales_load_sales(c, start=f'{year}-03-01',
+                                                                         end=f'{year}-03-31')),
+        ('inventory.load_inventory', lambda c: queries.inventory_load_inventory(c)),
+        ('products.load_products', lambda c: queries.products_load_products(c)),
+        ('report.years', lambda c: queries.report_years(c)),
+        (f'report.generate_report[{year}]', lambda c: queries.report_generate_report(c, year)),
+        (f'report.generate_report[{year}-06]', lambda c: queries.report_generate_report(c, year, '06')),
+    ]
+    for name in queries.DASHBOARD:
+        cases.append((f'dashboard._get_{name}', lambda c, n=name: queries.dashboard(c, n)))
+    if analytics.available():
+        engine = analytics.SalesAnalytics().refresh(conn)
+        cases += [
+            ('analytics.load', lambda c: len(analytics.SalesAnalytics().refresh(c)._cols)),
+            ('analytics.refresh[warm]', lambda c: len(engine.refresh(c)._cols)),
+            ('analytics.sales_by_category', lambda c: engine.sales_by_category()),
+            (f'analytics.product_summary[{year}]', lambda c: engine.product_summary(year)),
+            (f'analytics.product_summary[{year}-06]', lambda c: engine.product_summary(year, '06')),
+            ('analytics.by_period', lambda c: engine.by_period()),
+            ('analytics.top_products', lambda c: engine.top_products(10)),
+        ]
+    if with_exports:
+        cases += [
+            ('export.sales_pdf', queries.export_sales_pdf),
+            ('export.products_pdf', queries.export_products_pdf),
+            (f'export.report_pdf[{year}]', lambda c: queries.export_report_pdf(c, year)),
+        ]
+    return cases
+
+
+def run(db_path, repeat=3, with_exports=True, only=None):
+    results = {}
+    conn = sqlite3.connect(db_path)
+    for name, fn in build_cases(conn, with_exports):
+        if only and only not in name:
+            continue
+        runs, size = [], None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn(conn)
+            runs.append((time.perf_counter() - start) * 1000.0)
+            if isinstance(out, tuple):
+                out = out[0]
+            size = len(out) if isinstance(out, list) else out
+        results[name] = {'runs_ms': [round(r, 3) for r in runs], 'min_ms': round(min(runs), 3),
+                         'median_ms': round(statistics.median(runs), 3), 'result': size}
+        print(f"{name:<45} {min(runs):>10.1f} ms  (median {statistics.median(runs):.1f}, result {size})")
+    conn.close()
+    return results
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)['results']
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    for name in new:
+        if name in old and old[name]['min_ms']:
+            ratio = new[name]['min_ms'] / old[name]['min_ms']
+            print(f"{name:<45} {old[name]['min_ms']:>10.1f} -> {new[name]['min_ms']:>10.1f} ms  x{ratio:.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks',
+                                 description='Seed a scratch system.db and time the queries behind each screen.')
+    ap.add_argument('--sales', default='100k', help='number of sales rows, e.g. 1k, 100k, 10m')
+    ap.add_argument('--products', default='100', help='number of products, e.g. 100, 100k')
+    ap.add_argument('--years', type=int, default=3)
+    ap.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'sis-bench'))
+    ap.add_argument('--reuse', action='store_true', help='reuse an existing seeded database in --workdir')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--skip-exports', action='store_true')
+    ap.add_argument('--only', help='only run cases whose name contains this text')
+    ap.add_argument('--out', help='write results to this JSON file')
+    ap.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files and exit')
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    db_path = os.path.join(os.path.abspath(args.workdir), 'system.db')
+    if args.reuse and os.path.exists(db_path):
+        dataset = {'path': db_path, 'reused': True}
+    else:
+        start = time.perf_counter()
+        dataset = seed(args.workdir, parse_count(args.sales), parse_count(args.products), args.years)
+        dataset['seed_seconds'] = round(time.perf_counter() - start, 2)
+        print(f"seeded {dataset['sales']} sales / {dataset['products']} products "
+              f"in {dataset['seed_seconds']} s ({dataset['size_bytes'] / 1e6:.1f} MB)")
+
+    results = run(db_path, args.repeat, not args.skip_exports, args.only)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'meta': {'revision': _git_revision(), 'python': sys.version.split()[0],
+                                'sqlite': sqlite3.sqlite_version, 'platform': platform.platform(),
+                                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'dataset': dataset},
+                       'results': results}, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+import backup
+import database
+
+# Write latency on a busy till while an online backup runs. A writer thread
+# records sales in small transactions the whole time; the same number of
+# seconds is measured without a backup, then during a backup with each page
+# step. Reports backup pages/s, how often the copy restarted, and the
+# writer's latency percentiles for each phase.
+
+
+def writer(path, stop, latencies):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA busy_timeout = 10000')
+    n = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute("INSERT INTO sales (receipt_no, date, prod_id, qty, notes, created_at, updated_at, "
+                     "is_active) VALUES (?, date('now'), 1, 1, '', datetime('now'), datetime('now'), 1)",
+                     (f'B{n:08d}',))
+        conn.execute('COMMIT')
+        latencies.append(time.perf_counter() - start)
+        n += 1
+        time.sleep(0.002)
+    conn.close()
+
+
+def _stats(latencies):
+    q = statistics.quantiles(latencies, n=100, method='inclusive')
+    return f"{len(latencies):>6,} writes  p50 {q[49] * 1000:6.2f} ms  p99 {q[98] * 1000:7.2f} ms  " \
+           f"max {max(latencies) * 1000:7.1f} ms"
+
+
+def phase(path, seconds, run=None):
+    stop, latencies = threading.Event(), []
+    thread = threading.Thread(target=writer, args=(path, stop, latencies))
+    thread.start()
+    result = run() if run else time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return result, latencies
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.backup',
+                                 description='Writer latency during online backups.')
+    ap.add_argument('db', help="database to copy (e.g. one built by python -m benchmarks)")
+    ap.add_argument('--pages', type=int, nargs='+', default=[-1, 4096, 1024, 256])
+    ap.add_argument('--sleep', type=float, default=backup.SLEEP)
+    ap.add_argument('--journal', choices=['wal', 'delete'], default='wal')
+    args = ap.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='sis-backup-')
+    path = os.path.join(workdir, 'system.db')
+    shutil.copy(args.db, path)
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode = {args.journal}')
+    pages = conn.execute('PRAGMA page_count').fetchone()[0]
+    conn.close()
+    database.DB_NAME = path
+    print(f"{pages:,} pages, journal_mode={args.journal}, sleep {args.sleep * 1000:g} ms between steps")
+
+    _, idle = phase(path, 2.0)
+    print(f"{'no backup':<22} {_stats(idle)}")
+    for step in args.pages:
+        def run():
+            return backup.backup(os.path.join(workdir, 'out'), pages=step, sleep=args.sleep,
+                                 keep=1, check=False)[0]
+
+        result, latencies = phase(path, 0, run)
+        print(f"{'pages=' + str(step):<22} {_stats(latencies)}  |  {result.pages_per_second:>9,.0f} pages/s "
+              f"in {result.seconds:.2f} s, {result.restarts} restarts")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
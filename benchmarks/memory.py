@@ -0,0 +1,68 @@
+import argparse
+import gc
+import tracemalloc
+from datetime import date
+
+from benchmarks.seed import parse_count
+from repositories.records import SaleRow, SalesColumns, sale_rows
+
+
+def _fetched_rows(n):
+    # Same shape as repositories.sales.list_sales output; every string is a
+    # fresh object, as sqlite3 returns them.
+    start = date(2022, 1, 1).toordinal()
+    for i in range(1, n + 1):
+        day = date.fromordinal(start + i % 1095).isoformat()
+        stamp = f"{day} 12:{i % 60:02d}:00"
+        yield (i, f"R{i // 3:09d}", day, f"Product {i % 997:07d}", 1 + i % 4, 12.5,
+               (1 + i % 4) * 19.99, '', stamp, stamp, 1)
+
+
+def _measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    obj = build(n)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    gc.collect()
+    return used
+
+
+def list_of_lists(n):
+    return [list(row) for row in _fetched_rows(n)]
+
+
+def slotted_records(n):
+    return [SaleRow(*row) for row in _fetched_rows(n)]
+
+
+def shared_records(n):
+    return sale_rows(_fetched_rows(n))
+
+
+def columnar(n):
+    cols = SalesColumns()
+    for r in _fetched_rows(n):
+        cols.append(r[0], r[2], r[0] % 997 + 1, r[4], r[10])
+    return cols
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.memory',
+                                 description='Bytes per cached sales row for each in-memory layout.')
+    ap.add_argument('--rows', default='1m')
+    args = ap.parse_args(argv)
+    n = parse_count(args.rows)
+    baseline = None
+    for name, build in (('list-of-lists (list(row))', list_of_lists),
+                        ('slotted SaleRow', slotted_records),
+                        ('SaleRow + shared strings', shared_records),
+                        ('SalesColumns (array-backed)', columnar)):
+        used = _measure(build, n)
+        baseline = baseline or used
+        print(f"{name:<30} {used / n:>8.1f} bytes/row  {used / 1e6:>9.1f} MB  x{used / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
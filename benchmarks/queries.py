@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import exports
+import report_cache
+from repositories import dashboard as dash
+from repositories import inventory, products, reports, sales
+
+# Each case runs the same repository calls as the frame it is named after.
+
+# time the rendering itself, not copies out of the report cache
+report_cache.ENABLED = False
+
+
+def sales_load_sales(conn, term='', start='', end=''):
+    products.list_names(conn=conn)
+    return sales.list_sales(term, start, end, conn=conn)
+
+
+def inventory_load_inventory(conn, term=''):
+    return inventory.list_inventory(term, conn=conn)
+
+
+def report_generate_report(conn, year, month='All'):
+    return reports.product_summary(year, month, conn=conn)
+
+
+def report_years(conn):
+    return reports.years(conn=conn)
+
+
+DASHBOARD = {
+    'total_products': dash.total_products,
+    'total_quantity': dash.total_quantity,
+    'total_sales': dash.total_sales,
+    'total_categories': dash.total_categories,
+    'total_suppliers': dash.total_suppliers,
+    'total_expenses': dash.total_expenses,
+    'top_quantity': dash.top_quantity,
+    'low_stock_count': lambda conn: dash.low_stock_count(5, conn=conn),
+    'sales_by_category': dash.sales_by_category,
+    'expenses_by_department': dash.expenses_by_department,
+}
+
+
+def dashboard(conn, name):
+    return DASHBOARD[name](conn=conn)
+
+
+def products_load_products(conn, term=''):
+    return products.list_products(term, conn=conn)
+
+
+def _export(func, *args, **kwargs):
+    # run the frame's export into a scratch folder and report bytes written
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = func(os.path.join(tmp, 'export.pdf'), *args, **kwargs)
+        return sum(os.path.getsize(p) for p in paths)
+
+
+def export_sales_pdf(conn):
+    return _export(exports.export_sales_pdf, conn=conn)
+
+
+def export_products_pdf(conn):
+    return _export(exports.export_products_pdf, conn=conn)
+
+
+def export_report_pdf(conn, year, month='All'):
+    return _export(exports.export_report_pdf, year, month, conn=conn)
@@ -0,0 +1,186 @@
+import os
+import random
+import runpy
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import database
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH = 50000
+
+CATEGORIES = [
+    'Beverages', 'Snacks', 'Dairy', 'Bakery', 'Frozen', 'Produce', 'Meat', 'Seafood',
+    'Household', 'Personal Care', 'Baby', 'Pet', 'Stationery', 'Electronics', 'Toys',
+    'Hardware', 'Garden', 'Pharmacy', 'Canned Goods', 'Condiments', 'Cereal', 'Pasta',
+    'Tea & Coffee', 'Confectionery', 'Cleaning',
+]
+DEPARTMENTS = ['Admin', 'Sales', 'Logistics', 'Maintenance', 'Marketing', 'IT', 'HR', 'Finance']
+WAREHOUSES = [('Main', 'Downtown', 50000), ('North', 'Uptown', 20000), ('South', 'Harbor', 20000),
+              ('East', 'Industrial Park', 30000), ('Overflow', 'Airport Road', 80000)]
+DAMAGE_REASONS = ['Expired', 'Broken in transit', 'Water damage', 'Recalled', 'Packaging torn']
+
+
+def parse_count(text) -> int:
+    text = str(text).strip().lower()
+    mult = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+@contextmanager
+def scratch_database(workdir: str):
+    # the migration scripts open 'system.db' relative to the working directory
+    workdir = os.path.abspath(workdir)
+    path = os.path.join(workdir, 'system.db')
+    old_cwd, old_name = os.getcwd(), database.DB_NAME
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    database.DB_NAME = path
+    try:
+        yield path
+    finally:
+        database.DB_NAME = old_name
+        os.chdir(old_cwd)
+
+
+def _stamp(d: date, rng: random.Random) -> str:
+    stamp = datetime(d.year, d.month, d.day, rng.randint(8, 20), rng.randint(0, 59), rng.randint(0, 59))
+    return min(stamp, datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _day_weights(days):
+    # December peak, slow February, busier weekends
+    month_w = [0.9, 0.8, 0.95, 1.0, 1.0, 1.05, 1.1, 1.05, 1.0, 1.05, 1.2, 1.6]
+    return [month_w[d.month - 1] * (1.3 if d.weekday() >= 5 else 1.0) for d in days]
+
+
+def _cumulative(weights):
+    total, out = 0.0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def build_schema() -> None:
+    database.create_schema()
+    database.apply_migrations()
+    runpy.run_path(os.path.join(PROJECT_DIR, 'db', 'migrate_add_receipt.py'), run_name='__main__')
+
+
+def seed(workdir: str, sales: int, products: int, years: int = 3, seed_value: int = 1) -> dict:
+    path = os.path.join(os.path.abspath(workdir), 'system.db')
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed_value)
+    end = date.today()
+    days = [end - timedelta(days=i) for i in range(365 * years)]
+    day_cum = _cumulative(_day_weights(days))
+
+    with scratch_database(workdir):
+        build_schema()
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        created = _stamp(days[-1], rng)
+
+        conn.executemany(
+            'INSERT INTO categories(name, created_at, updated_at, is_active) VALUES (?,?,?,1)',
+            [(n, created, created) for n in CATEGORIES])
+        conn.executemany(
+            'INSERT INTO departments(name, created_at, updated_at, is_active) VALUES (?,?,?,1)',
+            [(n, created, created) for n in DEPARTMENTS])
+        conn.executemany(
+            'INSERT INTO warehouses(name, location, capacity, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,1)',
+            [(n, loc, cap, created, created) for n, loc, cap in WAREHOUSES])
+        conn.executemany(
+            'INSERT INTO suppliers(name, contact, phone, email, address, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,?,?,1)',
+            [(f'Supplier {i}', f'Contact {i}', f'555-{i:04d}', f'sales{i}@supplier.test',
+              f'{i} Market St', created, created) for i in range(1, 41)])
+
+        cat_cum = _cumulative([1.0 / (i + 1) for i in range(len(CATEGORIES))])
+
+        def product_rows():
+            for i in range(1, products + 1):
+                cost = round(rng.lognormvariate(2.5, 0.9), 2)
+                price = round(cost * rng.uniform(1.15, 1.8), 2)
+                cat = rng.choices(range(1, len(CATEGORIES) + 1), cum_weights=cat_cum)[0]
+                qty = int(rng.expovariate(1 / 120)) if rng.random() > 0.05 else rng.randint(0, 5)
+                yield (f'SKU{i:07d}', f'Product {i:07d}', f'Item number {i}', cat, cost, price, qty,
+                       rng.randint(1, len(WAREHOUSES)), created, created,
+                       0 if rng.random() < 0.03 else 1)
+
+        conn.executemany(
+            'INSERT INTO products(sku, name, description, category_id, cost_price, price, quantity, '
+            'warehouse_id, created_at, updated_at, is_active) VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+            product_rows())
+
+        # long-tailed popularity: a few best sellers, many slow movers
+        popularity = list(range(1, products + 1))
+        rng.shuffle(popularity)
+        prod_cum = _cumulative([1.0 / (rank + 10) for rank in range(products)])
+
+        def sale_rows():
+            receipt, lines_left = 0, 0
+            for _ in range(sales):
+                if lines_left <= 0:
+                    receipt += 1
+                    lines_left = 1 + int(rng.expovariate(1 / 1.5))
+                    day = rng.choices(days, cum_weights=day_cum)[0]
+                    stamp = _stamp(day, rng)
+                lines_left -= 1
+                pid = popularity[rng.choices(range(products), cum_weights=prod_cum)[0]]
+                qty = 1 + int(rng.expovariate(1 / 1.2))
+                yield (f'R{receipt:09d}', day.isoformat(), pid, qty, '', stamp, stamp,
+                       0 if rng.random() < 0.02 else 1)
+
+        rows = sale_rows()
+        while True:
+            chunk = [r for _, r in zip(range(BATCH), rows)]
+            if not chunk:
+                break
+            conn.executemany(
+                'INSERT INTO sales(receipt_no, date, prod_id, qty, notes, created_at, updated_at, is_active) '
+                'VALUES (?,?,?,?,?,?,?,?)', chunk)
+
+        def expense_rows(n):
+            for _ in range(n):
+                d = rng.choices(days, cum_weights=day_cum)[0]
+                s = _stamp(d, rng)
+                yield (d.isoformat(), rng.randint(1, len(DEPARTMENTS)), 'Operating expense',
+                       round(rng.lognormvariate(4.5, 1.0), 2), s, s, 1)
+
+        conn.executemany(
+            'INSERT INTO expenses(date, department_id, description, amount, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,?,?)', expense_rows(max(100, sales // 50)))
+
+        def debt_rows(n):
+            for i in range(n):
+                due = end + timedelta(days=rng.randint(-180, 60))
+                s = _stamp(due - timedelta(days=30), rng)
+                yield (f'Customer {i % 500}', round(rng.lognormvariate(5, 1.0), 2), due.isoformat(),
+                       rng.choice(['Open', 'Open', 'Partial', 'Paid']), s, s, 1)
+
+        conn.executemany(
+            'INSERT INTO debts(name, amount, due_date, status, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,?,?)', debt_rows(max(50, sales // 100)))
+
+        def damage_rows(n):
+            for _ in range(n):
+                d = rng.choices(days, cum_weights=day_cum)[0]
+                s = _stamp(d, rng)
+                yield (rng.randint(1, products), d.isoformat(), rng.randint(1, 5),
+                       rng.choice(DAMAGE_REASONS), s, s, 1)
+
+        conn.executemany(
+            'INSERT INTO damage_products(prod_id, date, qty, reason, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,?,?)', damage_rows(max(20, products // 10)))
+
+        conn.commit()
+        conn.close()
+
+    return {'path': path, 'sales': sales, 'products': products, 'years': years,
+            'seed': seed_value, 'size_bytes': os.path.getsize(path)}
@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+import api_client
+import api_server
+import database
+from benchmarks.seed import scratch_database
+from repositories import stock
+
+# Several tills hammering one api_server: mostly cached reads (the product
+# picker and stock list) with a sale posted every few requests, the mix of a
+# busy shop floor. Reports throughput, latency percentiles and errors.
+
+
+def till(client, product_ids, requests, write_every, seed, latencies, errors):
+    rng = random.Random(seed)
+    for n in range(requests):
+        start = time.perf_counter()
+        try:
+            if n % write_every == write_every - 1:
+                client.request('POST', '/api/sales', body={
+                    'receipt_no': f'T{seed:02d}-{n:06d}', 'date': time.strftime('%Y-%m-%d'),
+                    'prod_id': rng.choice(product_ids), 'qty': 1})
+            elif n % 2:
+                client.rows('/api/products/names')
+            else:
+                client.rows('/api/inventory', term=f'Product 000{rng.randint(10, 99)}')
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - start)
+
+
+def run(db_path, tills, requests, write_every, readers):
+    workdir = tempfile.mkdtemp(prefix='sis-tills-')
+    shutil.copy(db_path, os.path.join(workdir, 'system.db'))
+    with scratch_database(workdir):
+        database.apply_migrations()
+        server = api_server.ApiServer('127.0.0.1', 0, readers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        product_ids = [r[0] for r in api_client.ApiClient(url).rows('/api/products/names')]
+
+        latencies, errors = [], []
+        threads = [threading.Thread(target=till, args=(api_client.ApiClient(url), product_ids, requests,
+                                                       write_every, i, latencies, errors))
+                   for i in range(tills)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        hits, misses = server.cache.hits, server.cache.misses
+        server.shutdown()
+        server.server_close()
+        drift = stock.reconcile()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{tills} tills x {requests:,} requests, 1 write in {write_every}, {readers} readers")
+    print(f"  {len(latencies) / elapsed:,.0f} req/s  p50 {q[49] * 1000:.1f} ms  p95 {q[94] * 1000:.1f} ms  "
+          f"p99 {q[98] * 1000:.1f} ms")
+    print(f"  cache {hits:,} hits / {misses:,} misses, {len(errors):,} errors, "
+          f"{len(drift):,} products off the ledger")
+    for message in sorted(set(errors))[:5]:
+        print(f"    {message}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.tills',
+                                 description='Concurrent tills against the local JSON API.')
+    ap.add_argument('db', help="database to copy (e.g. one built by python -m benchmarks --keep)")
+    ap.add_argument('--tills', type=int, default=8)
+    ap.add_argument('--requests', type=int, default=500, help="requests per till")
+    ap.add_argument('--write-every', type=int, default=5, help="one sale per N requests")
+    ap.add_argument('--readers', type=int, default=api_server.READERS)
+    args = ap.parse_args(argv)
+    run(args.db, args.tills, args.requests, args.write_every, args.readers)
+
+
+if __name__ == '__main__':
+    main()
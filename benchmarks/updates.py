@@ -0,0 +1,113 @@
+import argparse
+import itertools
+import os
+import runpy
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.seed import PROJECT_DIR, parse_count
+
+# Update throughput on a sales-shaped table under the old unconditional
+# updated_at trigger and the guarded one from db/migrate_timestamps.py.
+
+TIMESTAMPS = runpy.run_path(os.path.join(PROJECT_DIR, 'db', 'migrate_timestamps.py'))
+
+RECURSIVE = """
+    CREATE TRIGGER sales_updated_at
+    AFTER UPDATE ON sales
+    FOR EACH ROW
+    BEGIN
+        UPDATE sales
+        SET updated_at = CURRENT_TIMESTAMP
+        WHERE id = OLD.id;
+    END
+"""
+
+MECHANISMS = {
+    'none': None,
+    'recursive trigger': RECURSIVE,
+    'guarded trigger': TIMESTAMPS['trigger_sql']('sales'),
+}
+
+CASES = [
+    # (name, sql, params for row id i and a fresh timestamp)
+    ('point update, sets updated_at',
+     'UPDATE sales SET qty = qty + 1, updated_at = ? WHERE id = ?', lambda i, stamp: (stamp, i)),
+    ('point update, leaves updated_at',
+     'UPDATE sales SET qty = qty + 1 WHERE id = ?', lambda i, stamp: (i,)),
+]
+
+
+def stamps():
+    # a new value every run, as a real writer's now() would be
+    start = datetime(2030, 1, 1)
+    for second in itertools.count(1):
+        yield (start + timedelta(seconds=second)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build(path, rows):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(
+        'CREATE TABLE sales (id INTEGER PRIMARY KEY AUTOINCREMENT, receipt_no TEXT, date TEXT, '
+        'prod_id INTEGER, qty INTEGER, notes TEXT, created_at TEXT, updated_at TEXT, is_active INTEGER)'
+    )
+    conn.executemany(
+        'INSERT INTO sales (receipt_no, date, prod_id, qty, notes, created_at, updated_at, is_active) '
+        'VALUES (?,?,?,?,?,?,?,1)',
+        ((f"R{i:09d}", '2024-01-01', i % 1000 + 1, 1, '', '2024-01-01 10:00:00', '2024-01-01 10:00:00')
+         for i in range(rows))
+    )
+    conn.execute('CREATE INDEX idx_sales_updated_at ON sales(updated_at)')
+    conn.commit()
+    return conn
+
+
+def timed(conn, sql, params):
+    start = time.perf_counter()
+    conn.executemany(sql, params)
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.updates',
+                                 description='UPDATE throughput with each updated_at mechanism.')
+    ap.add_argument('--rows', default='1m', help='rows in the table, e.g. 100k, 1m')
+    ap.add_argument('--updates', default='200k', help='rows updated per case')
+    ap.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'sis-bench'))
+    args = ap.parse_args(argv)
+    rows, updates = parse_count(args.rows), parse_count(args.updates)
+    os.makedirs(args.workdir, exist_ok=True)
+    conn = build(os.path.join(args.workdir, 'updates.db'), rows)
+    print(f"{rows:,} rows, {updates:,} updates per case (stride {max(1, rows // updates)})")
+
+    ids = range(1, rows + 1, max(1, rows // updates))
+    baseline = {}
+    stamp = stamps()
+    for mechanism, trigger in MECHANISMS.items():
+        conn.execute('DROP TRIGGER IF EXISTS sales_updated_at')
+        conn.execute('DROP TRIGGER IF EXISTS sales_touch_updated_at')
+        if trigger:
+            conn.execute(trigger)
+        for name, sql, params in CASES:
+            now = next(stamp)
+            seconds = timed(conn, sql, (params(i, now) for i in ids))
+            rate = len(ids) / seconds
+            baseline.setdefault(name, rate)
+            print(f"{mechanism:<18} {name:<34} {rate:>12,.0f} rows/s  x{rate / baseline[name]:.2f}")
+        seconds = timed(conn, 'UPDATE sales SET is_active = 1 - is_active, updated_at = ? WHERE id % 10 = 0',
+                        [(next(stamp),)])
+        rate = rows / 10 / seconds
+        baseline.setdefault('bulk', rate)
+        print(f"{mechanism:<18} {'bulk update, sets updated_at':<34} {rate:>12,.0f} rows/s  "
+              f"x{rate / baseline['bulk']:.2f}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
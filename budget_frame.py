@@ -0,0 +1,123 @@
+import re
+
+import ttkbootstrap as tb
+from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
+from ttkbootstrap.toast import ToastNotification
+
+from repositories import budgets
+
+
+class BudgetFrame(Frame):
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        Label(self, text="Department Budgets", font=("Helvetica", 16, "bold")).pack(pady=(0, 10))
+
+        bar = Frame(self)
+        Label(bar, text="Month:").pack(side='left')
+        self.period_var = tb.StringVar(value=budgets.current_period())
+        self.period_cb = Combobox(bar, textvariable=self.period_var, width=10)
+        self.period_cb.pack(side='left', padx=5)
+        self.period_cb.bind("<<ComboboxSelected>>", lambda e: self.load())
+        self.period_cb.bind("<Return>", lambda e: self.load())
+        Button(bar, text="Refresh", bootstyle="info", command=self.load).pack(side='left', padx=5)
+        self.alert_var = tb.StringVar()
+        Label(bar, textvariable=self.alert_var, bootstyle="danger").pack(side='left', padx=10)
+        bar.pack(fill='x', pady=5)
+
+        table_frame = Frame(self)
+        table_frame.pack(fill='both', expand=True, pady=5)
+        cols = ("ID", "Department", "Budget", "Actual", "Remaining", "Used %", "Alert At %", "Status")
+        self.tree = Treeview(table_frame, columns=cols, show='headings', bootstyle="primary")
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, anchor='center')
+        v_scroll = Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=v_scroll.set)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        v_scroll.grid(row=0, column=1, sticky='ns')
+        table_frame.rowconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+        self.tree.tag_configure('alert', foreground='orange')
+        self.tree.tag_configure('over', foreground='red')
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.on_select())
+
+        form = Frame(self)
+        Label(form, text="Budget:").pack(side='left')
+        self.amount = Entry(form, width=12)
+        self.amount.pack(side='left', padx=5)
+        Label(form, text="Alert at %:").pack(side='left')
+        self.alert_pct = Entry(form, width=6)
+        self.alert_pct.insert(0, "90")
+        self.alert_pct.pack(side='left', padx=5)
+        Button(form, text="Save Budget", bootstyle="success", command=self.save_budget).pack(side='left', padx=5)
+        Button(form, text="Remove Budget", bootstyle="danger", command=self.remove_budget).pack(side='left', padx=5)
+        form.pack(pady=5)
+
+        self.load()
+
+    def _period(self):
+        period = self.period_var.get().strip()
+        if not re.fullmatch(r'\d{4}-\d{2}', period):
+            ToastNotification("Error", "Month must be YYYY-MM").show_toast()
+            return None
+        return period
+
+    def load(self):
+        period = self._period()
+        if period is None:
+            return
+        for r in self.tree.get_children():
+            self.tree.delete(r)
+        self.period_cb['values'] = budgets.periods()
+        flagged = 0
+        for row in budgets.budget_vs_actual(period):
+            tag = {'Alert': 'alert', 'Over budget': 'over'}.get(row.status, '')
+            flagged += bool(tag)
+            budget = '' if row.budget is None else f"{row.budget:,.2f}"
+            remaining = '' if row.budget is None else f"{row.budget - row.actual:,.2f}"
+            used = '' if row.used_pct is None else f"{row.used_pct:.1f}"
+            self.tree.insert('', 'end', tags=(tag,), values=(
+                row.department_id, row.department, budget, f"{row.actual:,.2f}", remaining, used,
+                f"{row.alert_pct:g}", row.status))
+        self.alert_var.set(f"{flagged} department(s) at or over their alert level" if flagged else "")
+
+    def _selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            ToastNotification("Error", "Select a department").show_toast()
+            return None
+        return int(self.tree.item(sel[0])['values'][0])
+
+    def on_select(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        vals = self.tree.item(sel[0])['values']
+        self.amount.delete(0, 'end')
+        self.amount.insert(0, str(vals[2]).replace(',', ''))
+        self.alert_pct.delete(0, 'end')
+        self.alert_pct.insert(0, vals[6])
+
+    def save_budget(self):
+        dept_id = self._selected()
+        period = self._period()
+        if dept_id is None or period is None:
+            return
+        try:
+            amount = float(self.amount.get().strip())
+            alert_pct = float(self.alert_pct.get().strip() or 90)
+        except ValueError:
+            ToastNotification("Error", "Budget and alert % must be numbers").show_toast()
+            return
+        if amount < 0 or not 0 < alert_pct <= 100:
+            ToastNotification("Error", "Budget must be positive and alert % between 1 and 100").show_toast()
+            return
+        budgets.save_budget(dept_id, period, amount, alert_pct)
+        self.load()
+
+    def remove_budget(self):
+        dept_id = self._selected()
+        period = self._period()
+        if dept_id is not None and period is not None:
+            budgets.delete_budget(dept_id, period)
+            self.load()
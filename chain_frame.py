@@ -0,0 +1,150 @@
+from tkinter import filedialog
+
+import ttkbootstrap as tb
+from ttkbootstrap import Frame, Label, Button, Treeview, Scrollbar, Combobox
+from ttkbootstrap.toast import ToastNotification
+
+import consolidation
+from jobs import BackgroundJob
+
+
+class ChainFrame(Frame):
+    POLL_MS = 100
+
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        Label(self, text="Chain Overview", font=("Helvetica", 16, "bold")).pack(pady=(0, 10))
+        self.paths = []
+        self.job = None
+
+        bar = Frame(self)
+        Button(bar, text="Add Stores...", bootstyle="info", command=self.add_files).pack(side='left', padx=5)
+        Button(bar, text="Add Folder...", bootstyle="info-outline", command=self.add_folder).pack(side='left', padx=5)
+        Button(bar, text="Clear", bootstyle="secondary", command=self.clear).pack(side='left', padx=5)
+        Label(bar, text="Year:").pack(side='left', padx=(15, 0))
+        self.year_var = tb.StringVar()
+        self.year_cb = Combobox(bar, textvariable=self.year_var, width=8)
+        self.year_cb.pack(side='left', padx=5)
+        Label(bar, text="Month:").pack(side='left')
+        self.month_var = tb.StringVar(value='All')
+        Combobox(bar, textvariable=self.month_var, state='readonly', width=5,
+                 values=['All'] + [f'{i:02d}' for i in range(1, 13)]).pack(side='left', padx=5)
+        Button(bar, text="Consolidate", bootstyle="success", command=self.consolidate).pack(side='left', padx=5)
+        bar.pack(fill='x', pady=5)
+        self.status = Label(self, text="Add store databases to consolidate")
+        self.status.pack(anchor='w', pady=(0, 5))
+
+        self.cards = Frame(self)
+        self.cards.pack(fill='x', pady=5)
+
+        cols = ("Store", "Products", "Quantity", "Sales", "Expenses", "Low Stock", "File")
+        self.store_tree = self._tree(cols, height=6)
+        cols = ("Product", "Total Qty", "Total Cost", "Total Sales")
+        # products summed over the chain; expand one for its per-store rows
+        self.report_tree = self._tree(cols, show='tree headings')
+        self.report_tree.column('#0', width=30, stretch=False)
+
+    def _tree(self, cols, **kwargs):
+        table_frame = Frame(self)
+        table_frame.pack(fill='both', expand=True, pady=5)
+        tree = Treeview(table_frame, columns=cols, show=kwargs.pop('show', 'headings'),
+                        bootstyle="primary", **kwargs)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor='center')
+        v_scroll = Scrollbar(table_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=v_scroll.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        v_scroll.grid(row=0, column=1, sticky='ns')
+        table_frame.rowconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+        tree.tag_configure('error', foreground='red')
+        return tree
+
+    def add_files(self):
+        paths = filedialog.askopenfilenames(
+            parent=self, title="Store databases",
+            filetypes=[("SQLite databases", "*.db"), ("All files", "*.*")])
+        self._add(paths)
+
+    def add_folder(self):
+        folder = filedialog.askdirectory(parent=self, title="Folder of store databases")
+        if folder:
+            self._add([folder])
+
+    def _add(self, paths):
+        self.paths = consolidation.find_stores(self.paths + list(paths))
+        self.status.config(text=f"{len(self.paths)} store database(s) selected")
+
+    def clear(self):
+        self.paths = []
+        self.status.config(text="Add store databases to consolidate")
+
+    def consolidate(self):
+        if not self.paths:
+            ToastNotification("Error", "Add at least one store database").show_toast()
+            return
+        if self.job is not None and self.job.is_alive():
+            return
+        self.job = BackgroundJob(consolidation.consolidate, self.paths,
+                                 self.year_var.get().strip() or None, self.month_var.get())
+        self.job.start()
+        self.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        job = self.job
+        if job.is_alive():
+            self.status.config(text=f"Reading stores: {job.done} of {job.total or len(self.paths)}")
+            self.after(self.POLL_MS, self._poll)
+        elif job.error is not None:
+            self.status.config(text="")
+            ToastNotification("Error", f"Consolidation failed: {job.error}").show_toast()
+        elif job.result is not None:
+            self.show(job.result)
+
+    def _add_stat(self, title, value, col):
+        card = Frame(self.cards, padding=10, bootstyle="primary")
+        card.grid(row=0, column=col, padx=8, pady=5, sticky="nsew")
+        Label(card, text=title, font=("Helvetica", 11)).pack()
+        Label(card, text=value, font=("Helvetica", 16, "bold")).pack()
+
+    def show(self, chain):
+        failed = sum(s.error is not None for s in chain.stores)
+        self.status.config(text=f"{len(chain.stores) - failed} store(s) consolidated"
+                                + (f", {failed} could not be read" if failed else ""))
+        if chain.years:
+            self.year_cb['values'] = chain.years
+
+        for w in self.cards.winfo_children():
+            w.destroy()
+        for col, (title, value) in enumerate([
+            ("Stores", len(chain.stores) - failed),
+            ("Active Products", f"{chain.products:,}"),
+            ("Total Quantity", f"{chain.quantity:,}"),
+            ("Total Sales", f"{chain.sales:,.2f}"),
+            ("Total Expenses", f"{chain.expenses:,.2f}"),
+            ("Low Stock", f"{chain.low_stock:,}"),
+        ]):
+            self._add_stat(title, value, col)
+
+        self.store_tree.delete(*self.store_tree.get_children())
+        for s in chain.stores:
+            if s.error is not None:
+                self.store_tree.insert('', 'end', tags=('error',),
+                                       values=(s.store, '', '', '', '', '', f"{s.path}: {s.error}"))
+            else:
+                self.store_tree.insert('', 'end', values=(
+                    s.store, f"{s.products:,}", f"{s.quantity:,}", f"{s.sales:,.2f}",
+                    f"{s.expenses:,.2f}", s.low_stock, s.path))
+
+        self.report_tree.delete(*self.report_tree.get_children())
+        by_store = {}
+        for s in chain.stores:
+            for row in s.report:
+                by_store.setdefault(row.product, []).append((s.store, row))
+        for row in chain.report:
+            parent = self.report_tree.insert('', 'end', values=(
+                row.product, row.total_qty, f"{row.total_cost:,.2f}", f"{row.total_sales:,.2f}"))
+            for store, part in by_store.get(row.product, []):
+                self.report_tree.insert(parent, 'end', values=(
+                    f"  {store}", part.total_qty, f"{part.total_cost:,.2f}", f"{part.total_sales:,.2f}"))
@@ -0,0 +1,384 @@
+import argparse
+import csv
+import sys
+import time
+
+import api_server
+import archiving
+import backup
+import batch_reports
+import consolidation
+import database
+import exports
+import forecasting
+import importer
+import maintenance
+import retention
+import sync
+from repositories import purchasing, stock
+
+
+def _progress(label, unit='rows'):
+    start = time.perf_counter()
+
+    def report(done, total):
+        rate = done / max(time.perf_counter() - start, 1e-6)
+        of = f"/{total:,}" if total else ''
+        sys.stderr.write(f"\r{label}: {done:,}{of} {unit} ({rate:,.0f} {unit}/s)")
+        sys.stderr.flush()
+    return report
+
+
+def _active(value):
+    return {'yes': True, 'no': False}.get(value)
+
+
+def cmd_export(args):
+    is_pdf = args.out.lower().endswith('.pdf')
+    progress = _progress(f"export {args.what}")
+    if args.what == 'sales':
+        func = exports.export_sales_pdf if is_pdf else exports.export_sales_data
+        paths = func(args.out, term=args.search, start=args.start, end=args.end,
+                     active=_active(args.active), include_cost=not args.no_cost, progress=progress)
+    elif args.what == 'inventory':
+        if is_pdf:
+            raise SystemExit("inventory export supports: " + ', '.join(exports.data_formats()))
+        paths = exports.export_inventory_data(args.out, term=args.search, progress=progress)
+    elif args.what == 'products':
+        if not is_pdf:
+            raise SystemExit("products export supports: .pdf")
+        paths = exports.export_products_pdf(args.out, term=args.search, progress=progress)
+    else:
+        if not args.year:
+            raise SystemExit("report export needs --year")
+        func = exports.export_report_pdf if is_pdf else exports.export_report_data
+        paths = func(args.out, args.year, args.month, progress=progress)
+    sys.stderr.write('\n')
+    for path in paths:
+        print(path)
+
+
+def cmd_import(args):
+    result = importer.import_csv(args.what, args.file, skip_invalid=args.skip_invalid,
+                                 create_missing=args.create_missing,
+                                 update_existing=args.update_existing,
+                                 progress=_progress(f"import {args.what}"))
+    sys.stderr.write('\n')
+    for line, message in result.errors[:20]:
+        sys.stderr.write(f"line {line}: {message}\n")
+    if result.error_count > 20:
+        sys.stderr.write(f"... {result.error_count - 20:,} more\n")
+    if args.errors and result.errors:
+        importer.write_errors(result, args.errors)
+    print(f"{result.inserted:,} added, {result.updated:,} updated, {result.skipped:,} skipped")
+    if not result.committed:
+        raise SystemExit("invalid rows found, nothing imported (use --skip-invalid to import the rest)")
+
+
+def cmd_reports(args):
+    if args.start or args.end:
+        if not (args.start and args.end):
+            raise SystemExit("--from and --to go together")
+        months = batch_reports.month_range(args.start, args.end)
+    else:
+        months = batch_reports.last_months(args.last)
+    if not months:
+        raise SystemExit("no months in range")
+    formats = ['.' + f.lower().lstrip('.') for f in args.format or ['pdf', 'csv']]
+    paths = batch_reports.generate(args.out, months, yearly=args.yearly, formats=formats,
+                                   workers=args.workers, progress=_progress("reports", 'reports'))
+    sys.stderr.write('\n')
+    for path in paths:
+        print(path)
+
+
+def cmd_forecast(args):
+    forecast = forecasting.get_forecast()
+    if forecast is None:
+        raise SystemExit("forecasting needs NumPy")
+    out = open(args.out, 'w', newline='', encoding='utf-8') if args.out else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(forecasting.StockRisk._fields)
+        writer.writerows(forecast.at_risk(args.limit))
+    finally:
+        if args.out:
+            out.close()
+    sys.stderr.write(f"{forecast.risk_count():,} of {len(forecast.ids):,} products at or below "
+                     f"their reorder point\n")
+
+
+def cmd_orders(args):
+    if args.action == 'receive':
+        if args.po is None:
+            raise SystemExit("receive needs a purchase order id")
+        try:
+            print(f"received {purchasing.receive(args.po):,} units")
+        except ValueError as e:
+            raise SystemExit(str(e))
+    elif args.action == 'suggest':
+        lines, unsupplied = purchasing.suggest(forecasting.reorder_needs())
+        writer = csv.writer(sys.stdout)
+        writer.writerow(purchasing.SuggestedLine._fields)
+        writer.writerows(lines)
+        if args.create and lines:
+            orders = purchasing.create_suggested_orders(lines, time.strftime('%Y-%m-%d'))
+            sys.stderr.write(f"created {len(orders)} draft orders\n")
+        if unsupplied:
+            sys.stderr.write(f"{len(unsupplied):,} products need stock but have no supplier price\n")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(purchasing.OrderRow._fields)
+        writer.writerows(purchasing.list_orders(None if args.all else purchasing.OPEN_STATUSES))
+
+
+def cmd_stock(args):
+    writer = csv.writer(sys.stdout)
+    if args.action == 'on':
+        as_of = args.arg or stock.today()
+        writer.writerow(('prod_id', 'qty'))
+        writer.writerows(sorted(stock.stock_on(as_of).items()))
+    elif args.action == 'history':
+        if args.arg is None:
+            raise SystemExit("history needs a product id")
+        writer.writerow(('id', 'moved_at', 'qty', 'kind', 'ref_table', 'ref_id', 'note'))
+        writer.writerows(stock.history(int(args.arg)))
+    elif args.action == 'snapshot':
+        rows = stock.take_snapshot(args.arg)
+        if args.keep_days:
+            day = time.strftime('%Y-%m-%d', time.localtime(time.time() - args.keep_days * 86400))
+            sys.stderr.write(f"pruned {stock.prune_snapshots(day):,} old snapshot rows\n")
+        print(f"snapshot of {rows:,} products")
+    else:
+        rows = stock.reconcile(fix=args.fix)
+        writer.writerow(stock.Discrepancy._fields)
+        writer.writerows(rows)
+        sys.stderr.write(f"{len(rows):,} products disagree with the ledger"
+                         f"{' (adjusted)' if args.fix and rows else ''}\n")
+
+
+def cmd_archive(args):
+    result = archiving.archive_sales(args.keep_months, progress=_progress("archiving", 'months'))
+    sys.stderr.write('\n')
+    print(f"moved {result.rows:,} sales from {len(result.months)} month(s) to {result.path}")
+    if result.archived_before:
+        print(f"sales before {result.archived_before} are archived")
+    if args.vacuum and result.rows:
+        with database.get_connection() as conn:
+            conn.execute('VACUUM')
+
+
+def cmd_sync(args):
+    result = sync.sync(database.DB_NAME, args.head_office, args.name, args.batch, args.prune,
+                       _progress(f"sync to {args.head_office}", 'changed rows'))
+    sys.stderr.write('\n')
+    print(f"{result.store_name}: changes {result.from_seq:,}-{result.to_seq:,}, {result.upserts:,} rows "
+          f"copied, {result.deletes:,} deleted in {result.batches:,} batches")
+
+
+def cmd_chain(args):
+    chain = consolidation.consolidate(args.stores, args.year, args.month, args.workers,
+                                      progress=_progress("stores", 'stores'))
+    sys.stderr.write('\n')
+    writer = csv.writer(sys.stdout)
+    if args.year:
+        if args.by_store:
+            writer.writerow(('store',) + consolidation.ReportRow._fields)
+            for s in chain.stores:
+                writer.writerows((s.store,) + tuple(r) for r in s.report)
+        else:
+            writer.writerow(consolidation.ReportRow._fields)
+            writer.writerows(chain.report)
+    else:
+        fields = ('products', 'quantity', 'sales', 'expenses', 'low_stock')
+        writer.writerow(('store',) + fields)
+        for s in chain.stores:
+            if s.error is None:
+                writer.writerow((s.store,) + tuple(getattr(s, f) for f in fields))
+        writer.writerow(('CHAIN',) + tuple(getattr(chain, f) for f in fields))
+    for s in chain.stores:
+        if s.error is not None:
+            sys.stderr.write(f"skipped {s.path}: {s.error}\n")
+
+
+def _print_backups(results, error=None):
+    if error is not None:
+        sys.stderr.write(f"\nbackup failed: {error}\n")
+    else:
+        sys.stderr.write('\n')
+    for r in results:
+        check = {True: 'verified', False: 'FAILED integrity check', None: 'not verified'}[r.verified]
+        print(f"{r.path}: {r.pages:,} pages in {r.seconds:.2f} s ({r.pages_per_second:,.0f} pages/s), "
+              f"{r.size:,} bytes, {check}")
+        for path in r.removed:
+            print(f"  removed {path}")
+    sys.stdout.flush()
+
+
+def cmd_backup(args):
+    if args.restore:
+        print(f"restored {backup.restore(args.restore)} from {args.restore}")
+        return
+    options = dict(dest=args.dest, pages=args.pages, sleep=args.sleep, compress=args.compress,
+                   keep=args.keep, check=not args.no_verify, progress=_progress("backup", 'pages'))
+    if args.every:
+        backup.run_schedule(args.every, _print_backups, **options)
+    else:
+        _print_backups(backup.backup(**options))
+
+
+def cmd_maintain(args):
+    for r in maintenance.run_all(args.vacuum, progress=_progress("maintenance", 'tasks')):
+        timing = (f", queries {r.probe_ms_before:.1f} -> {r.probe_ms_after:.1f} ms"
+                  if r.probe_ms_before is not None else '')
+        print(f"\n{r.task}: {r.seconds:.2f} s, {r.size_before:,} -> {r.size_after:,} bytes "
+              f"({r.free_before:,} -> {r.free_after:,} free pages){timing}", end='')
+    print()
+
+
+def cmd_purge(args):
+    results = retention.purge(args.table, args.days, args.dry_run, args.batch, not args.no_compact,
+                              progress=_progress("purge", 'tables'))
+    sys.stderr.write('\n')
+    verb = "would purge" if args.dry_run else "purged"
+    pages = "pages of table and index space" if args.dry_run else "pages freed"
+    for r in results:
+        print(f"{r.table}: {verb} {r.rows:,} rows inactive since before {r.cutoff[:10]} ({r.pages:,} {pages})")
+    if not args.dry_run:
+        with database.get_connection() as conn:
+            size, free = maintenance.file_size(conn)
+        print(f"database is now {size:,} bytes, {free:,} free pages")
+
+
+def cmd_serve(args):
+    api_server.serve(args.host, args.port, args.readers, args.verbose)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Sales & inventory command line tools")
+    parser.add_argument('--db', default=database.DB_NAME, help="database file (default: %(default)s)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('export', help="export sales, inventory, products or a report")
+    p.add_argument('what', choices=['sales', 'inventory', 'products', 'report'])
+    p.add_argument('out', help="output file; format from extension: .pdf or "
+                               + ', '.join(exports.data_formats()))
+    p.add_argument('--search', default='', help="name filter, as in the search boxes")
+    p.add_argument('--start', default='', help="sales from date (YYYY-MM-DD)")
+    p.add_argument('--end', default='', help="sales to date (YYYY-MM-DD)")
+    p.add_argument('--active', choices=['yes', 'no'], help="only active/inactive sales")
+    p.add_argument('--no-cost', action='store_true', help="leave out the cost column")
+    p.add_argument('--year', help="report year")
+    p.add_argument('--month', default='All', help="report month (01-12, default All)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('import', help="bulk import products, sales, expenses or supplier prices from CSV")
+    p.add_argument('what', choices=sorted(importer.IMPORTS))
+    p.add_argument('file', help="CSV file with a header row")
+    p.add_argument('--skip-invalid', action='store_true',
+                   help="import the valid rows instead of rejecting the whole file")
+    p.add_argument('--create-missing', action='store_true',
+                   help="add unknown categories, warehouses and departments")
+    p.add_argument('--update-existing', action='store_true',
+                   help="update products whose sku already exists")
+    p.add_argument('--errors', help="write the rejected rows' line numbers and reasons to this CSV")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('reports', help="write monthly (and yearly) sales reports for a range of months")
+    p.add_argument('out', help="output folder")
+    p.add_argument('--from', dest='start', help="first month (YYYY-MM)")
+    p.add_argument('--to', dest='end', help="last month (YYYY-MM)")
+    p.add_argument('--last', type=int, default=36, help="the last N months up to now (default %(default)s)")
+    p.add_argument('--yearly', action='store_true', help="also report every fully covered year")
+    p.add_argument('--format', action='append',
+                   help="pdf or " + ', '.join(f.lstrip('.') for f in exports.data_formats())
+                        + "; repeat for several (default pdf and csv)")
+    p.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    p.set_defaults(func=cmd_reports)
+
+    p = sub.add_parser('forecast', help="list products at or below their forecast reorder point")
+    p.add_argument('--out', help="CSV file (default: standard output)")
+    p.add_argument('--limit', type=int, help="only the N most urgent")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser('orders', help="purchase orders: list, suggest from reorder points, receive")
+    p.add_argument('action', choices=['list', 'suggest', 'receive'])
+    p.add_argument('po', nargs='?', type=int, help="purchase order id (receive)")
+    p.add_argument('--create', action='store_true', help="suggest: also create the draft orders")
+    p.add_argument('--all', action='store_true', help="list: include received and cancelled orders")
+    p.set_defaults(func=cmd_orders)
+
+    p = sub.add_parser('stock', help="stock ledger: balances on a date, history, snapshots, reconciliation")
+    p.add_argument('action', choices=['on', 'history', 'snapshot', 'reconcile'])
+    p.add_argument('arg', nargs='?', help="date (on, snapshot; default today) or product id (history)")
+    p.add_argument('--keep-days', type=int, help="snapshot: drop snapshots older than this many days")
+    p.add_argument('--fix', action='store_true', help="reconcile: post adjustments so the ledger matches")
+    p.set_defaults(func=cmd_stock)
+
+    p = sub.add_parser('chain', help="chain-wide figures or report from many store databases")
+    p.add_argument('stores', nargs='+', help="store database files or folders of them")
+    p.add_argument('--year', help="report year; without it, per-store dashboard totals")
+    p.add_argument('--month', default='All', help="report month (01-12, default All)")
+    p.add_argument('--by-store', action='store_true', help="report rows per store instead of summed")
+    p.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    p.set_defaults(func=cmd_chain)
+
+    p = sub.add_parser('archive', help="move old months of sales to the archive database")
+    p.add_argument('--keep-months', type=int, default=archiving.KEEP_MONTHS,
+                   help="full months kept before the current one (default %(default)s)")
+    p.add_argument('--vacuum', action='store_true', help="shrink the database file afterwards")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser('sync', help="ship this store's changes since the last sync to a head-office database")
+    p.add_argument('head_office', help="head-office database file (created if missing)")
+    p.add_argument('--name', help="store name shown at head office (remembered)")
+    p.add_argument('--batch', type=int, default=sync.BATCH, help="changed rows per transaction (default %(default)s)")
+    p.add_argument('--prune', action='store_true',
+                   help="drop shipped changes from the outbox; only when this is the store's one head office")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser('backup', help="online backup of the database (and sales archive) while it is in use")
+    p.add_argument('dest', nargs='?', help="backup folder (default: backups/ next to the database)")
+    p.add_argument('--pages', type=int, default=backup.PAGES,
+                   help="pages copied per step, -1 for all at once (default %(default)s)")
+    p.add_argument('--sleep', type=float, default=backup.SLEEP,
+                   help="seconds to pause between steps (default %(default)s)")
+    p.add_argument('--compress', action='store_true', help="gzip the copies")
+    p.add_argument('--keep', type=int, default=backup.KEEP, help="backups kept per file (default %(default)s)")
+    p.add_argument('--no-verify', action='store_true', help="skip the integrity check of the copy")
+    p.add_argument('--every', type=float, metavar='MINUTES', help="keep running, one backup every MINUTES")
+    p.add_argument('--restore', metavar='BACKUP', help="replace the database with a verified backup")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser('maintain', help="ANALYZE and hand free pages back to the file system now")
+    p.add_argument('--vacuum', action='store_true', help="full VACUUM instead (rewrites the whole file)")
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser('purge', help="remove rows inactive for longer than their table's retention")
+    p.add_argument('--table', action='append', choices=list(retention.POLICIES),
+                   help="only this table (repeatable; default all: "
+                        + ', '.join(f"{t} {p.days} days" for t, p in retention.POLICIES.items()) + ")")
+    p.add_argument('--days', type=int, help="retention for every table instead of the policies")
+    p.add_argument('--dry-run', action='store_true', help="only report what would be removed")
+    p.add_argument('--batch', type=int, default=retention.BATCH, help="rows per transaction (default %(default)s)")
+    p.add_argument('--no-compact', action='store_true', help="leave the freed pages in the file")
+    p.set_defaults(func=cmd_purge)
+
+    p = sub.add_parser('serve', help="JSON API for POS terminals (set SIS_API_URL on the terminals)")
+    p.add_argument('--host', default='127.0.0.1', help="address to listen on (default %(default)s)")
+    p.add_argument('--port', type=int, default=api_server.DEFAULT_PORT, help="default %(default)s")
+    p.add_argument('--readers', type=int, default=api_server.READERS,
+                   help="pooled read connections (default %(default)s)")
+    p.add_argument('--verbose', action='store_true', help="log every request")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    database.DB_NAME = args.db
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import glob
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from jobs import Cancelled
+from repositories import dashboard, reports
+from repositories.reports import ReportRow
+
+# Chain-wide figures from many store databases. Each store file is opened
+# read-only in a worker process, which computes that store's dashboard
+# figures and report summary; the parent only adds the partial results up,
+# so the work spreads over the CPUs and memory stays at one store per worker.
+# Separate connections rather than ATTACH: SQLite attaches at most ten
+# databases per connection and a chain has dozens of stores.
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class StoreFigures(NamedTuple):
+    store: str
+    path: str
+    products: int
+    quantity: int
+    sales: float
+    expenses: float
+    low_stock: int
+    sales_by_category: Dict[str, float]
+    years: List[str]
+    report: List[ReportRow]
+    error: Optional[str] = None
+    store_id: Optional[str] = None   # from store_info; None before the outbox migration
+
+
+class ChainFigures(NamedTuple):
+    stores: List[StoreFigures]   # one per store file, failed ones with error set
+    products: int
+    quantity: int
+    sales: float
+    expenses: float
+    low_stock: int
+    sales_by_category: Dict[str, float]
+    years: List[str]
+    report: List[ReportRow]      # summed per product over the stores
+
+
+def _is_store(path: str) -> bool:
+    # a store's sales archive (archiving.py) and the backups beside it
+    # (backup.py) are .db files too, but not stores of their own
+    folder, name = os.path.split(path)
+    return not name.endswith('_archive.db') and os.path.basename(folder) != 'backups'
+
+
+def find_stores(paths: List[str]) -> List[str]:
+    # files as given; folders are searched for .db files, one level of
+    # store subfolders included
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = glob.glob(os.path.join(path, '*.db')) + glob.glob(os.path.join(path, '*', '*.db'))
+            found += sorted(p for p in files if _is_store(p))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(os.path.abspath(p) for p in found))
+
+
+def _store_info(conn: sqlite3.Connection) -> Dict[str, str]:
+    try:
+        return dict(conn.execute('SELECT key, value FROM store_info'))
+    except sqlite3.Error:
+        return {}
+
+
+def _store_name(info: Dict[str, str], path: str) -> str:
+    if info.get('store_name'):
+        return info['store_name']
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.basename(os.path.dirname(path)) if stem == 'system' else stem
+
+
+def store_figures(task) -> StoreFigures:
+    path, year, month, threshold = task
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        return StoreFigures(os.path.basename(path), path, 0, 0, 0.0, 0.0, 0, {}, [], [], str(e))
+    try:
+        info = _store_info(conn)
+        cats, totals = dashboard.sales_by_category(conn=conn)
+        return StoreFigures(
+            _store_name(info, path), path,
+            dashboard.total_products(conn=conn),
+            dashboard.total_quantity(conn=conn),
+            dashboard.total_sales(conn=conn),
+            dashboard.total_expenses(conn=conn),
+            dashboard.low_stock_count(threshold, conn=conn),
+            {c or 'Uncategorized': t or 0.0 for c, t in zip(cats, totals)},
+            reports.years(conn=conn),
+            reports.product_summary(year, month, conn=conn) if year else [],
+            store_id=info.get('store_id'),
+        )
+    except sqlite3.Error as e:
+        # an old or damaged file should not sink the whole chain
+        return StoreFigures(os.path.basename(path), path, 0, 0, 0.0, 0.0, 0, {}, [], [], str(e))
+    finally:
+        conn.close()
+
+
+def _unique(stores: List[StoreFigures]) -> List[StoreFigures]:
+    # a copied store file keeps its store_id; count the store once, from the
+    # first path that has it
+    seen = set()
+    unique = []
+    for s in stores:
+        if s.store_id is not None:
+            if s.store_id in seen:
+                continue
+            seen.add(s.store_id)
+        unique.append(s)
+    return unique
+
+
+def merge(stores: List[StoreFigures]) -> ChainFigures:
+    stores = _unique(stores)
+    ok = [s for s in stores if s.error is None]
+    by_category: Dict[str, float] = defaultdict(float)
+    by_product: Dict[str, list] = {}
+    for s in ok:
+        for cat, total in s.sales_by_category.items():
+            by_category[cat] += total
+        for row in s.report:
+            acc = by_product.setdefault(row.product, [0, 0.0, 0.0])
+            acc[0] += row.total_qty or 0
+            acc[1] += row.total_cost or 0.0
+            acc[2] += row.total_sales or 0.0
+    return ChainFigures(
+        sorted(stores, key=lambda s: s.store.lower()),
+        sum(s.products for s in ok),
+        sum(s.quantity for s in ok),
+        sum(s.sales for s in ok),
+        sum(s.expenses for s in ok),
+        sum(s.low_stock for s in ok),
+        dict(by_category),
+        sorted({y for s in ok for y in s.years}, reverse=True),
+        [ReportRow(p, *acc) for p, acc in sorted(by_product.items())],
+    )
+
+
+def consolidate(paths: List[str], year: Optional[str] = None, month: str = 'All',
+                workers: Optional[int] = None, threshold: int = dashboard.LOW_STOCK_THRESHOLD,
+                progress: Progress = None, cancel: Optional[threading.Event] = None) -> ChainFigures:
+    stores = find_stores(paths)
+    tasks = [(path, year, month, threshold) for path in stores]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    results = []
+    if workers <= 1:
+        for task in tasks:
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            results.append(store_figures(task))
+            if progress:
+                progress(len(results), len(tasks))
+        return merge(results)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(store_figures, task) for task in tasks]
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                for f in futures:
+                    f.cancel()
+                raise Cancelled()
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(tasks))
+    # back in the order given, which decides the copy of a store that counts
+    order = {path: n for n, path in enumerate(stores)}
+    return merge(sorted(results, key=lambda s: order[s.path]))
@@ -1,10 +1,9 @@
-import sqlite3
 from datetime import datetime
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
 from ttkbootstrap.widgets import DateEntry, Checkbutton
 from tkinter import IntVar
-from database import get_connection
+from repositories import damage, products
 
 class DamageProductsFrame(Frame):
     def __init__(self, master):
@@ -97,50 +96,24 @@ class DamageProductsFrame(Frame):
         self.load_damage()
 
     def load_damage(self):
-        prods = [(r[0], r[1]) for r in get_connection().execute('SELECT id, name FROM products')]
-        names = [n for _, n in prods]
+        names = [n for _, n in products.list_names()]
         self.vars['prod_id']['values'] = names
         self.search_prod_cb['values'] = ['All'] + names
 
         for r in self.tree.get_children():
             self.tree.delete(r)
 
-        query = """
-            SELECT d.id, p.name, d.date, d.qty, d.reason, d.created_at, d.updated_at, d.is_active
-            FROM damage_products d
-            JOIN products p ON d.prod_id = p.id
-            WHERE 1=1
-        """
-        params = []
-
-        term = self.search_var.get().strip()
-        if term:
-            query += " AND (p.name LIKE ? OR d.reason LIKE ?)"
-            like_term = f"%{term}%"
-            params.extend([like_term, like_term])
-
         prod = self.search_prod_var.get()
-        if prod and prod != "All":
-            query += " AND p.name = ?"
-            params.append(prod)
-
-        from_date = self.search_from_date.entry.get().strip()
-        if from_date:
-            query += " AND d.date >= ?"
-            params.append(from_date)
-
-        to_date = self.search_to_date.entry.get().strip()
-        if to_date:
-            query += " AND d.date <= ?"
-            params.append(to_date)
-
-        query += " ORDER BY d.id"
-
-        with get_connection() as conn:
-            for row in conn.execute(query, params):
-                row = list(row)
-                row[-1] = "Yes" if row[-1] else "No"
-                self.tree.insert('', 'end', values=row)
+        rows = damage.list_damage(
+            term=self.search_var.get().strip(),
+            product=prod if prod != "All" else '',
+            from_date=self.search_from_date.entry.get().strip(),
+            to_date=self.search_to_date.entry.get().strip()
+        )
+        for row in rows:
+            row = list(row)
+            row[-1] = "Yes" if row[-1] else "No"
+            self.tree.insert('', 'end', values=row)
 
     def clear_form(self):
         for attr, widget in self.vars.items():
@@ -188,14 +161,8 @@ class DamageProductsFrame(Frame):
         if not (prod_name and date_val and qty and reason):
             tb.toast.ToastNotification("Error", "All fields required").show_toast()
             return
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            pid = conn.execute('SELECT id FROM products WHERE name=?', (prod_name,)).fetchone()[0]
-            conn.execute(
-                'INSERT INTO damage_products(prod_id, date, qty, reason, created_at, updated_at, is_active) VALUES(?,?,?,?,?,?,?)',
-                (pid, date_val, int(qty), reason, now, now, active)
-            )
-            conn.commit()
+        pid = products.product_id(prod_name)
+        damage.add_damage(pid, date_val, int(qty), reason, active)
         self.clear_form()
         self.load_damage()
 
@@ -210,14 +177,8 @@ class DamageProductsFrame(Frame):
         if not (prod_name and date_val and qty and reason):
             tb.toast.ToastNotification("Error", "All fields required").show_toast()
             return
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            pid = conn.execute('SELECT id FROM products WHERE name=?', (prod_name,)).fetchone()[0]
-            conn.execute(
-                'UPDATE damage_products SET prod_id=?, date=?, qty=?, reason=?, updated_at=?, is_active=? WHERE id=?',
-                (pid, date_val, int(qty), reason, now, active, self.current_id)
-            )
-            conn.commit()
+        pid = products.product_id(prod_name)
+        damage.update_damage(self.current_id, pid, date_val, int(qty), reason, active)
         self.clear_form()
         self.load_damage()
 
@@ -226,8 +187,6 @@ class DamageProductsFrame(Frame):
         if not sel:
             return
         did = self.tree.item(sel[0])['values'][0]
-        with get_connection() as conn:
-            conn.execute('DELETE FROM damage_products WHERE id=?', (did,))
-            conn.commit()
+        damage.delete_damage(did)
         self.clear_form()
         self.load_damage()
@@ -1,12 +1,13 @@
-import sqlite3
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from database import get_connection
+import analytics
+import forecasting
+from repositories import budgets, dashboard, debts
 
 class DashboardFrame(Frame):
-    LOW_STOCK_THRESHOLD = 5
+    LOW_STOCK_THRESHOLD = dashboard.LOW_STOCK_THRESHOLD
 
     def __init__(self, master):
         super().__init__(master, padding=20)
@@ -20,7 +21,9 @@ class DashboardFrame(Frame):
             ("Suppliers", self._get_total_suppliers()),
             ("Total Expenses", f"{self._get_total_expenses():,.2f}"),
             ("Max Inventory", self._get_top_quantity()),
-            (f"Low Stock (<= {self.LOW_STOCK_THRESHOLD})", self._get_low_stock_count()),
+            self._get_low_stock_stat(),
+            ("Overdue Debts", self._get_overdue_debts()),
+            ("Budget Alerts", len(budgets.alerts())),
         ]
         stats_frame = Frame(self)
         stats_frame.pack(fill='x', pady=(0, 20))
@@ -59,76 +62,42 @@ class DashboardFrame(Frame):
         Label(card, text=value, font=("Helvetica", 18, "bold")).pack()
 
     def _get_total_products(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT COUNT(*) FROM products WHERE is_active=1")
-            return cur.fetchone()[0]
+        return dashboard.total_products()
 
     def _get_total_quantity(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT SUM(quantity) FROM products")
-            return cur.fetchone()[0] or 0
+        return dashboard.total_quantity()
 
     def _get_total_sales(self):
-        with get_connection() as conn:
-            cur = conn.execute(
-                "SELECT SUM(s.qty * p.price)"
-                " FROM sales s JOIN products p ON s.prod_id = p.id"
-            )
-            return cur.fetchone()[0] or 0.0
+        return dashboard.total_sales()
 
     def _get_total_categories(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT COUNT(*) FROM categories")
-            return cur.fetchone()[0]
+        return dashboard.total_categories()
 
     def _get_total_suppliers(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT COUNT(*) FROM suppliers")
-            return cur.fetchone()[0]
+        return dashboard.total_suppliers()
 
     def _get_total_expenses(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT SUM(amount) FROM expenses")
-            return cur.fetchone()[0] or 0.0
+        return dashboard.total_expenses()
 
     def _get_top_quantity(self):
-        with get_connection() as conn:
-            cur = conn.execute("SELECT MAX(quantity) FROM products")
-            return cur.fetchone()[0] or 0
-
-    def _get_low_stock_count(self):
-        with get_connection() as conn:
-            cur = conn.execute(
-                "SELECT COUNT(*) FROM products WHERE quantity <= ?",
-                (self.LOW_STOCK_THRESHOLD,)
-            )
-            return cur.fetchone()[0] or 0
+        return dashboard.top_quantity()
+
+    def _get_low_stock_stat(self):
+        # reorder points from sales history; the fixed threshold without NumPy
+        forecast = forecasting.get_forecast()
+        if forecast is not None:
+            return "Below Reorder Point", forecast.risk_count()
+        return f"Low Stock (<= {self.LOW_STOCK_THRESHOLD})", dashboard.low_stock_count(self.LOW_STOCK_THRESHOLD)
+
+    def _get_overdue_debts(self):
+        count, amount = debts.overdue_total()
+        return f"{amount:,.2f} ({count})"
 
     def _get_sales_by_category(self):
-        with get_connection() as conn:
-            cur = conn.execute(
-                "SELECT c.name, SUM(s.qty * p.price)"
-                " FROM sales s"
-                " JOIN products p ON s.prod_id = p.id"
-                " LEFT JOIN categories c ON p.category_id = c.id"
-                " GROUP BY c.name"
-            )
-            data = cur.fetchall()
-            if not data:
-                return [], []
-            cats, vals = zip(*data)
-            return list(cats), list(vals)
+        engine = analytics.get_engine()
+        if engine is not None:
+            return engine.refresh().sales_by_category()
+        return dashboard.sales_by_category()
 
     def _get_expenses_by_department(self):
-        with get_connection() as conn:
-            cur = conn.execute(
-                "SELECT d.name, SUM(e.amount)"
-                " FROM expenses e"
-                " JOIN departments d ON e.department_id = d.id"
-                " GROUP BY d.name"
-            )
-            data = cur.fetchall()
-            if not data:
-                return [], []
-            depts, vals = zip(*data)
-            return list(depts), list(vals)
+        return dashboard.expenses_by_department()
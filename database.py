@@ -1,17 +1,84 @@
 import os
+import atexit
 import sqlite3
 import runpy
-from typing import Optional
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import query_stats
 
 DB_NAME = 'system.db'
 
+# Set SIS_QUERY_STATS=1 to time every statement and print a report at exit;
+# statements slower than SIS_SLOW_QUERY_MS are logged with their query plan.
+INSTRUMENT_QUERIES = os.environ.get('SIS_QUERY_STATS') == '1'
+
+
+# rows sampled per index when PRAGMA optimize decides a table needs ANALYZE
+ANALYSIS_LIMIT = 400
+
+
+class Connection(sqlite3.Connection):
+    # PRAGMA optimize on close, as SQLite advises for short-lived connections:
+    # it only re-analyzes tables this connection's queries found without
+    # statistics or grown well past them (maintenance.py does the rest)
+    def close(self):
+        try:
+            if not self.in_transaction:
+                self.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+                self.execute('PRAGMA optimize')
+        except sqlite3.Error:
+            # read-only or busy connections skip it; the next close tries again
+            pass
+        super().close()
+
+
+class InstrumentedConnection(query_stats.InstrumentedConnection, Connection):
+    pass
+
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
+def get_connection(instrumented: Optional[bool] = None) -> sqlite3.Connection:
+    if instrumented is None:
+        instrumented = INSTRUMENT_QUERIES
+    if instrumented:
+        conn = sqlite3.connect(DB_NAME, factory=InstrumentedConnection)
+    else:
+        conn = sqlite3.connect(DB_NAME, factory=Connection)
     conn.execute('PRAGMA foreign_keys = ON')
     return conn
 
 
+if INSTRUMENT_QUERIES:
+    atexit.register(lambda: print(query_stats.format_report()))
+
+
+# Column names per (database file, schema, table), for the queries that are
+# built from the live schema. The schema only changes when migrations (or
+# archiving, on the archive file) run, and those call invalidate_columns(),
+# so PRAGMA table_info runs once per table per process, not on every load.
+_columns: Dict[Tuple[str, str, str], List[str]] = {}
+_columns_lock = threading.Lock()
+
+
+def table_columns(conn: sqlite3.Connection, table: str, schema: str = 'main') -> List[str]:
+    files = {row[1]: row[2] for row in conn.execute('PRAGMA database_list')}
+    key = (files.get(schema, ''), schema, table)
+    with _columns_lock:
+        cols = _columns.get(key)
+    if cols is None:
+        cols = [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+        # in-memory and temporary databases have no file to key on
+        if cols and key[0]:
+            with _columns_lock:
+                _columns[key] = cols
+    return list(cols)
+
+
+def invalidate_columns() -> None:
+    with _columns_lock:
+        _columns.clear()
+
+
 def create_schema() -> None:
     with get_connection() as conn:
         c = conn.cursor()
@@ -162,11 +229,16 @@ def apply_migrations(scripts_folder: Optional[str] = None) -> None:
     if not os.path.isdir(scripts_folder):
         return
 
-    for script_name in ('migrate_columns.py', 'migrate_add_columns.py'):
+    for script_name in ('migrate_columns.py', 'migrate_add_columns.py', 'migrate_indexes.py',
+                        'migrate_purchasing.py', 'migrate_stock_ledger.py',
+                        'migrate_warehouse_stock.py', 'migrate_budgets.py', 'migrate_timestamps.py',
+                        'migrate_outbox.py', 'migrate_archive.py', 'migrate_maintenance.py',
+                        'migrate_sales_deletes.py'):
         script_path = os.path.join(scripts_folder, script_name)
         if os.path.isfile(script_path):
             print(f"[python migration] running {script_name}…")
             runpy.run_path(script_path, run_name='__main__')
+    invalidate_columns()
 
 
 if __name__ == '__main__':
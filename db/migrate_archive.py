@@ -0,0 +1,47 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # sales of archived months summed per product, so reports, dashboard
+    # totals and the analytics cache keep the history without the rows
+    '''
+    CREATE TABLE IF NOT EXISTS sales_archived (
+        month TEXT NOT NULL,
+        prod_id INTEGER NOT NULL,
+        is_active INTEGER NOT NULL,
+        qty INTEGER NOT NULL DEFAULT 0,
+        lines INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, prod_id, is_active)
+    ) WITHOUT ROWID
+    ''',
+    # one row per month moved to the archive database; queries whose range
+    # starts before the latest one also read the archive
+    '''
+    CREATE TABLE IF NOT EXISTS sales_archive_log (
+        month TEXT PRIMARY KEY,
+        rows INTEGER NOT NULL,
+        archived_at TEXT NOT NULL
+    )
+    ''',
+    # archiving moves a month at a time and date-range searches use it too
+    'CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)',
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_archive():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_archive()
@@ -0,0 +1,103 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # period is a month, YYYY-MM; alert_pct is the share of the budget at
+    # which the department is flagged
+    '''
+    CREATE TABLE IF NOT EXISTS department_budgets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        department_id INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        amount REAL NOT NULL,
+        alert_pct REAL NOT NULL DEFAULT 90,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(department_id, period),
+        FOREIGN KEY(department_id) REFERENCES departments(id)
+    )
+    ''',
+    # active expenses summed per department and month, kept by the triggers
+    # below; department_id 0 collects expenses without a department
+    '''
+    CREATE TABLE IF NOT EXISTS department_expense_totals (
+        department_id INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (department_id, period)
+    ) WITHOUT ROWID
+    ''',
+]
+
+_ADD = '''
+        INSERT INTO department_expense_totals (department_id, period, total, entries)
+        SELECT IFNULL(NEW.department_id, 0), substr(NEW.date, 1, 7), IFNULL(NEW.amount, 0), 1
+        WHERE NEW.is_active = 1
+        ON CONFLICT(department_id, period) DO UPDATE SET
+            total = total + excluded.total, entries = entries + 1;
+'''
+
+_SUBTRACT = '''
+        UPDATE department_expense_totals
+        SET total = total - IFNULL(OLD.amount, 0), entries = entries - 1
+        WHERE OLD.is_active = 1
+          AND department_id = IFNULL(OLD.department_id, 0) AND period = substr(OLD.date, 1, 7);
+'''
+
+TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS expense_totals_on_insert
+    AFTER INSERT ON expenses
+    BEGIN
+        {_ADD}
+    END
+    ''',
+    # only the columns the rollup depends on, so the updated_at touch-up does
+    # not fire it a second time
+    f'''
+    CREATE TRIGGER IF NOT EXISTS expense_totals_on_update
+    AFTER UPDATE OF date, department_id, amount, is_active ON expenses
+    BEGIN
+        {_SUBTRACT}
+        {_ADD}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS expense_totals_on_delete
+    AFTER DELETE ON expenses
+    BEGIN
+        {_SUBTRACT}
+    END
+    ''',
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_budgets():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        # first run: build the rollup from the existing expenses, then keep it
+        # current with triggers
+        if c.execute('SELECT 1 FROM department_expense_totals LIMIT 1').fetchone() is None:
+            c.execute('''
+                INSERT INTO department_expense_totals (department_id, period, total, entries)
+                SELECT IFNULL(department_id, 0), substr(date, 1, 7), TOTAL(amount), COUNT(*)
+                FROM expenses WHERE is_active = 1
+                GROUP BY 1, 2
+            ''')
+        for sql in TRIGGERS:
+            c.execute(sql)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_budgets()
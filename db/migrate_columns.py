@@ -42,19 +42,6 @@ def migrate_add_columns():
                     DEFAULT 1
                 """)
 
-            trig = f"{table}_updated_at"
-            c.execute(f"DROP TRIGGER IF EXISTS {trig}")
-            c.execute(f"""
-                CREATE TRIGGER {trig}
-                AFTER UPDATE ON {table}
-                FOR EACH ROW
-                BEGIN
-                    UPDATE {table}
-                    SET updated_at = CURRENT_TIMESTAMP
-                    WHERE id = OLD.id;
-                END;
-            """)
-
         conn.commit()
 
 if __name__ == '__main__':
@@ -0,0 +1,42 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+INDEXES = [
+    # lets incremental readers (analytics cache, sync) find edited rows
+    ('idx_sales_updated_at', 'sales', 'updated_at'),
+    # covering indexes for the per-product sold/damaged sums (inventory view/export)
+    ('idx_sales_prod_qty', 'sales', 'prod_id, qty'),
+    ('idx_damage_prod_qty', 'damage_products', 'prod_id, qty'),
+    # user search: case-insensitive prefix ranges on username and names
+    ('idx_users_username_nocase', 'users', 'username COLLATE NOCASE'),
+    ('idx_users_first_name', 'users', 'first_name COLLATE NOCASE'),
+    ('idx_users_last_name', 'users', 'last_name COLLATE NOCASE'),
+]
+
+PARTIAL_INDEXES = [
+    # open debts only, covering the aging and overdue queries; the WHERE text
+    # must stay identical to repositories.debts.OPEN_DEBT for SQLite to use it
+    ('idx_debts_open_due', 'debts', 'due_date, amount',
+     "is_active = 1 AND lower(IFNULL(status, '')) != 'paid'"),
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_indexes():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for name, table, columns in INDEXES:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+        for name, table, columns, where in PARTIAL_INDEXES:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns}) WHERE {where}")
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_indexes()
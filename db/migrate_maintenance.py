@@ -0,0 +1,47 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # one row per maintenance task run, with the file size and the time of
+    # a fixed set of queries before and after it
+    '''
+    CREATE TABLE IF NOT EXISTS maintenance_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        seconds REAL NOT NULL,
+        size_before INTEGER NOT NULL,
+        size_after INTEGER NOT NULL,
+        free_before INTEGER NOT NULL,
+        free_after INTEGER NOT NULL,
+        probe_ms_before REAL,
+        probe_ms_after REAL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_maintenance_log_task ON maintenance_log(task, started_at)',
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_maintenance():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        conn.commit()
+        # free pages are only handed back by PRAGMA incremental_vacuum once
+        # the file is in incremental mode, and switching an existing file
+        # takes one full VACUUM
+        if c.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            c.execute('VACUUM')
+
+
+if __name__ == '__main__':
+    migrate_maintenance()
@@ -0,0 +1,84 @@
+import sqlite3
+import uuid
+
+DB_NAME = 'system.db'
+
+# tables whose changes are shipped to head office by sync.py
+SYNCED_TABLES = ['sales', 'products', 'expenses', 'debts', 'damage_products']
+
+TABLES = [
+    # one row per change; sync.py ships the latest state of each changed row
+    # after a peer's watermark, so repeated edits of a row travel once
+    '''
+    CREATE TABLE IF NOT EXISTS change_outbox (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+        changed_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )
+    ''',
+    # store_id identifies this database at head office, whatever the file is
+    # called or wherever it is copied
+    '''
+    CREATE TABLE IF NOT EXISTS store_info (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    ''',
+]
+
+
+def trigger_sql(table):
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_outbox_on_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO change_outbox (table_name, row_id, op) VALUES ('{table}', NEW.id, 'upsert');
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_outbox_on_update
+        AFTER UPDATE ON {table}
+        BEGIN
+            INSERT INTO change_outbox (table_name, row_id, op) VALUES ('{table}', NEW.id, 'upsert');
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_outbox_on_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO change_outbox (table_name, row_id, op) VALUES ('{table}', OLD.id, 'delete');
+        END
+        ''',
+    ]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_outbox():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        c.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+        for table in SYNCED_TABLES:
+            exists = c.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                               (f'{table}_outbox_on_insert',)).fetchone()
+            if exists is None:
+                # first run: queue every existing row so the first sync is a
+                # full copy and later ones only carry changes
+                c.execute(f"INSERT INTO change_outbox (table_name, row_id, op) "
+                          f"SELECT '{table}', id, 'upsert' FROM {table}")
+            for sql in trigger_sql(table):
+                c.execute(sql)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_outbox()
@@ -0,0 +1,102 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # what each supplier sells, at what cost and lead time
+    '''
+    CREATE TABLE IF NOT EXISTS supplier_products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        supplier_id INTEGER NOT NULL,
+        prod_id INTEGER NOT NULL,
+        supplier_sku TEXT DEFAULT '',
+        unit_cost REAL NOT NULL,
+        lead_time_days INTEGER,
+        min_order_qty INTEGER NOT NULL DEFAULT 1,
+        is_preferred INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        is_active INTEGER NOT NULL DEFAULT 1,
+        UNIQUE(supplier_id, prod_id),
+        FOREIGN KEY(supplier_id) REFERENCES suppliers(id),
+        FOREIGN KEY(prod_id) REFERENCES products(id)
+    )
+    ''',
+    # status: draft -> ordered -> partial -> received, or cancelled
+    '''
+    CREATE TABLE IF NOT EXISTS purchase_orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        po_no TEXT UNIQUE,
+        supplier_id INTEGER NOT NULL,
+        order_date TEXT NOT NULL,
+        expected_date TEXT,
+        status TEXT NOT NULL DEFAULT 'draft',
+        notes TEXT DEFAULT '',
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        is_active INTEGER NOT NULL DEFAULT 1,
+        FOREIGN KEY(supplier_id) REFERENCES suppliers(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS purchase_order_lines (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        po_id INTEGER NOT NULL,
+        prod_id INTEGER NOT NULL,
+        qty_ordered INTEGER NOT NULL,
+        qty_received INTEGER NOT NULL DEFAULT 0,
+        unit_cost REAL,
+        FOREIGN KEY(po_id) REFERENCES purchase_orders(id),
+        FOREIGN KEY(prod_id) REFERENCES products(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS goods_receipts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        po_id INTEGER NOT NULL,
+        received_date TEXT NOT NULL,
+        notes TEXT DEFAULT '',
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(po_id) REFERENCES purchase_orders(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS goods_receipt_lines (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        receipt_id INTEGER NOT NULL,
+        po_line_id INTEGER NOT NULL,
+        prod_id INTEGER NOT NULL,
+        qty INTEGER NOT NULL,
+        FOREIGN KEY(receipt_id) REFERENCES goods_receipts(id),
+        FOREIGN KEY(po_line_id) REFERENCES purchase_order_lines(id)
+    )
+    ''',
+]
+
+INDEXES = [
+    ('idx_supplier_products_prod', 'supplier_products', 'prod_id'),
+    ('idx_purchase_orders_status', 'purchase_orders', 'status'),
+    ('idx_po_lines_po', 'purchase_order_lines', 'po_id'),
+    ('idx_po_lines_prod', 'purchase_order_lines', 'prod_id'),
+    ('idx_receipt_lines_receipt', 'goods_receipt_lines', 'receipt_id'),
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_purchasing():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        for name, table, columns in INDEXES:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_purchasing()
@@ -0,0 +1,41 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # deletes from sales so far; readers that load sales incrementally (the
+    # analytics engine) compare it with what they last saw to find out that
+    # rows are gone without scanning the table
+    '''
+    CREATE TABLE IF NOT EXISTS sales_delete_count (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        deletes INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    "INSERT OR IGNORE INTO sales_delete_count (id, deletes) VALUES (1, 0)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS sales_count_delete
+    AFTER DELETE ON sales
+    BEGIN
+        UPDATE sales_delete_count SET deletes = deletes + 1 WHERE id = 1;
+    END
+    ''',
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_sales_deletes():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_sales_deletes()
@@ -0,0 +1,66 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # append-only; qty is signed (sales and damage negative, receipts positive)
+    # and moved_at is the business date (YYYY-MM-DD) the movement belongs to
+    '''
+    CREATE TABLE IF NOT EXISTS stock_movements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        prod_id INTEGER NOT NULL,
+        moved_at TEXT NOT NULL,
+        qty INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        ref_table TEXT,
+        ref_id INTEGER,
+        note TEXT DEFAULT '',
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # per-product balance at the end of snapshot_date
+    '''
+    CREATE TABLE IF NOT EXISTS stock_snapshots (
+        snapshot_date TEXT NOT NULL,
+        prod_id INTEGER NOT NULL,
+        qty INTEGER NOT NULL,
+        PRIMARY KEY (snapshot_date, prod_id)
+    ) WITHOUT ROWID
+    ''',
+]
+
+INDEXES = [
+    # per-product history, covering for balances
+    ('idx_stock_movements_prod', 'stock_movements', 'prod_id, moved_at, qty'),
+    # bounded date-range scans from a snapshot forward
+    ('idx_stock_movements_date', 'stock_movements', 'moved_at'),
+    # shifting a product's later snapshots after a backdated movement
+    ('idx_stock_snapshots_prod', 'stock_snapshots', 'prod_id, snapshot_date'),
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_stock_ledger():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        for name, table, columns in INDEXES:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+        # the ledger starts from today's stock levels
+        if c.execute('SELECT 1 FROM stock_movements LIMIT 1').fetchone() is None:
+            c.execute("""
+                INSERT INTO stock_movements (prod_id, moved_at, qty, kind, note)
+                SELECT id, date('now', 'localtime'), quantity, 'opening', 'ledger started'
+                FROM products WHERE quantity != 0
+            """)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_stock_ledger()
@@ -0,0 +1,47 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    'users', 'categories', 'warehouses', 'products',
+    'departments', 'suppliers', 'expenses',
+    'debts', 'damage_products', 'sales'
+]
+
+
+def trigger_sql(table):
+    # Fallback only: fires when an UPDATE left updated_at alone, so writers
+    # that set it (every repository function does) write the row once. The
+    # inner UPDATE changes updated_at, so the WHEN clause stops it re-firing.
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_touch_updated_at
+        AFTER UPDATE ON {table}
+        FOR EACH ROW
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE {table}
+            SET updated_at = datetime('now', 'localtime')
+            WHERE id = NEW.id;
+        END
+    """
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def migrate_timestamps():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for table in TABLES:
+            # the unconditional trigger from migrate_columns.py rewrote every
+            # updated row a second time
+            c.execute(f"DROP TRIGGER IF EXISTS {table}_updated_at")
+            c.execute(trigger_sql(table))
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_timestamps()
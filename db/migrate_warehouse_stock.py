@@ -0,0 +1,210 @@
+import sqlite3
+
+DB_NAME = 'system.db'
+
+TABLES = [
+    # units of each product held at each warehouse; products.quantity stays
+    # the total across locations
+    '''
+    CREATE TABLE IF NOT EXISTS product_stock (
+        product_id INTEGER NOT NULL,
+        warehouse_id INTEGER NOT NULL,
+        qty INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (product_id, warehouse_id),
+        FOREIGN KEY(product_id) REFERENCES products(id) ON DELETE CASCADE,
+        FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+    ) WITHOUT ROWID
+    ''',
+    # units held per warehouse, kept by triggers on product_stock; a table of
+    # its own so stock changes do not touch warehouses.updated_at
+    '''
+    CREATE TABLE IF NOT EXISTS warehouse_usage (
+        warehouse_id INTEGER PRIMARY KEY,
+        units INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS stock_transfers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        prod_id INTEGER NOT NULL,
+        from_warehouse_id INTEGER NOT NULL,
+        to_warehouse_id INTEGER NOT NULL,
+        qty INTEGER NOT NULL CHECK (qty > 0),
+        transfer_date TEXT NOT NULL,
+        notes TEXT DEFAULT '',
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(prod_id) REFERENCES products(id),
+        FOREIGN KEY(from_warehouse_id) REFERENCES warehouses(id),
+        FOREIGN KEY(to_warehouse_id) REFERENCES warehouses(id)
+    )
+    ''',
+]
+
+INDEXES = [
+    # one warehouse's stock without touching the others
+    ('idx_product_stock_warehouse', 'product_stock', 'warehouse_id, product_id, qty'),
+    ('idx_stock_transfers_prod', 'stock_transfers', 'prod_id, transfer_date'),
+]
+
+TRIGGERS = [
+    # Stock added on products (receipts, imports, edits) lands in the
+    # product's home warehouse; transfers then move it between locations
+    # without changing the total.
+    '''
+    CREATE TRIGGER IF NOT EXISTS product_stock_on_insert
+    AFTER INSERT ON products
+    WHEN NEW.warehouse_id IS NOT NULL AND COALESCE(NEW.quantity, 0) != 0
+    BEGIN
+        INSERT INTO product_stock (product_id, warehouse_id, qty)
+        VALUES (NEW.id, NEW.warehouse_id, NEW.quantity)
+        ON CONFLICT(product_id, warehouse_id) DO UPDATE SET qty = qty + excluded.qty;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS product_stock_on_increase
+    AFTER UPDATE OF quantity ON products
+    WHEN NEW.warehouse_id IS NOT NULL AND COALESCE(NEW.quantity, 0) > COALESCE(OLD.quantity, 0)
+    BEGIN
+        INSERT INTO product_stock (product_id, warehouse_id, qty)
+        VALUES (NEW.id, NEW.warehouse_id, COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0))
+        ON CONFLICT(product_id, warehouse_id) DO UPDATE SET qty = qty + excluded.qty;
+    END
+    ''',
+    # Stock going out (sales, damage, edits) is taken from the warehouses
+    # that hold it, home first and then the others by id, so a sale after a
+    # transfer empties the destination rather than driving home negative.
+    # UPDATE ... FROM works out every row's share before writing any; what
+    # no warehouse holds is posted to home, keeping the sum equal to
+    # products.quantity.
+    '''
+    CREATE TRIGGER IF NOT EXISTS product_stock_on_decrease
+    AFTER UPDATE OF quantity ON products
+    WHEN NEW.warehouse_id IS NOT NULL AND COALESCE(NEW.quantity, 0) < COALESCE(OLD.quantity, 0)
+    BEGIN
+        INSERT OR IGNORE INTO product_stock (product_id, warehouse_id, qty) VALUES (NEW.id, NEW.warehouse_id, 0);
+        UPDATE product_stock SET qty = product_stock.qty - share.qty
+        FROM (
+            SELECT warehouse_id,
+                   MIN(MAX(qty, 0), MAX(0, COALESCE(OLD.quantity, 0) - COALESCE(NEW.quantity, 0)
+                                          - (SUM(MAX(qty, 0)) OVER held - MAX(qty, 0))))
+                   + CASE WHEN warehouse_id = NEW.warehouse_id
+                          THEN MAX(0, COALESCE(OLD.quantity, 0) - COALESCE(NEW.quantity, 0)
+                                      - (SELECT TOTAL(MAX(qty, 0)) FROM product_stock WHERE product_id = NEW.id))
+                          ELSE 0 END AS qty
+            FROM product_stock
+            WHERE product_id = NEW.id
+            WINDOW held AS (ORDER BY warehouse_id != NEW.warehouse_id, warehouse_id ROWS UNBOUNDED PRECEDING)
+        ) AS share
+        WHERE product_stock.product_id = NEW.id AND product_stock.warehouse_id = share.warehouse_id
+              AND share.qty != 0;
+    END
+    ''',
+    # moving a product's home warehouse moves the stock held there with it
+    '''
+    CREATE TRIGGER IF NOT EXISTS product_stock_on_rehome
+    AFTER UPDATE OF warehouse_id ON products
+    WHEN OLD.warehouse_id IS NOT NULL AND NEW.warehouse_id IS NOT NULL
+         AND NEW.warehouse_id != OLD.warehouse_id
+    BEGIN
+        INSERT INTO product_stock (product_id, warehouse_id, qty)
+        SELECT NEW.id, NEW.warehouse_id, qty FROM product_stock
+        WHERE product_id = OLD.id AND warehouse_id = OLD.warehouse_id
+        ON CONFLICT(product_id, warehouse_id) DO UPDATE SET qty = qty + excluded.qty;
+        DELETE FROM product_stock WHERE product_id = OLD.id AND warehouse_id = OLD.warehouse_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS product_stock_on_delete
+    AFTER DELETE ON products
+    BEGIN
+        DELETE FROM product_stock WHERE product_id = OLD.id;
+    END
+    ''',
+    # warehouse_usage follows product_stock row by row, so utilization never
+    # needs a scan over all products
+    '''
+    CREATE TRIGGER IF NOT EXISTS warehouse_units_on_insert
+    AFTER INSERT ON product_stock
+    BEGIN
+        INSERT INTO warehouse_usage (warehouse_id, units) VALUES (NEW.warehouse_id, NEW.qty)
+        ON CONFLICT(warehouse_id) DO UPDATE SET units = units + excluded.units;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS warehouse_units_on_update
+    AFTER UPDATE OF qty ON product_stock
+    BEGIN
+        UPDATE warehouse_usage SET units = units + NEW.qty - OLD.qty WHERE warehouse_id = NEW.warehouse_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS warehouse_units_on_delete
+    AFTER DELETE ON product_stock
+    BEGIN
+        UPDATE warehouse_usage SET units = units - OLD.qty WHERE warehouse_id = OLD.warehouse_id;
+    END
+    ''',
+]
+
+
+def get_connection():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def rebalance(c):
+    # products that old trigger left with a negative row next to positive
+    # ones: the missing units are taken from the others, home first
+    for product_id, home in c.execute('''
+        SELECT p.id, p.warehouse_id FROM products p
+        WHERE EXISTS (SELECT 1 FROM product_stock WHERE product_id = p.id AND qty < 0)
+          AND EXISTS (SELECT 1 FROM product_stock WHERE product_id = p.id AND qty > 0)
+    ''').fetchall():
+        rows = c.execute('SELECT warehouse_id, qty FROM product_stock WHERE product_id = ? '
+                         'ORDER BY warehouse_id != ?, warehouse_id', (product_id, home)).fetchall()
+        owed = -sum(qty for _, qty in rows if qty < 0)
+        fixed = {}
+        for warehouse_id, qty in rows:
+            if qty < 0:
+                fixed[warehouse_id] = 0
+            elif qty > 0:
+                fixed[warehouse_id] = qty - min(qty, owed)
+                owed -= qty - fixed[warehouse_id]
+        if owed:
+            fixed[home if home in fixed else rows[0][0]] -= owed
+        c.executemany('UPDATE product_stock SET qty = ? WHERE product_id = ? AND warehouse_id = ?',
+                      [(qty, product_id, warehouse_id) for warehouse_id, qty in fixed.items()])
+
+
+def migrate_warehouse_stock():
+    with get_connection() as conn:
+        c = conn.cursor()
+        for sql in TABLES:
+            c.execute(sql)
+        for name, table, columns in INDEXES:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+
+        # first run: every product's stock sits in its home warehouse
+        if c.execute('SELECT 1 FROM product_stock LIMIT 1').fetchone() is None:
+            c.execute('''
+                INSERT INTO product_stock (product_id, warehouse_id, qty)
+                SELECT id, warehouse_id, quantity FROM products
+                WHERE warehouse_id IS NOT NULL AND quantity != 0
+            ''')
+            c.execute('DELETE FROM warehouse_usage')
+            c.execute('''
+                INSERT INTO warehouse_usage (warehouse_id, units)
+                SELECT warehouse_id, SUM(qty) FROM product_stock GROUP BY warehouse_id
+            ''')
+        # posted every decrease to the home warehouse, stock there or not
+        c.execute('DROP TRIGGER IF EXISTS product_stock_on_quantity')
+        for sql in TRIGGERS:
+            c.execute(sql)
+        rebalance(c)
+        conn.commit()
+
+
+if __name__ == '__main__':
+    migrate_warehouse_stock()
@@ -1,10 +1,9 @@
-import sqlite3
 from datetime import datetime
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
 from ttkbootstrap.widgets import DateEntry, Checkbutton
 from tkinter import IntVar
-from database import get_connection
+from repositories import debts
 
 class DebtTrackerFrame(Frame):
     def __init__(self, master):
@@ -37,8 +36,23 @@ class DebtTrackerFrame(Frame):
         active_cb.pack(side='left', padx=(5,0))
         active_cb.bind("<<ComboboxSelected>>", lambda e: self.load())
 
+        self.overdue_only = IntVar(value=0)
+        Checkbutton(filter_frame, text="Overdue only", variable=self.overdue_only,
+                    bootstyle="danger", command=self.load).pack(side='left', padx=(10,0))
+
         filter_frame.pack(fill='x', pady=(0,10))
 
+        aging_frame = Frame(self)
+        aging_frame.pack(fill='x', pady=(0,10))
+        self.aging_labels = []
+        for label in debts.AGING_BUCKETS:
+            card = Frame(aging_frame, padding=5, bootstyle="secondary")
+            card.pack(side='left', fill='x', expand=True, padx=5)
+            Label(card, text=label, font=("Helvetica", 10)).pack()
+            value = Label(card, text="", font=("Helvetica", 12, "bold"))
+            value.pack()
+            self.aging_labels.append(value)
+
         table_frame = Frame(self)
         table_frame.pack(fill='both', expand=True, pady=(0,10))
         cols = ("ID","Name","Amount","Due Date","Status","Created At","Updated At","Active")
@@ -96,30 +110,20 @@ class DebtTrackerFrame(Frame):
         for r in self.tree.get_children():
             self.tree.delete(r)
 
-        name_term = f"%{self.search_var.get().strip()}%"
-        due_val  = self.due_date_filter.entry.get().strip()
-        active   = self.active_filter.get()
-
-        query = (
-            "SELECT id, name, amount, due_date, status, created_at, updated_at, is_active "
-            "FROM debts WHERE (name LIKE ? OR status LIKE ?)"
+        active = self.active_filter.get()
+        rows = debts.list_debts(
+            term=self.search_var.get().strip(),
+            due_date=self.due_date_filter.entry.get().strip(),
+            active=None if active == "All" else active == "Active",
+            overdue=bool(self.overdue_only.get())
         )
-        params = [name_term, name_term]
-
-        if due_val:
-            query += " AND due_date = ?"
-            params.append(due_val)
-        if active != "All":
-            query += " AND is_active = ?"
-            params.append(1 if active=="Active" else 0)
-
-        query += " ORDER BY due_date"
+        for row in rows:
+            row = list(row)
+            row[-1] = "Yes" if row[-1] else "No"
+            self.tree.insert('', 'end', values=row)
 
-        with get_connection() as conn:
-            for row in conn.execute(query, params):
-                row = list(row)
-                row[-1] = "Yes" if row[-1] else "No"
-                self.tree.insert('', 'end', values=row)
+        for label, bucket in zip(self.aging_labels, debts.aging()):
+            label.config(text=f"{bucket.amount:,.2f} ({bucket.count})")
 
     def clear_form(self):
         for attr, w in self.vars.items():
@@ -160,13 +164,7 @@ class DebtTrackerFrame(Frame):
         if not all([v['name'], v['amount'], v['due_date'], v['status']]):
             tb.toast.ToastNotification("Error","All fields required").show_toast()
             return
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            conn.execute(
-                'INSERT INTO debts(name, amount, due_date, status, created_at, updated_at, is_active) VALUES(?,?,?,?,?,?,?)',
-                (v['name'], float(v['amount']), v['due_date'], v['status'], now, now, self.vars['is_active'].get())
-            )
-            conn.commit()
+        debts.add_debt(v['name'], float(v['amount']), v['due_date'], v['status'], self.vars['is_active'].get())
         self.clear_form()
         self.load()
 
@@ -176,12 +174,7 @@ class DebtTrackerFrame(Frame):
         if not all([v['name'], v['amount'], v['due_date'], v['status']]):
             tb.toast.ToastNotification("Error","All fields required").show_toast()
             return
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            conn.execute(
-                'UPDATE debts SET name=?, amount=?, due_date=?, status=?, updated_at=?, is_active=? WHERE id=?',
-                (v['name'], float(v['amount']), v['due_date'], v['status'], now, self.vars['is_active'].get(), self.current_id)
-            )
-            conn.commit()
+        debts.update_debt(self.current_id, v['name'], float(v['amount']), v['due_date'], v['status'],
+                          self.vars['is_active'].get())
         self.clear_form()
         self.load()
@@ -1,10 +1,11 @@
-import sqlite3
 from datetime import datetime
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
 from ttkbootstrap.widgets import DateEntry, Checkbutton
 from tkinter import IntVar
-from database import get_connection
+from ttkbootstrap.toast import ToastNotification
+from import_dialog import ImportDialog, ask_import_path
+from repositories import budgets, expenses, lookups
 
 
 class ExpensesFrame(Frame):
@@ -82,29 +83,20 @@ class ExpensesFrame(Frame):
         Button(btn_frame, text="Add", bootstyle="primary", command=self.add_expense).pack(side='left', padx=5)
         Button(btn_frame, text="Update", bootstyle="warning", command=self.update_expense).pack(side='left', padx=5)
         Button(btn_frame, text="Refresh", bootstyle="info", command=self.load).pack(side='left', padx=5)
+        Button(btn_frame, text="Import CSV", bootstyle="info-outline", command=self.import_csv).pack(side='left', padx=5)
         btn_frame.pack(pady=5)
 
         self.load()
 
     def load(self):
         self.error_var.set("")
-        depts = [(r[0], r[1]) for r in get_connection().execute('SELECT id, name FROM departments')]
-        self.vars['department']['values'] = [n for _, n in depts]
+        self.vars['department']['values'] = [n for _, n in lookups.department_choices()]
         for r in self.tree.get_children():
             self.tree.delete(r)
-        query = 'SELECT id, date, department_id, description, amount, created_at, updated_at, is_active FROM expenses'
-        term = self.search_var.get().strip()
-        params = ()
-        if term:
-            query += ' WHERE date LIKE ? OR description LIKE ?'
-            like = f"%{term}%"
-            params = (like, like)
-        with get_connection() as conn:
-            for row in conn.execute(query, params):
-                row = list(row)
-                row[2] = next((n for i, n in depts if i == row[2]), "")
-                row[-1] = "Yes" if row[-1] else "No"
-                self.tree.insert('', 'end', values=row)
+        for row in expenses.list_expenses(self.search_var.get().strip()):
+            row = list(row)
+            row[-1] = "Yes" if row[-1] else "No"
+            self.tree.insert('', 'end', values=row)
 
     def clear_form(self):
         self.error_var.set("")
@@ -159,20 +151,14 @@ class ExpensesFrame(Frame):
         except ValueError:
             self.error_var.set("Amount must be a valid number.")
             return
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with get_connection() as conn:
-            dept_row = conn.execute('SELECT id FROM departments WHERE name=?', (vals['department'],)).fetchone()
-            if not dept_row:
-                self.error_var.set("Selected department not found.")
-                return
-            dept_id = dept_row[0]
-            conn.execute(
-                'INSERT INTO expenses(date, department_id, description, amount, created_at, updated_at, is_active) VALUES(?,?,?,?,?,?,?)',
-                (vals['date'], dept_id, vals['description'], amt, now, now, int(vals['is_active']))
-            )
-            conn.commit()
+        dept_id = lookups.department_id(vals['department'])
+        if dept_id is None:
+            self.error_var.set("Selected department not found.")
+            return
+        expenses.add_expense(vals['date'], dept_id, vals['description'], amt, int(vals['is_active']))
         self.clear_form()
         self.load()
+        self._check_budget(dept_id, vals['date'])
 
     def update_expense(self):
         if not hasattr(self, 'current_id'):
@@ -191,20 +177,25 @@ class ExpensesFrame(Frame):
         except ValueError:
             self.error_var.set("Amount must be a valid number.")
             return
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with get_connection() as conn:
-            dept_row = conn.execute('SELECT id FROM departments WHERE name=?', (vals['department'],)).fetchone()
-            if not dept_row:
-                self.error_var.set("Selected department not found.")
-                return
-            dept_id = dept_row[0]
-            conn.execute(
-                'UPDATE expenses SET date=?, department_id=?, description=?, amount=?, updated_at=?, is_active=? WHERE id=?',
-                (vals['date'], dept_id, vals['description'], amt, now, int(vals['is_active']), self.current_id)
-            )
-            conn.commit()
+        dept_id = lookups.department_id(vals['department'])
+        if dept_id is None:
+            self.error_var.set("Selected department not found.")
+            return
+        expenses.update_expense(self.current_id, vals['date'], dept_id, vals['description'], amt,
+                                int(vals['is_active']))
         self.clear_form()
         self.load()
+        self._check_budget(dept_id, vals['date'])
+
+    def _check_budget(self, dept_id, date):
+        alert = budgets.department_alert(dept_id, date[:7])
+        if alert:
+            ToastNotification(
+                "Budget Alert",
+                f"{alert.department}: {alert.actual:,.2f} of {alert.budget:,.2f} "
+                f"({alert.used_pct:.0f}%) for {date[:7]}",
+                bootstyle="danger"
+            ).show_toast()
 
     def delete_expense(self):
         sel = self.tree.selection()
@@ -212,8 +203,11 @@ class ExpensesFrame(Frame):
             self.error_var.set("Select a record to delete.")
             return
         eid = self.tree.item(sel[0])['values'][0]
-        with get_connection() as conn:
-            conn.execute('DELETE FROM expenses WHERE id=?', (eid,))
-            conn.commit()
+        expenses.delete_expense(eid)
         self.clear_form()
-        self.load()
\ No newline at end of file
+        self.load()
+
+    def import_csv(self):
+        path = ask_import_path(self)
+        if path:
+            ImportDialog(self, 'expenses', path, on_done=self.load)
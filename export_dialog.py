@@ -0,0 +1,92 @@
+import os
+from datetime import datetime
+from tkinter import filedialog
+
+import ttkbootstrap as tb
+from ttkbootstrap import Frame, Label, Button, Progressbar
+from ttkbootstrap.toast import ToastNotification
+
+from exports import ExportJob, data_formats
+from jobs import BackgroundJob
+
+FORMAT_NAMES = {'.csv': "CSV", '.parquet': "Parquet", '.npz': "NumPy archive"}
+
+
+def ask_data_path(parent, prefix: str, folder: str = "exports") -> str:
+    # Save-as dialog offering the data formats available here; '' if cancelled.
+    os.makedirs(folder, exist_ok=True)
+    formats = data_formats()
+    return filedialog.asksaveasfilename(
+        parent=parent, title="Export data", initialdir=folder,
+        initialfile=f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{formats[0]}",
+        defaultextension=formats[0],
+        filetypes=[(FORMAT_NAMES[ext], f"*{ext}") for ext in formats]
+    )
+
+
+class JobDialog(tb.Toplevel):
+    # Progress window for a BackgroundJob; subclasses report the outcome.
+    POLL_MS = 150
+    job_class = BackgroundJob
+    verb = "Working"
+
+    def __init__(self, master, title, func, *args, **kwargs):
+        super().__init__(title=title, resizable=(False, False))
+        self.transient(master.winfo_toplevel())
+        self.protocol('WM_DELETE_WINDOW', self.cancel)
+
+        body = Frame(self, padding=15)
+        body.pack(fill='both', expand=True)
+        self.status = Label(body, text=f"{self.verb}...", width=40)
+        self.status.pack(fill='x', pady=(0, 8))
+        self.bar = Progressbar(body, mode='determinate', maximum=100, bootstyle="success-striped")
+        self.bar.pack(fill='x', pady=(0, 8))
+        self.cancel_btn = Button(body, text="Cancel", bootstyle="danger", command=self.cancel)
+        self.cancel_btn.pack()
+
+        self.job = self.job_class(func, *args, **kwargs)
+        self.job.start()
+        self.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_btn.state(['disabled'])
+        self.status.config(text="Cancelling...")
+
+    def _poll(self):
+        job = self.job
+        if job.is_alive():
+            if job.total:
+                self.bar.config(mode='determinate')
+                self.bar['value'] = 100.0 * job.done / job.total
+                self.status.config(text=f"{self.verb}: {job.done:,} of {job.total:,} rows")
+            else:
+                self.bar.config(mode='indeterminate')
+                self.bar.step(5)
+                self.status.config(text=f"{self.verb}: {job.done:,} rows")
+            self.after(self.POLL_MS, self._poll)
+            return
+
+        self.destroy()
+        self.finished(job)
+
+    def finished(self, job):
+        # called once the window is gone; the subclasses toast the outcome
+        pass
+
+
+class ExportDialog(JobDialog):
+    job_class = ExportJob
+    verb = "Exporting"
+
+    def finished(self, job):
+        if job.cancelled:
+            ToastNotification("Export", "Export cancelled").show_toast()
+        elif job.error is not None:
+            ToastNotification("Export", f"Export failed: {job.error}").show_toast()
+        elif len(job.paths) == 1:
+            ToastNotification("Exported", f"Saved to {job.paths[0]}").show_toast()
+        else:
+            ToastNotification(
+                "Exported", f"Saved {len(job.paths)} files to {job.paths[0]} ..."
+            ).show_toast()
@@ -0,0 +1,491 @@
+import csv
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from fpdf import FPDF
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+import analytics
+import report_cache
+from jobs import BackgroundJob, Cancelled
+from repositories import connection, inventory, products, reports, sales
+
+# FPDF keeps a whole document in memory until output() and assembles it with
+# repeated string appends, so long exports are split into volumes of at most
+# this many rows (~125 pages); each finished volume is written to disk and
+# released before the next one starts.
+ROWS_PER_FILE = int(os.environ.get('SIS_EXPORT_ROWS_PER_FILE', 5000))
+CHUNK = 2000
+DATA_CHUNK = 50000
+
+SALES_HEADERS = ["ID", "Receipt No", "Date", "Product", "Qty", "Cost", "Total", "Notes",
+                 "Created At", "Updated At", "Active"]
+PRODUCT_HEADERS = ["ID", "SKU", "Name", "Description", "Category", "Cost", "Price", "Qty",
+                   "Warehouse", "Active", "Created At", "Updated At"]
+REPORT_HEADERS = ["Product", "Total Qty", "Total Cost", "Total Sales"]
+
+# column name and type for the data formats (csv/parquet/npz)
+SALES_COLUMNS = [('id', 'int'), ('receipt_no', 'str'), ('date', 'date'), ('product', 'str'),
+                 ('qty', 'int'), ('cost', 'float'), ('total', 'float'), ('notes', 'str'),
+                 ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('is_active', 'int')]
+INVENTORY_COLUMNS = [('id', 'int'), ('name', 'str'), ('category', 'str'), ('price', 'float'),
+                     ('quantity', 'int'), ('damaged', 'int'), ('sold', 'int')]
+REPORT_COLUMNS = [('product', 'str'), ('total_qty', 'int'), ('total_cost', 'float'),
+                  ('total_sales', 'float')]
+
+
+ExportCancelled = Cancelled
+
+
+def timestamped(folder: str, prefix: str) -> str:
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+
+
+def _text(value) -> str:
+    # the core PDF fonts are latin-1 only
+    return ('' if value is None else str(value)).encode('latin-1', 'replace').decode('latin-1')
+
+
+class _TablePDF(FPDF):
+    def __init__(self, title, headers, widths, orientation, font_size):
+        super().__init__(orientation=orientation, unit='mm', format='A4')
+        self.title_text = title
+        self.headers = headers
+        self.font_size_pt = font_size
+        self.set_auto_page_break(auto=True, margin=12)
+        usable = self.w - self.l_margin - self.r_margin
+        total = float(sum(widths))
+        self.widths = [usable * w / total for w in widths]
+        # rough Helvetica average glyph width, cheaper than get_string_width per cell
+        self.limits = [max(3, int(w / (0.19 * font_size))) for w in self.widths]
+        self._parts = []
+
+    def _out(self, s):
+        # FPDF 1.7 appends every operator to the page string (quadratic on
+        # dense tables); collect page content in a list and join at page end
+        if self.state == 2:
+            self._parts.append(s.decode('latin1') if isinstance(s, bytes) else str(s))
+        else:
+            super()._out(s)
+
+    def _endpage(self):
+        if self._parts:
+            self.pages[self.page] += '\n'.join(self._parts) + '\n'
+            self._parts = []
+        super()._endpage()
+
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 8, self.title_text, ln=True)
+        self.set_font('Arial', 'B', self.font_size_pt)
+        self.set_fill_color(200, 200, 200)
+        for w, h in zip(self.widths, self.headers):
+            self.cell(w, 6, h, border=1, align='C', fill=True)
+        self.ln()
+        self.set_font('Arial', '', self.font_size_pt)
+
+    def footer(self):
+        self.set_y(-10)
+        self.set_font('Arial', '', 7)
+        self.cell(0, 5, f"Page {self.page_no()}", align='R')
+        self.set_font('Arial', '', self.font_size_pt)
+
+
+def volume_path(path: str, n: int) -> str:
+    if n == 1:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}_part{n}{ext}"
+
+
+class PdfTableWriter:
+    # Writes table rows into one or more PDF files: <path>, <path>_part2.pdf, ...
+
+    def __init__(self, path: str, title: str, headers: Sequence[str], widths: Sequence[float],
+                 orientation: str = 'L', font_size: int = 7, rows_per_file: Optional[int] = None):
+        self.path = path
+        self.title = title
+        self.headers = list(headers)
+        self.widths = list(widths)
+        self.orientation = orientation
+        self.font_size = font_size
+        self.rows_per_file = rows_per_file or ROWS_PER_FILE
+        self.paths: List[str] = []
+        self._pdf = None
+        self._rows = 0
+
+    def _open(self):
+        n = len(self.paths) + 1
+        title = self.title if n == 1 else f"{self.title} (part {n})"
+        self._pdf = _TablePDF(title, self.headers, self.widths, self.orientation, self.font_size)
+        self._pdf.add_page()
+        self._rows = 0
+
+    def _flush(self):
+        path = volume_path(self.path, len(self.paths) + 1)
+        self._pdf.output(path)
+        self.paths.append(path)
+        self._pdf = None
+
+    def write(self, rows: Iterable[Sequence]) -> int:
+        count = 0
+        for row in rows:
+            count += 1
+            if self._pdf is None:
+                self._open()
+            pdf = self._pdf
+            for w, limit, value in zip(pdf.widths, pdf.limits, row):
+                text = _text(value)
+                if len(text) > limit:
+                    text = text[:limit - 3] + '...'
+                pdf.cell(w, 5, text, border=1)
+            pdf.ln()
+            self._rows += 1
+            if self._rows >= self.rows_per_file:
+                self._flush()
+        return count
+
+    def close(self) -> List[str]:
+        if self._pdf is None and not self.paths:
+            self._open()  # empty export still produces a (header-only) file
+        if self._pdf is not None:
+            self._flush()
+        return self.paths
+
+    def discard(self):
+        self._pdf = None
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.paths = []
+
+
+class CsvWriter:
+    # data writers take a batch as a list of columns and return its row count
+
+    def __init__(self, path: str, columns):
+        self.path = path
+        self.paths: List[str] = []
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._csv = csv.writer(self._file)
+        self._csv.writerow([name for name, _ in columns])
+
+    def write(self, columns) -> int:
+        self._csv.writerows(zip(*columns))
+        return len(columns[0]) if columns else 0
+
+    def close(self) -> List[str]:
+        self._file.close()
+        self.paths = [self.path]
+        return self.paths
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParquetWriter:
+    # one row group per fetched batch; pyarrow dictionary-encodes repetitive
+    # text (product, notes) on its own
+    TYPES = {'int': 'int64', 'float': 'float64', 'str': 'string', 'date': 'date32',
+             'timestamp': 'timestamp[s]'}
+
+    def __init__(self, path: str, columns):
+        self.path = path
+        self.paths: List[str] = []
+        self._kinds = [kind for _, kind in columns]
+        self._schema = pa.schema([(name, pa.type_for_alias(self.TYPES[kind])) for name, kind in columns])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+
+    def _array(self, values, kind, field):
+        if kind == 'date':
+            text = pc.utf8_slice_codeunits(pa.array(values, type=pa.string()), 0, 10)
+            return pc.strptime(text, format='%Y-%m-%d', unit='s', error_is_null=True).cast(field.type)
+        if kind == 'timestamp':
+            text = pa.array(values, type=pa.string())
+            return pc.strptime(text, format='%Y-%m-%d %H:%M:%S', unit='s', error_is_null=True)
+        return pa.array(values, type=field.type)
+
+    def write(self, columns) -> int:
+        if not columns or not len(columns[0]):
+            return 0
+        arrays = [self._array(values, kind, field)
+                  for values, kind, field in zip(columns, self._kinds, self._schema)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        return len(columns[0])
+
+    def close(self) -> List[str]:
+        self._writer.close()
+        self.paths = [self.path]
+        return self.paths
+
+    def discard(self):
+        self._writer.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _datetimes(values, unit):
+    try:
+        return np.array(values, dtype=f'datetime64[{unit}]')
+    except ValueError:
+        out = np.empty(len(values), dtype=f'datetime64[{unit}]')
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(v[:10] if unit == 'D' else v, unit)
+            except (ValueError, TypeError):
+                out[i] = np.datetime64('NaT')
+        return out
+
+
+class NpzWriter:
+    # numpy-only fallback. Each column is appended to a raw scratch file as
+    # batches arrive and the .npz (a zip of .npy files) is assembled at the
+    # end, so memory stays flat whatever the row count. Text is stored
+    # Arrow-style as <name>_data (utf-8 bytes) and <name>_offsets (n + 1).
+    DTYPES = {'int': 'int64', 'float': 'float64', 'date': 'datetime64[D]', 'timestamp': 'datetime64[s]'}
+
+    def __init__(self, path: str, columns):
+        self.path = path
+        self.paths: List[str] = []
+        self._columns = columns
+        self._tmp = tempfile.mkdtemp(prefix='npz_')
+        self._arrays = []  # (array name, dtype)
+        for name, kind in columns:
+            if kind == 'str':
+                self._arrays += [(name + '_data', 'uint8'), (name + '_offsets', 'int64')]
+            else:
+                self._arrays.append((name, self.DTYPES[kind]))
+        self._files = {name: open(os.path.join(self._tmp, name), 'wb') for name, _ in self._arrays}
+        self._text_size = {name: 0 for name, kind in columns if kind == 'str'}
+        for name in self._text_size:
+            np.zeros(1, dtype=np.int64).tofile(self._files[name + '_offsets'])
+        self._rows = 0
+
+    def write(self, columns) -> int:
+        if not columns or not len(columns[0]):
+            return 0
+        files = self._files
+        for (name, kind), values in zip(self._columns, columns):
+            if kind == 'str':
+                encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+                ends = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+                files[name + '_data'].write(b''.join(encoded))
+                (ends + self._text_size[name]).tofile(files[name + '_offsets'])
+                self._text_size[name] += int(ends[-1])
+            elif kind in ('date', 'timestamp'):
+                _datetimes(values, 'D' if kind == 'date' else 's').tofile(files[name])
+            elif kind == 'float':
+                np.array([np.nan if v is None else v for v in values], dtype=np.float64).tofile(files[name])
+            else:
+                np.array([0 if v is None else v for v in values], dtype=np.int64).tofile(files[name])
+        self._rows += len(columns[0])
+        return len(columns[0])
+
+    def close(self) -> List[str]:
+        for fh in self._files.values():
+            fh.close()
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name, dtype in self._arrays:
+                raw_path = os.path.join(self._tmp, name)
+                count = os.path.getsize(raw_path) // np.dtype(dtype).itemsize
+                header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                          'fortran_order': False, 'shape': (count,)}
+                with zf.open(name + '.npy', 'w', force_zip64=True) as out, open(raw_path, 'rb') as raw:
+                    np.lib.format.write_array_header_2_0(out, header)
+                    shutil.copyfileobj(raw, out, 1 << 20)
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self.paths = [self.path]
+        return self.paths
+
+    def discard(self):
+        for fh in self._files.values():
+            fh.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def data_formats() -> List[str]:
+    # extensions usable for data exports in this environment, best first
+    formats = ['.csv']
+    if pq is not None:
+        formats.append('.parquet')
+    if np is not None:
+        formats.append('.npz')
+    return formats
+
+
+def open_data_writer(path: str, columns):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in data_formats():
+        raise ValueError(f"Unsupported export format '{ext}' (available: {', '.join(data_formats())})")
+    return {'.csv': CsvWriter, '.parquet': ParquetWriter, '.npz': NpzWriter}[ext](path, columns)
+
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+def _run(writer, batches, total: int, progress: Progress,
+         cancel: Optional[threading.Event]) -> List[str]:
+    done = 0
+    if progress:
+        progress(0, total)
+    try:
+        for batch in batches:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            done += writer.write(batch)
+            if progress:
+                progress(done, total)
+        return writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def export_sales_pdf(path: str, term: str = '', start: str = '', end: str = '',
+                     active: Optional[bool] = None, include_cost: bool = True,
+                     progress: Progress = None, cancel: Optional[threading.Event] = None,
+                     conn=None) -> List[str]:
+    headers = list(SALES_HEADERS)
+    widths = [8, 16, 14, 30, 8, 12, 14, 30, 22, 22, 8]
+    if not include_cost:
+        del headers[5], widths[5]
+
+    def convert(row):
+        row = list(row)
+        if not include_cost:
+            del row[5]
+        row[-1] = "Yes" if row[-1] else "No"
+        return row
+
+    writer = PdfTableWriter(path, f"Sales - {datetime.now():%Y-%m-%d %H:%M}", headers, widths)
+    with connection(conn) as c:
+        total = sales.count_sales(term, start, end, active, conn=c)
+        batches = sales.iter_sales(term, start, end, active, chunk=CHUNK, conn=c)
+        return _run(writer, (map(convert, b) for b in batches), total, progress, cancel)
+
+
+def export_products_pdf(path: str, term: str = '', progress: Progress = None,
+                        cancel: Optional[threading.Event] = None, conn=None) -> List[str]:
+    widths = [8, 16, 30, 40, 20, 12, 12, 10, 20, 10, 22, 22]
+    writer = PdfTableWriter(path, f"Products - {datetime.now():%Y-%m-%d %H:%M}", PRODUCT_HEADERS, widths)
+    with connection(conn) as c:
+        total = products.count_products(term, conn=c)
+        batches = products.iter_products(term, chunk=CHUNK, conn=c)
+        return _run(writer, batches, total, progress, cancel)
+
+
+def report_title(year: str, month: str = 'All') -> str:
+    return f"Sales Report for {year}" + (f"-{month}" if month != 'All' else "")
+
+
+def report_pdf_writer(path: str, title: str) -> PdfTableWriter:
+    return PdfTableWriter(path, title, REPORT_HEADERS, [70, 30, 30, 30], orientation='P', font_size=9)
+
+
+def report_pdf_row(row):
+    prod, qty, cost, total = row
+    return prod, qty or 0, f"{(cost or 0):.2f}", f"{(total or 0):.2f}"
+
+
+def cached_report_pdf(path: str, year: str, month: str, rows: Sequence[Sequence],
+                      progress: Progress = None, cancel: Optional[threading.Event] = None) -> List[str]:
+    # rows are product_summary rows; an identical earlier report is copied
+    # from the cache instead of being rendered again
+    rows = [report_pdf_row(row) for row in rows]
+
+    def render():
+        batches = (rows[i:i + CHUNK] for i in range(0, len(rows), CHUNK))
+        return _run(report_pdf_writer(path, report_title(year, month)), batches, len(rows),
+                    progress, cancel)
+
+    return report_cache.cached('sales_report_pdf', (year, month, ROWS_PER_FILE), rows,
+                               lambda n: volume_path(path, n), render)
+
+
+def export_report_pdf(path: str, year: str, month: str = 'All', progress: Progress = None,
+                      cancel: Optional[threading.Event] = None, conn=None) -> List[str]:
+    with connection(conn) as c:
+        engine = analytics.get_engine()
+        if engine is not None:
+            rows = engine.refresh(conn=c).product_summary(year, month)
+        else:
+            rows = reports.product_summary(year, month, conn=c)
+    return cached_report_pdf(path, year, month, rows, progress, cancel)
+
+
+def _sales_columns(batch, names, costs, prices, include_cost):
+    # raw sales rows + preloaded product name/cost/price -> output columns;
+    # cheaper than having SQLite join and materialise them for every row
+    ids, receipts, days, pids, qtys, notes, created, updated, active = zip(*batch)
+    product = list(map(names.get, pids))
+    total = [None if q is None or p is None else q * p for q, p in zip(qtys, map(prices.get, pids))]
+    columns = [ids, receipts, days, product, qtys]
+    if include_cost:
+        columns.append(list(map(costs.get, pids)))
+    return columns + [total, notes, created, updated, active]
+
+
+def _columns(batch):
+    return list(zip(*batch)) if batch else []
+
+
+def export_sales_data(path: str, term: str = '', start: str = '', end: str = '',
+                      active: Optional[bool] = None, include_cost: bool = True,
+                      progress: Progress = None, cancel: Optional[threading.Event] = None,
+                      conn=None) -> List[str]:
+    # raw values in id order (no sort over the whole table), for analysis tools
+    columns = [col for col in SALES_COLUMNS if include_cost or col[0] != 'cost']
+    writer = open_data_writer(path, columns)
+    with connection(conn) as c:
+        names, costs, prices = {}, {}, {}
+        for pid, name, cost, price in products.list_prices(conn=c):
+            names[pid], costs[pid], prices[pid] = name, cost, price
+        total = sales.count_sales(term, start, end, active, conn=c)
+        batches = sales.iter_sale_records(term, start, end, active, chunk=DATA_CHUNK, conn=c)
+        return _run(writer, (_sales_columns(b, names, costs, prices, include_cost) for b in batches),
+                    total, progress, cancel)
+
+
+def export_inventory_data(path: str, term: str = '', progress: Progress = None,
+                          cancel: Optional[threading.Event] = None, warehouse_id: Optional[int] = None,
+                          conn=None) -> List[str]:
+    writer = open_data_writer(path, INVENTORY_COLUMNS)
+    with connection(conn) as c:
+        total = inventory.count_inventory(term, warehouse_id, conn=c)
+        batches = inventory.iter_inventory(term, chunk=DATA_CHUNK, warehouse_id=warehouse_id, conn=c)
+        return _run(writer, map(_columns, batches), total, progress, cancel)
+
+
+def export_report_data(path: str, year: str, month: str = 'All', progress: Progress = None,
+                       cancel: Optional[threading.Event] = None, conn=None) -> List[str]:
+    writer = open_data_writer(path, REPORT_COLUMNS)
+    with connection(conn) as c:
+        batches = reports.iter_product_summary(year, month, chunk=DATA_CHUNK, conn=c)
+        return _run(writer, map(_columns, batches), 0, progress, cancel)
+
+
+class ExportJob(BackgroundJob):
+    @property
+    def paths(self) -> List[str]:
+        return self.result or []
@@ -0,0 +1,135 @@
+import math
+import os
+import threading
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional
+
+import analytics
+import database
+from repositories import connection, dashboard, products
+
+np = analytics.np
+
+# Reorder points from sales history instead of one fixed low-stock threshold.
+# Per product, over all products at once:
+#   level       exponentially weighted mean of the last RECENT_MONTHS whole months
+#   season      last year's same month against last year's average, shrunk
+#               towards the store-wide ratio for slow sellers
+#   daily       level * season / days per month
+#   reorder at  daily * lead time + SERVICE_Z * daily spread * sqrt(lead time)
+# The demand side only changes when sales data or the month does, so it is
+# cached per engine version and month; stock levels are re-read every call.
+
+LEAD_TIME_DAYS = float(os.environ.get('SIS_LEAD_TIME_DAYS', 7))
+REVIEW_DAYS = float(os.environ.get('SIS_REVIEW_DAYS', 30))
+SERVICE_Z = 1.65  # covers demand during the lead time ~95% of the time
+HISTORY_MONTHS = 24
+RECENT_MONTHS = 6
+SMOOTHING = 0.4
+SEASON_PRIOR = 50.0  # units sold last year at which a product's own pattern gets half the weight
+DAYS_PER_MONTH = 365.25 / 12
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class StockRisk(NamedTuple):
+    prod_id: int
+    sku: str
+    name: str
+    quantity: int
+    daily_demand: float
+    reorder_point: float
+    days_cover: Optional[float]
+    suggested_order: int
+
+
+def available() -> bool:
+    return analytics.available()
+
+
+def demand(history):
+    # history: (months, products) whole-month quantities, oldest first
+    # -> (daily demand, daily standard deviation) per product
+    recent = history[-RECENT_MONTHS:]
+    weights = (1 - SMOOTHING) ** np.arange(len(recent))[::-1]
+    level = weights @ recent / weights.sum()
+
+    last_year = history[-12:]
+    base = last_year.mean(axis=0)
+    same_month = history[-12]  # this calendar month, a year ago
+    own = np.divide(same_month, base, out=np.ones_like(base), where=base > 0)
+    store_base = base.sum()
+    store = same_month.sum() / store_base if store_base > 0 else 1.0
+    volume = last_year.sum(axis=0)
+    season = np.clip((volume * own + SEASON_PRIOR * store) / (volume + SEASON_PRIOR), 0.25, 4.0)
+
+    daily = level * season / DAYS_PER_MONTH
+    spread = last_year.std(axis=0) / math.sqrt(DAYS_PER_MONTH)
+    return daily, spread
+
+
+class Forecast:
+
+    def __init__(self, daily, spread, stock, lead_time=None, review=None):
+        lead_time = LEAD_TIME_DAYS if lead_time is None else lead_time
+        review = REVIEW_DAYS if review is None else review
+        ids, self.skus, self.names, qty, active = zip(*stock) if stock else ((), (), (), (), ())
+        self.ids = np.array(ids, dtype=np.int64)
+        self.quantity = np.array(qty, dtype=np.float64)
+        self.active = np.array(active, dtype=bool)
+
+        # products newer than the engine's product table have no history yet
+        known = self.ids < len(daily)
+        at = np.where(known, self.ids, 0)
+        self.daily = np.where(known, daily[at], 0.0)
+        self.spread = np.where(known, spread[at], 0.0)
+        self.reorder_point = self.daily * lead_time + SERVICE_Z * self.spread * math.sqrt(lead_time)
+        self.suggested = np.ceil(np.maximum(0.0, self.reorder_point + self.daily * review - self.quantity))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.days_cover = np.where(self.daily > 0, self.quantity / self.daily, np.inf)
+        below = (self.daily > 0) & (self.quantity <= self.reorder_point)
+        self.risk = self.active & ((self.quantity <= 0) | below)
+
+    def risk_count(self) -> int:
+        return int(self.risk.sum())
+
+    def at_risk(self, limit: Optional[int] = None) -> List[StockRisk]:
+        # most urgent first: out of stock, then fewest days of cover
+        idx = np.flatnonzero(self.risk)
+        idx = idx[np.lexsort((-self.daily[idx], np.minimum(self.days_cover[idx], 1e18)))]
+        if limit is not None:
+            idx = idx[:limit]
+        return [StockRisk(int(self.ids[i]), self.skus[i], self.names[i], int(self.quantity[i]),
+                          float(self.daily[i]), float(self.reorder_point[i]),
+                          None if math.isinf(self.days_cover[i]) else float(self.days_cover[i]),
+                          int(self.suggested[i]))
+                for i in idx.tolist()]
+
+
+def get_forecast(today: Optional[date] = None, conn=None) -> Optional[Forecast]:
+    # None without NumPy; callers fall back to a fixed threshold
+    engine = analytics.get_engine()
+    if engine is None:
+        return None
+    today = today or date.today()
+    with connection(conn) as c:
+        engine.refresh(conn=c)
+        stamp = (engine.version, today.year, today.month)
+        with _cache_lock:
+            cached = _cache.get(database.DB_NAME)
+            if cached is None or cached[0] != stamp:
+                history = engine.monthly_history(today.isoformat(), HISTORY_MONTHS)
+                cached = _cache[database.DB_NAME] = (stamp,) + demand(history)
+        stock = products.stock_levels(conn=c)
+    return Forecast(cached[1], cached[2], stock)
+
+
+def reorder_needs(conn=None) -> Dict[int, int]:
+    # prod_id -> units to order for everything at or below its reorder point;
+    # without NumPy, tops products at the fixed threshold up to twice that
+    forecast = get_forecast(conn=conn)
+    if forecast is not None:
+        return {r.prod_id: r.suggested_order for r in forecast.at_risk() if r.suggested_order > 0}
+    return {pid: 2 * dashboard.LOW_STOCK_THRESHOLD - (qty or 0)
+            for pid, _, _, qty in dashboard.low_stock(dashboard.LOW_STOCK_THRESHOLD, conn=conn)}
@@ -0,0 +1,43 @@
+import os
+from tkinter import filedialog
+
+from ttkbootstrap.toast import ToastNotification
+
+import importer
+from export_dialog import JobDialog
+
+
+def ask_import_path(parent) -> str:
+    return filedialog.askopenfilename(
+        parent=parent, title="Import CSV", filetypes=[("CSV", "*.csv"), ("All files", "*.*")]
+    )
+
+
+class ImportDialog(JobDialog):
+    verb = "Importing"
+
+    def __init__(self, master, table, path, on_done=None, **options):
+        self.path = path
+        self.on_done = on_done
+        super().__init__(master, f"Import {table.title()}", importer.import_csv, table, path, **options)
+
+    def finished(self, job):
+        if job.cancelled:
+            ToastNotification("Import", "Import cancelled, nothing was saved").show_toast()
+            return
+        if job.error is not None:
+            ToastNotification("Import", f"Import failed: {job.error}").show_toast()
+            return
+
+        result = job.result
+        message = f"{result.inserted:,} added, {result.updated:,} updated"
+        if result.error_count:
+            errors_path = os.path.splitext(self.path)[0] + '.errors.csv'
+            importer.write_errors(result, errors_path)
+            if result.committed:
+                message += f", {result.skipped:,} skipped (see {errors_path})"
+            else:
+                message = f"{result.error_count:,} invalid rows, nothing imported (see {errors_path})"
+        ToastNotification("Import", message).show_toast()
+        if result.committed and self.on_done:
+            self.on_done()
@@ -0,0 +1,482 @@
+import csv
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Callable, List, NamedTuple, Optional
+
+from jobs import Cancelled
+from repositories import connection, now, purchasing, stock
+
+# Bulk CSV import for products, sales and expenses. Rows are streamed from the
+# file in batches, validated a column at a time against lookups loaded once up
+# front, and written with executemany inside a single savepoint, so a file
+# either lands completely or not at all (unless invalid rows are skipped).
+
+BATCH = 20000
+MAX_ERRORS = 1000
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class ImportResult(NamedTuple):
+    table: str
+    rows: int
+    inserted: int
+    updated: int
+    skipped: int
+    committed: bool
+    errors: List[tuple]  # (line number, message), first MAX_ERRORS only
+    error_count: int
+
+
+class Field(NamedTuple):
+    name: str
+    aliases: tuple
+    parse: Callable
+    required: bool = True
+    default: object = None
+
+
+def _key(header: str) -> str:
+    return header.strip().lower().replace(' ', '_')
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"'{value}' is not a whole number")
+        return int(number)
+
+
+def _amount(value):
+    number = float(value.replace(',', ''))
+    if number < 0:
+        raise ValueError("must not be negative")
+    return number
+
+
+_days = {}
+
+
+def _day(value):
+    day = _days.get(value)
+    if day is None:
+        try:
+            day = date.fromisoformat(value[:10]).isoformat()
+        except ValueError:
+            raise ValueError(f"'{value}' is not a YYYY-MM-DD date")
+        if len(_days) < 100000:
+            _days[value] = day
+    return day
+
+
+_FLAGS = {'1': 1, 'yes': 1, 'y': 1, 'true': 1, 'active': 1,
+          '0': 0, 'no': 0, 'n': 0, 'false': 0, 'inactive': 0}
+
+
+def _flag(value):
+    try:
+        return _FLAGS[value.lower()]
+    except KeyError:
+        raise ValueError(f"'{value}' is not Yes/No")
+
+
+def _text(value):
+    return value
+
+
+class Lookup:
+    # name -> id map loaded once; unknown names either fail validation or,
+    # with create_missing, are collected and inserted before the rows.
+
+    def __init__(self, label, rows, create_sql=None):
+        self.label = label
+        self.ids = {name: id_ for id_, name in rows}
+        self.create_sql = create_sql
+        self.pending = set()
+
+    def parse(self, value):
+        id_ = self.ids.get(value)
+        if id_ is not None:
+            return id_
+        if self.create_sql is None:
+            raise ValueError(f"unknown {self.label} '{value}'")
+        self.pending.add(value)
+        return value
+
+    def create_pending(self, c, table):
+        if not self.pending:
+            return
+        names = sorted(self.pending)
+        c.executemany(self.create_sql, [(name,) for name in names])
+        marks = ','.join('?' * len(names))
+        for id_, name in c.execute(f"SELECT id, name FROM {table} WHERE name IN ({marks})", names):
+            self.ids[name] = id_
+        self.pending.clear()
+
+    def resolve(self, values):
+        ids = self.ids
+        return [ids.get(v, v) if isinstance(v, str) else v for v in values]
+
+
+class _Import(ABC):
+    table = ''
+    fields: List[Field] = []
+
+    def __init__(self, c, create_missing, update_existing):
+        self.c = c
+        self.create_missing = create_missing
+        self.update_existing = update_existing
+        self.inserted = 0
+        self.updated = 0
+        self.stamp = now()
+
+    def bind(self, header):
+        keys = [_key(h) for h in header]
+        self.positions = []
+        missing = []
+        for field in self.fields:
+            pos = next((keys.index(k) for k in (field.name,) + field.aliases if k in keys), None)
+            if pos is None and field.required:
+                missing.append(field.name)
+            self.positions.append((field, pos))
+        return missing
+
+    def validate(self, batch):
+        # column at a time: one pass per field over the whole batch
+        bad = {}
+        columns = {}
+        for field, pos in self.positions:
+            parse = field.parse
+            out = []
+            append = out.append
+            for i, (_, cells) in enumerate(batch):
+                value = cells[pos].strip() if pos is not None and pos < len(cells) else ''
+                if not value:
+                    if field.required and i not in bad:
+                        bad[i] = f"{field.name} is required"
+                    append(field.default)
+                    continue
+                try:
+                    append(parse(value))
+                except ValueError as e:
+                    if i not in bad:
+                        bad[i] = f"{field.name}: {e}"
+                    append(None)
+            columns[field.name] = out
+        self.check(columns, bad)
+        return columns, bad
+
+    def check(self, columns, bad):
+        pass
+
+    @abstractmethod
+    def write(self, columns, keep):
+        # inserts or updates the rows at the indexes in keep
+        pass
+
+    def finish(self):
+        pass
+
+
+class ProductImport(_Import):
+    table = 'products'
+
+    def __init__(self, c, create_missing, update_existing):
+        super().__init__(c, create_missing, update_existing)
+        self.categories = Lookup('category', c.execute('SELECT id, name FROM categories'),
+                                 'INSERT INTO categories (name) VALUES (?)' if create_missing else None)
+        self.warehouses = Lookup(
+            'warehouse', c.execute('SELECT id, name FROM warehouses'),
+            "INSERT INTO warehouses (name, location, capacity) VALUES (?, '', 0)" if create_missing else None
+        )
+        self.skus = {}
+        self.quantities = {}
+        for sku, id_, qty in c.execute('SELECT sku, id, quantity FROM products'):
+            self.skus[sku] = id_
+            self.quantities[id_] = qty or 0
+        self.last_id = c.execute('SELECT COALESCE(MAX(id), 0) FROM products').fetchone()[0]
+        self.adjustments = []
+        self.seen = set()
+        self.fields = [
+            Field('sku', (), _text),
+            Field('name', (), _text),
+            Field('description', (), _text, False, ''),
+            Field('category', (), self.categories.parse),
+            Field('cost_price', ('cost',), _amount),
+            Field('price', ('sale_price',), _amount),
+            Field('quantity', ('qty',), _integer),
+            Field('warehouse', (), self.warehouses.parse),
+            Field('is_active', ('active',), _flag, False, 1),
+        ]
+
+    def check(self, columns, bad):
+        for i, sku in enumerate(columns['sku']):
+            if sku is None or i in bad:
+                continue
+            if sku in self.seen:
+                bad[i] = f"sku '{sku}' appears more than once in the file"
+            elif sku in self.skus and not self.update_existing:
+                bad[i] = f"sku '{sku}' already exists"
+            else:
+                self.seen.add(sku)
+
+    def write(self, columns, keep):
+        self.categories.create_pending(self.c, 'categories')
+        self.warehouses.create_pending(self.c, 'warehouses')
+        cats = self.categories.resolve(columns['category'])
+        whs = self.warehouses.resolve(columns['warehouse'])
+        stamp = self.stamp
+        new, changed = [], []
+        for i in keep:
+            sku = columns['sku'][i]
+            values = (columns['name'][i], columns['description'][i], cats[i], columns['cost_price'][i],
+                      columns['price'][i], columns['quantity'][i], whs[i], columns['is_active'][i], stamp)
+            if sku in self.skus:
+                pid = self.skus[sku]
+                changed.append(values + (pid,))
+                self.adjustments.append(stock.Movement(
+                    pid, stock.today(), columns['quantity'][i] - self.quantities[pid], 'adjustment',
+                    'products', pid, 'imported'))
+            else:
+                new.append((sku,) + values + (stamp,))
+        self.c.executemany(
+            'INSERT INTO products (sku, name, description, category_id, cost_price, price, quantity, '
+            'warehouse_id, is_active, updated_at, created_at) VALUES (?,?,?,?,?,?,?,?,?,?,?)', new
+        )
+        self.c.executemany(
+            'UPDATE products SET name=?, description=?, category_id=?, cost_price=?, price=?, quantity=?, '
+            'warehouse_id=?, is_active=?, updated_at=? WHERE id=?', changed
+        )
+        self.inserted += len(new)
+        self.updated += len(changed)
+
+    def finish(self):
+        stock.record(self.c, self.adjustments)
+        stock.record_select(self.c, "SELECT id, ?, quantity, 'opening', 'products', id, 'imported' "
+                                    "FROM products WHERE id > ?", (stock.today(), self.last_id))
+
+
+class ProductMatcher:
+    # products are matched by sku first, then by name (when unambiguous), then by id
+
+    def __init__(self, c):
+        self.by_sku = {}
+        self.by_name = {}
+        self.ids = set()
+        for id_, sku, name in c.execute('SELECT id, sku, name FROM products'):
+            self.by_sku[sku] = id_
+            self.by_name[name] = None if name in self.by_name else id_
+            self.ids.add(id_)
+
+    def parse(self, value):
+        id_ = self.by_sku.get(value)
+        if id_ is None:
+            id_ = self.by_name.get(value)
+            if id_ is None and value in self.by_name:
+                raise ValueError(f"product name '{value}' is ambiguous, use the sku")
+        if id_ is None and value.isdigit() and int(value) in self.ids:
+            id_ = int(value)
+        if id_ is None:
+            raise ValueError(f"unknown product '{value}'")
+        return id_
+
+
+class SalesImport(_Import):
+    table = 'sales'
+
+    def __init__(self, c, create_missing, update_existing):
+        super().__init__(c, create_missing, update_existing)
+        self.sold = {}
+        self.last_id = c.execute('SELECT COALESCE(MAX(id), 0) FROM sales').fetchone()[0]
+        self.fields = [
+            Field('date', (), _day),
+            Field('product', ('sku', 'prod_id', 'product_id', 'product_name'), ProductMatcher(c).parse),
+            Field('qty', ('quantity',), _integer),
+            Field('receipt_no', ('receipt',), _text, False, ''),
+            Field('notes', (), _text, False, ''),
+            Field('is_active', ('active',), _flag, False, 1),
+        ]
+
+    def write(self, columns, keep):
+        stamp = self.stamp
+        date_, prod, qty = columns['date'], columns['product'], columns['qty']
+        receipt, notes, active = columns['receipt_no'], columns['notes'], columns['is_active']
+        rows = [(receipt[i], date_[i], prod[i], qty[i], notes[i], stamp, stamp, active[i]) for i in keep]
+        self.c.executemany(
+            'INSERT INTO sales (receipt_no, date, prod_id, qty, notes, created_at, updated_at, is_active) '
+            'VALUES (?,?,?,?,?,?,?,?)', rows
+        )
+        sold = self.sold
+        for i in keep:
+            sold[prod[i]] = sold.get(prod[i], 0) + qty[i]
+        self.inserted += len(rows)
+
+    def finish(self):
+        # one stock update per product for the whole file instead of one per sale
+        self.c.executemany(
+            'UPDATE products SET quantity = quantity - ?, updated_at = ? WHERE id = ?',
+            [(qty, self.stamp, pid) for pid, qty in self.sold.items()]
+        )
+        stock.record_select(self.c, "SELECT prod_id, date, -qty, 'sale', 'sales', id, 'imported' "
+                                    "FROM sales WHERE id > ?", (self.last_id,))
+
+
+class ExpenseImport(_Import):
+    table = 'expenses'
+
+    def __init__(self, c, create_missing, update_existing):
+        super().__init__(c, create_missing, update_existing)
+        self.departments = Lookup('department', c.execute('SELECT id, name FROM departments'),
+                                  'INSERT INTO departments (name) VALUES (?)' if create_missing else None)
+        self.fields = [
+            Field('date', (), _day),
+            Field('department', (), self.departments.parse),
+            Field('description', (), _text),
+            Field('amount', (), _amount),
+            Field('is_active', ('active',), _flag, False, 1),
+        ]
+
+    def write(self, columns, keep):
+        self.departments.create_pending(self.c, 'departments')
+        depts = self.departments.resolve(columns['department'])
+        stamp = self.stamp
+        rows = [(columns['date'][i], depts[i], columns['description'][i], columns['amount'][i],
+                 stamp, stamp, columns['is_active'][i]) for i in keep]
+        self.c.executemany(
+            'INSERT INTO expenses (date, department_id, description, amount, created_at, updated_at, '
+            'is_active) VALUES (?,?,?,?,?,?,?)', rows
+        )
+        self.inserted += len(rows)
+
+
+class SupplierPriceImport(_Import):
+    # supplier price lists; an existing (supplier, product) price is replaced
+    table = 'supplier_products'
+
+    def __init__(self, c, create_missing, update_existing):
+        super().__init__(c, create_missing, update_existing)
+        self.suppliers = Lookup('supplier', c.execute('SELECT id, name FROM suppliers'))
+        self.fields = [
+            Field('supplier', (), self.suppliers.parse),
+            Field('product', ('sku', 'prod_id', 'product_id', 'product_name'), ProductMatcher(c).parse),
+            Field('unit_cost', ('cost', 'cost_price', 'price'), _amount),
+            Field('supplier_sku', (), _text, False, ''),
+            Field('lead_time_days', ('lead_time',), _integer, False, None),
+            Field('min_order_qty', ('moq', 'minimum'), _integer, False, 1),
+            Field('is_preferred', ('preferred',), _flag, False, 0),
+        ]
+
+    def write(self, columns, keep):
+        names = ('supplier', 'product', 'supplier_sku', 'unit_cost', 'lead_time_days',
+                 'min_order_qty', 'is_preferred')
+        self.inserted += purchasing.save_prices(
+            ([columns[name][i] for name in names] for i in keep), conn=self.c
+        )
+
+
+IMPORTS = {'products': ProductImport, 'sales': SalesImport, 'expenses': ExpenseImport,
+           'prices': SupplierPriceImport}
+
+
+def count_rows(path: str) -> int:
+    # data lines for the progress bar (quoted newlines make this an estimate)
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def _deferrable_indexes(c, table):
+    # plain secondary indexes can be rebuilt in one pass after the load;
+    # UNIQUE ones stay because they enforce constraints during the insert
+    return [(name, sql) for name, sql in c.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+        (table,)
+    ) if 'UNIQUE' not in sql.upper()]
+
+
+def _batches(reader, size):
+    # (line number, cells) lists; line_num accounts for quoted newlines
+    pending = []
+    for cells in reader:
+        if cells:
+            pending.append((reader.line_num, cells))
+            if len(pending) >= size:
+                yield pending
+                pending = []
+    if pending:
+        yield pending
+
+
+def import_csv(table: str, path: str, skip_invalid: bool = False, create_missing: bool = False,
+               update_existing: bool = False, defer_indexes: Optional[bool] = None,
+               batch: int = BATCH, progress: Progress = None,
+               cancel: Optional[threading.Event] = None, conn=None) -> ImportResult:
+    total = count_rows(path)
+    rows = skipped = error_count = 0
+    errors = []
+    with connection(conn) as c, open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{path} is empty")
+
+        c.execute('SAVEPOINT bulk_import')
+        try:
+            job = IMPORTS[table](c, create_missing, update_existing)
+            missing = job.bind(header)
+            if missing:
+                raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+            deferred = []
+            if defer_indexes or (defer_indexes is None and
+                                 total > c.execute(f"SELECT COUNT(*) FROM {job.table}").fetchone()[0]):
+                deferred = _deferrable_indexes(c, job.table)
+                for name, _ in deferred:
+                    c.execute(f"DROP INDEX {name}")
+
+            if progress:
+                progress(0, total)
+            for pending in _batches(reader, batch):
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled()
+                columns, bad = job.validate(pending)
+                for i, message in sorted(bad.items()):
+                    error_count += 1
+                    if len(errors) < MAX_ERRORS:
+                        errors.append((pending[i][0], message))
+                if skip_invalid or not error_count:
+                    job.write(columns, [i for i in range(len(pending)) if i not in bad])
+                rows += len(pending)
+                skipped += len(bad)
+                if progress:
+                    progress(rows, total)
+
+            committed = skip_invalid or not error_count
+            if committed:
+                job.finish()
+                for _, sql in deferred:
+                    c.execute(sql)
+                c.execute('RELEASE bulk_import')
+            else:
+                c.execute('ROLLBACK TO bulk_import')
+                c.execute('RELEASE bulk_import')
+        except BaseException:
+            c.execute('ROLLBACK TO bulk_import')
+            c.execute('RELEASE bulk_import')
+            raise
+
+    return ImportResult(table, rows, job.inserted if committed else 0, job.updated if committed else 0,
+                        skipped if committed else rows, committed, errors, error_count)
+
+
+def write_errors(result: ImportResult, path: str) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        out = csv.writer(f)
+        out.writerow(['line', 'error'])
+        out.writerows(result.errors)
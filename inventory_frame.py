@@ -1,7 +1,13 @@
-import sqlite3
 import ttkbootstrap as tb
-from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar
-from database import get_connection
+from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
+import exports
+from export_dialog import ExportDialog, ask_data_path
+import api_client
+
+inventory = api_client.backend('inventory')
+warehouses = api_client.backend('warehouses')
+
+ALL_WAREHOUSES = "All warehouses"
 
 class InventoryFrame(Frame):
     def __init__(self, master):
@@ -14,7 +20,12 @@ class InventoryFrame(Frame):
         search_entry = Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side='left', fill='x', expand=True, padx=(5,0))
         search_entry.bind("<KeyRelease>", lambda e: self.load_inventory())
+        self.warehouse_var = tb.StringVar(value=ALL_WAREHOUSES)
+        self.warehouse_cb = Combobox(search_frame, textvariable=self.warehouse_var, state='readonly', width=20)
+        self.warehouse_cb.pack(side='left', padx=5)
+        self.warehouse_cb.bind("<<ComboboxSelected>>", lambda e: self.load_inventory())
         Button(search_frame, text="Refresh", bootstyle="info", command=self.load_inventory).pack(side='left', padx=5)
+        Button(search_frame, text="Export Data", bootstyle="success", command=self.export_data).pack(side='left')
         search_frame.pack(fill='x', pady=5)
 
         table_frame = Frame(self)
@@ -32,23 +43,42 @@ class InventoryFrame(Frame):
         h_scroll.grid(row=1, column=0, sticky='ew')
         table_frame.rowconfigure(0, weight=1)
         table_frame.columnconfigure(0, weight=1)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.load_locations())
+
+        Label(self, text="Stock by warehouse").pack(anchor='w')
+        cols = ("Warehouse", "Qty")
+        self.locations = Treeview(self, columns=cols, show='headings', bootstyle="info", height=4)
+        for c in cols:
+            self.locations.heading(c, text=c)
+            self.locations.column(c, anchor='center')
+        self.locations.pack(fill='x', pady=5)
 
         self.load_inventory()
 
+    def _warehouse_id(self):
+        name = self.warehouse_var.get()
+        return None if name == ALL_WAREHOUSES else warehouses.warehouse_id(name)
+
     def load_inventory(self):
-        term = f"%{self.search_var.get().strip()}%"
         for r in self.tree.get_children():
             self.tree.delete(r)
+        self.warehouse_cb['values'] = [ALL_WAREHOUSES] + warehouses.active_names()
+
+        for row in inventory.list_inventory(self.search_var.get().strip(), self._warehouse_id()):
+            self.tree.insert('', 'end', values=tuple(row))
+        self.load_locations()
+
+    def load_locations(self):
+        for r in self.locations.get_children():
+            self.locations.delete(r)
+        sel = self.tree.selection()
+        if not sel:
+            return
+        for loc in warehouses.product_locations(int(self.tree.item(sel[0])['values'][0])):
+            self.locations.insert('', 'end', values=(loc.warehouse, loc.qty))
 
-        query = """
-            SELECT p.id, p.name, c.name AS category, p.price, p.quantity,
-                   IFNULL((SELECT SUM(d.qty) FROM damage_products d WHERE d.prod_id = p.id), 0) AS damaged,
-                   IFNULL((SELECT SUM(s.qty) FROM sales s WHERE s.prod_id = p.id), 0) AS sold
-            FROM products p
-            LEFT JOIN categories c ON p.category_id = c.id
-            WHERE p.name LIKE ?
-            ORDER BY p.id
-        """
-        with get_connection() as conn:
-            for row in conn.execute(query, (term,)):
-                self.tree.insert('', 'end', values=row)
+    def export_data(self):
+        path = ask_data_path(self, "inventory")
+        if path:
+            ExportDialog(self, "Export Inventory", exports.export_inventory_data, path,
+                         term=self.search_var.get(), warehouse_id=self._warehouse_id())
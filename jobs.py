@@ -0,0 +1,40 @@
+import threading
+from typing import Any, Callable, Optional
+
+
+class Cancelled(Exception):
+    pass
+
+
+class BackgroundJob(threading.Thread):
+    # Runs func(*args, progress=..., cancel=..., **kwargs) off the UI thread.
+    # The UI polls done/total and the outcome fields (Tk widgets must only be
+    # touched from the main loop) and may call cancel(); func is expected to
+    # check the event between batches and raise Cancelled.
+
+    def __init__(self, func: Callable[..., Any], *args, **kwargs):
+        super().__init__(daemon=True)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+        self.done = 0
+        self.total = 0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+    def _progress(self, done, total):
+        self.done, self.total = done, total
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args, progress=self._progress,
+                                    cancel=self.cancel_event, **self.kwargs)
+        except Cancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        self.cancel_event.set()
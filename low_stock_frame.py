@@ -0,0 +1,62 @@
+from ttkbootstrap import Frame, Label, Button, Treeview, Scrollbar
+
+import forecasting
+from repositories import dashboard
+
+MAX_ROWS = 5000
+
+
+class LowStockFrame(Frame):
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        Label(self, text="Low Stock", font=("Helvetica", 16, "bold")).pack(pady=(0, 10))
+
+        bar = Frame(self)
+        self.summary = Label(bar, text="")
+        self.summary.pack(side='left')
+        Button(bar, text="Refresh", bootstyle="info", command=self.load).pack(side='right')
+        bar.pack(fill='x', pady=5)
+
+        table_frame = Frame(self)
+        table_frame.pack(fill='both', expand=True, pady=5)
+        cols = ("ID", "SKU", "Product", "On Hand", "Daily Demand", "Reorder Point",
+                "Days Cover", "Suggested Order")
+        self.tree = Treeview(table_frame, columns=cols, show='headings', bootstyle="danger")
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, anchor='center')
+        v_scroll = Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
+        h_scroll = Scrollbar(table_frame, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        v_scroll.grid(row=0, column=1, sticky='ns')
+        h_scroll.grid(row=1, column=0, sticky='ew')
+        table_frame.rowconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+
+        self.load()
+
+    def load(self):
+        for r in self.tree.get_children():
+            self.tree.delete(r)
+
+        forecast = forecasting.get_forecast()
+        if forecast is None:
+            rows = dashboard.low_stock(dashboard.LOW_STOCK_THRESHOLD)
+            for pid, sku, name, qty in rows[:MAX_ROWS]:
+                self.tree.insert('', 'end', values=(pid, sku, name, qty, '', '', '', ''))
+            self.summary.config(text=f"{len(rows):,} products at or below {dashboard.LOW_STOCK_THRESHOLD} in stock")
+            return
+
+        count = forecast.risk_count()
+        for r in forecast.at_risk(MAX_ROWS):
+            cover = '' if r.days_cover is None else f"{r.days_cover:.1f}"
+            self.tree.insert('', 'end', values=(
+                r.prod_id, r.sku, r.name, r.quantity, f"{r.daily_demand:.2f}",
+                f"{r.reorder_point:.0f}", cover, r.suggested_order
+            ))
+        shown = f" (showing {MAX_ROWS:,} most urgent)" if count > MAX_ROWS else ""
+        self.summary.config(
+            text=f"{count:,} products at or below their reorder point{shown}; "
+                 f"lead time {forecasting.LEAD_TIME_DAYS:g} days"
+        )
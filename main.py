@@ -1,5 +1,11 @@
+import time
+
 import ttkbootstrap as tb
 from ttkbootstrap import Frame
+
+import api_client
+import maintenance
+from jobs import BackgroundJob
 from login_frame import LoginFrame
 from register_frame import RegisterFrame
 from menu_frame import MenuFrame
@@ -15,8 +21,14 @@ from sales_frame import SalesFrame
 from damage_products_frame import DamageProductsFrame
 from warehouse_frame import WarehouseFrame
 from dashboard_frame import DashboardFrame
+from low_stock_frame import LowStockFrame
+from purchase_orders_frame import PurchaseOrdersFrame
+from budget_frame import BudgetFrame
+from chain_frame import ChainFrame
 
 class App:
+    MAINTENANCE_POLL_MS = 30000
+
     def __init__(self):
         style = tb.Style(theme='flatly')
         self.root = style.master
@@ -27,8 +39,26 @@ class App:
             self.root.attributes('-fullscreen', True) 
         self.container = Frame(self.root)
         self.container.pack(fill='both', expand=True)
+        self.last_input = time.monotonic()
+        self.maintenance_job = None
+        self.root.bind_all('<Any-KeyPress>', self._touch, add='+')
+        self.root.bind_all('<Any-ButtonPress>', self._touch, add='+')
+        self.root.after(self.MAINTENANCE_POLL_MS, self._maintain)
         self._show_login()
 
+    def _touch(self, event=None):
+        self.last_input = time.monotonic()
+
+    def _maintain(self):
+        # a bounded ANALYZE / incremental vacuum step while nobody is using
+        # the app; in thin-client mode the API server does its own
+        idle = time.monotonic() - self.last_input >= maintenance.IDLE_SECONDS
+        busy = self.maintenance_job is not None and self.maintenance_job.is_alive()
+        if idle and not busy and not api_client.remote():
+            self.maintenance_job = BackgroundJob(maintenance.idle_step)
+            self.maintenance_job.start()
+        self.root.after(self.MAINTENANCE_POLL_MS, self._maintain)
+
     def _clear(self):
         for w in self.container.winfo_children():
             w.destroy()
@@ -63,9 +93,13 @@ class App:
             'products':       self._show_products,
             'department':     self._show_department,
             'suppliers':      self._show_suppliers,
+            'purchaseOrders': self._show_purchase_orders,
             'expenses':       self._show_expenses,
+            'budgets':        self._show_budgets,
+            'chain':          self._show_chain,
             'debtTracker':    self._show_debt_tracker,
             'inventory':      self._show_inventory,
+            'lowStock':       self._show_low_stock,
             'sales':          self._show_sales,
             'damageProduct':  self._show_damage_product,
             'warehouse':      self._show_warehouse,
@@ -88,6 +122,9 @@ class App:
     def _show_inventory(self):
         self._swap_content(InventoryFrame)
 
+    def _show_low_stock(self):
+        self._swap_content(LowStockFrame)
+
     def _show_sales(self):
         self._swap_content(SalesFrame, current_user_role=self.current_user_role)
 
@@ -106,9 +143,18 @@ class App:
     def _show_suppliers(self):
         self._swap_content(SuppliersFrame)
 
+    def _show_purchase_orders(self):
+        self._swap_content(PurchaseOrdersFrame)
+
     def _show_expenses(self):
         self._swap_content(ExpensesFrame)
 
+    def _show_budgets(self):
+        self._swap_content(BudgetFrame)
+
+    def _show_chain(self):
+        self._swap_content(ChainFrame)
+
     def _show_debt_tracker(self):
         self._swap_content(DebtTrackerFrame)
 
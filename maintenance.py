@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+
+from jobs import Cancelled
+from repositories import connection, dashboard, now, products, reports, sales
+
+# Keeps the planner statistics fresh and hands free pages back to the file
+# system. PRAGMA optimize runs whenever a connection closes (database.py);
+# on top of that a full ANALYZE runs every ANALYZE_EVERY_HOURS, and the free
+# pages left by deletes and archiving are released VACUUM_PAGES at a time
+# with PRAGMA incremental_vacuum (migrate_maintenance.py puts the file in
+# auto_vacuum=INCREMENTAL mode). The app and the API server call idle_step()
+# when nobody has used them for a while, so each step is short. Every task
+# is logged, with the file size and the time of a few representative
+# queries before and after, in maintenance_log and on the
+# sales_inventory.maintenance logger.
+
+ANALYZE_EVERY_HOURS = float(os.environ.get('SIS_ANALYZE_HOURS', 24))
+VACUUM_PAGES = 512
+IDLE_SECONDS = 120
+
+log = logging.getLogger('sales_inventory.maintenance')
+
+Progress = Optional[Callable[[int, int], None]]
+
+# what the screens run most; timed before and after each task
+PROBES = [
+    ('dashboard totals', lambda c: (dashboard.total_sales(conn=c), dashboard.low_stock_count(5, conn=c))),
+    ('sales by category', lambda c: dashboard.sales_by_category(conn=c)),
+    ('sales search', lambda c: sales.count_sales('a', conn=c)),
+    ('product search', lambda c: products.count_products('a', conn=c)),
+    ('report summary', lambda c: reports.product_summary(datetime.now().strftime('%Y'), conn=c)),
+]
+
+
+class MaintenanceResult(NamedTuple):
+    task: str
+    started_at: str
+    seconds: float
+    size_before: int
+    size_after: int
+    free_before: int          # pages on the freelist
+    free_after: int
+    probe_ms_before: Optional[float]
+    probe_ms_after: Optional[float]
+
+    @property
+    def reclaimed(self) -> int:
+        return self.size_before - self.size_after
+
+
+def file_size(c: sqlite3.Connection):
+    # (bytes, free pages) of the main database
+    pages, page_size, free = (c.execute(f'PRAGMA {p}').fetchone()[0]
+                              for p in ('page_count', 'page_size', 'freelist_count'))
+    return pages * page_size, free
+
+
+def probe(c: sqlite3.Connection, repeat: int = 3) -> float:
+    # best-of-repeat milliseconds of the PROBES together
+    total = 0.0
+    for _, query in PROBES:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query(c)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        total += best
+    return total * 1000.0
+
+
+def _run(c: sqlite3.Connection, task: str, work: Callable[[], None], timed: bool) -> MaintenanceResult:
+    started = now()
+    size_before, free_before = file_size(c)
+    probe_before = probe(c) if timed else None
+    start = time.perf_counter()
+    work()
+    seconds = time.perf_counter() - start
+    size_after, free_after = file_size(c)
+    probe_after = probe(c) if timed else None
+    result = MaintenanceResult(task, started, seconds, size_before, size_after, free_before, free_after,
+                               probe_before, probe_after)
+    _record(c, result)
+    return result
+
+
+def _record(c: sqlite3.Connection, r: MaintenanceResult) -> None:
+    timing = (f", queries {r.probe_ms_before:.1f} -> {r.probe_ms_after:.1f} ms"
+              if r.probe_ms_before is not None else '')
+    log.info("%s in %.2f s: %s -> %s bytes, %d -> %d free pages%s", r.task, r.seconds,
+             f"{r.size_before:,}", f"{r.size_after:,}", r.free_before, r.free_after, timing)
+    try:
+        with c:
+            c.execute('INSERT INTO maintenance_log (task, started_at, seconds, size_before, size_after, '
+                      'free_before, free_after, probe_ms_before, probe_ms_after) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', r)
+    except sqlite3.OperationalError:
+        # not migrated yet; the logger still has it
+        pass
+
+
+def last_run(task: str, conn=None) -> Optional[str]:
+    with connection(conn) as c:
+        try:
+            return c.execute('SELECT MAX(started_at) FROM maintenance_log WHERE task = ?', (task,)).fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+
+
+def analyze_due(conn=None, hours: float = ANALYZE_EVERY_HOURS) -> bool:
+    last = last_run('analyze', conn)
+    return last is None or last < (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def analyze(conn=None, timed: bool = True) -> MaintenanceResult:
+    # full statistics for every table and index, then the planner reloads them
+    with connection(conn) as c:
+        return _run(c, 'analyze', lambda: (c.execute('ANALYZE'), c.commit()), timed)
+
+
+def incremental_vacuum(conn=None, pages: int = VACUUM_PAGES, timed: bool = False) -> Optional[MaintenanceResult]:
+    # releases at most `pages` free pages (0: all of them); None when there is
+    # nothing to do or the file is not in incremental mode
+    with connection(conn) as c:
+        if c.execute('PRAGMA auto_vacuum').fetchone()[0] != 2 or not file_size(c)[1]:
+            return None
+        # the pragma frees one page per step and execute() stops after the
+        # first, as it returns no columns; executescript() steps to the end
+        return _run(c, f'incremental_vacuum({pages})',
+                    lambda: c.executescript(f'PRAGMA incremental_vacuum({int(pages)});'), timed)
+
+
+def idle_step(conn=None, progress: Progress = None,
+              cancel: Optional[threading.Event] = None) -> List[MaintenanceResult]:
+    # one bounded round for idle time: ANALYZE when due, then one vacuum step
+    done = []
+    with connection(conn) as c:
+        try:
+            if analyze_due(c):
+                done.append(analyze(c))
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            step = incremental_vacuum(c)
+            if step is not None:
+                done.append(step)
+        except sqlite3.OperationalError as e:
+            # someone started writing; try again at the next idle spell
+            log.info("maintenance postponed: %s", e)
+    return done
+
+
+def run_all(vacuum: bool = False, progress: Progress = None,
+            cancel: Optional[threading.Event] = None) -> List[MaintenanceResult]:
+    # cli.py maintain: ANALYZE now, then release every free page (or VACUUM,
+    # which also defragments, but rewrites the whole file)
+    done = []
+    with connection() as c:
+        done.append(analyze(c))
+        if progress:
+            progress(1, 2)
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        if vacuum:
+            c.commit()
+            done.append(_run(c, 'vacuum', lambda: c.execute('VACUUM'), True))
+        else:
+            step = incremental_vacuum(c, pages=0, timed=True)
+            if step is not None:
+                done.append(step)
+            elif file_size(c)[1]:
+                log.info("%d free pages kept: the file is not in incremental vacuum mode", file_size(c)[1])
+        if progress:
+            progress(2, 2)
+    return done
@@ -30,11 +30,15 @@ class MenuFrame(Frame):
             ("Dashboard",      callbacks['dashboard']),
             ("Sales",          callbacks['sales']),
             ("Expenses",       callbacks['expenses']),
+            ("Budgets",        callbacks['budgets']),
             ("Inventory",      callbacks['inventory']),
+            ("Low Stock",      callbacks['lowStock']),
             ("Damage Product", callbacks['damageProduct']),
             ("Debt Tracker",   callbacks['debtTracker']),
             ("Products",       callbacks['products']),
             ("Suppliers",      callbacks['suppliers']),
+            ("Purchase Orders", callbacks['purchaseOrders']),
+            ("Chain Overview", callbacks['chain']),
             ("Users",          callbacks['users']),
         ]
         for text, cmd in menu_items:
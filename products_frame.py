@@ -1,11 +1,16 @@
 import sqlite3
-from datetime import datetime
 import os
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Combobox, StringVar
 from ttkbootstrap.toast import ToastNotification
-from fpdf import FPDF
-from database import get_connection
+import exports
+from export_dialog import ExportDialog
+from import_dialog import ImportDialog, ask_import_path
+import api_client
+
+lookups = api_client.backend('lookups')
+products = api_client.backend('products')
+warehouses = api_client.backend('warehouses')
 
 class ProductsFrame(Frame):
     def __init__(self, master):
@@ -71,6 +76,7 @@ class ProductsFrame(Frame):
         btns = Frame(self)
         Button(btns, text="Add/Update", bootstyle="success", command=self.add_or_update).pack(side='left', padx=5)
         Button(btns, text="Export PDF", bootstyle="info", command=self.export_pdf).pack(side='left', padx=5)
+        Button(btns, text="Import CSV", bootstyle="info-outline", command=self.import_csv).pack(side='left', padx=5)
         Button(btns, text="Refresh", bootstyle="secondary", command=self.load_products).pack(side='left', padx=5)
         btns.pack(pady=5)
 
@@ -98,32 +104,15 @@ class ProductsFrame(Frame):
         self.entries['is_active'].set(is_active)
 
     def load_products(self):
-        term = f"%{self.search_var.get().strip()}%"
-        with get_connection() as conn:
-            conn.execute('PRAGMA foreign_keys = ON')
-            cats = [r[1] for r in conn.execute('SELECT id,name FROM categories WHERE is_active=1')]
-            whs = [r[1] for r in conn.execute('SELECT id,name FROM warehouses WHERE is_active=1')]
-        self.entries['category']['values'] = cats
-        self.entries['warehouse']['values'] = whs
+        self.entries['category']['values'] = lookups.category_names()
+        self.entries['warehouse']['values'] = warehouses.active_names()
         self.entries['is_active']['values'] = ["Yes", "No"]
 
         for row in self.tree.get_children():
             self.tree.delete(row)
 
-        query = '''
-            SELECT p.id,p.sku,p.name,p.description,
-                   c.name,p.cost_price,p.price,p.quantity,
-                   w.name,CASE p.is_active WHEN 1 THEN 'Yes' ELSE 'No' END,
-                   p.created_at,p.updated_at
-            FROM products p
-            LEFT JOIN categories c ON p.category_id=c.id
-            LEFT JOIN warehouses w ON p.warehouse_id=w.id
-            WHERE (p.name LIKE ? OR p.sku LIKE ?)
-        '''
-        with get_connection() as conn:
-            conn.execute('PRAGMA foreign_keys = ON')
-            for row in conn.execute(query, (term, term)):
-                self.tree.insert('', 'end', values=row)
+        for row in products.list_products(self.search_var.get().strip()):
+            self.tree.insert('', 'end', values=tuple(row))
 
     def add_or_update(self):
         vals = {k: v.get().strip() for k, v in self.entries.items()}
@@ -135,25 +124,18 @@ class ProductsFrame(Frame):
         except ValueError:
             ToastNotification(title='Error', message='Cost/Price must be numeric; Qty must be integer').show_toast()
             return
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cid = lookups.category_id(vals['category'])
+        wid = warehouses.warehouse_id(vals['warehouse'])
+        if cid is None or wid is None:
+            ToastNotification(title='Error', message='Category/Warehouse not found').show_toast()
+            return
         try:
-            with get_connection() as conn:
-                conn.execute('PRAGMA foreign_keys = ON')
-                cid = conn.execute('SELECT id FROM categories WHERE name=? AND is_active=1', (vals['category'],)).fetchone()[0]
-                wid = conn.execute('SELECT id FROM warehouses WHERE name=? AND is_active=1', (vals['warehouse'],)).fetchone()[0]
-                active = 1 if vals['is_active']=='Yes' else 0
-                if self.selected_id:
-                    conn.execute(
-                        'UPDATE products SET sku=?, name=?, description=?, category_id=?, cost_price=?, price=?, quantity=?, warehouse_id=?, is_active=?, updated_at=? WHERE id=?',
-                        (vals['sku'], vals['name'], vals['description'], cid, cost, price, qty, wid, active, now, self.selected_id)
-                    )
-                else:
-                    conn.execute(
-                        'INSERT INTO products (sku,name,description,category_id,cost_price,price,quantity,warehouse_id,is_active,created_at,updated_at) VALUES (?,?,?,?,?,?,?,?,?,?,?)',
-                        (vals['sku'], vals['name'], vals['description'], cid, cost, price, qty, wid, active, now, now)
-                    )
-                conn.commit()
-        except sqlite3.IntegrityError as e:
+            active = 1 if vals['is_active']=='Yes' else 0
+            products.save_product(
+                self.selected_id, vals['sku'], vals['name'], vals['description'],
+                cid, cost, price, qty, wid, active
+            )
+        except (sqlite3.IntegrityError, api_client.ApiClientError) as e:
             ToastNotification(title='Error', message=str(e)).show_toast()
             return
         self.load_products()
@@ -162,36 +144,17 @@ class ProductsFrame(Frame):
         sel = self.tree.selection()
         if not sel: return
         pid = self.tree.item(sel[0])['values'][0]
-        with get_connection() as conn:
-            conn.execute('PRAGMA foreign_keys = ON')
-            conn.execute('DELETE FROM products WHERE id=?', (pid,))
-            conn.commit()
+        products.delete_product(pid)
         self.load_products()
 
     def export_pdf(self):
-        items = self.tree.get_children()
-        if not items:
-            ToastNotification(title='Export PDF', message='No data to export').show_toast()
-            return
-        export_dir = os.path.join(os.getcwd(), 'exports'); os.makedirs(export_dir, exist_ok=True)
-        filename = f"products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"; filepath = os.path.join(export_dir, filename)
-        pdf = FPDF(orientation='L', unit='mm', format='A4'); pdf.set_auto_page_break(auto=True, margin=10); pdf.add_page()
-        page_width = pdf.w - 2*pdf.l_margin
-        pdf.set_font('Arial','B',12); pdf.cell(page_width*0.7,10,'Products', ln=False, align='L')
-        pdf.set_font('Arial','',8); pdf.cell(page_width*0.3,10, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), ln=True, align='R')
-        pdf.ln(2)
-        pdf.set_font('Arial','B',8); pdf.set_fill_color(200,200,200)
-        col_width = page_width / len(self.tree['columns'])
-        for col in self.tree['columns']:
-            pdf.cell(col_width,6,col, border=1, align='C', fill=True)
-        pdf.ln()
-        pdf.set_font('Arial','',6); fill=False
-        for iid in items:
-            values = self.tree.item(iid)['values']
-            pdf.set_fill_color(245,245,245) if fill else pdf.set_fill_color(255,255,255)
-            for v in values:
-                text = str(v)
-                if len(text) > int(col_width/2): text = text[:int(col_width/2)-3] + '...'
-                pdf.cell(col_width,5,text, border=1, align='L', fill=fill)
-            pdf.ln(); fill = not fill
-        pdf.output(filepath); ToastNotification(title='Export PDF', message=f'PDF saved to {filepath}').show_toast()
+        export_dir = os.path.join(os.getcwd(), 'exports')
+        ExportDialog(
+            self, "Export Products", exports.export_products_pdf,
+            exports.timestamped(export_dir, "products"), term=self.search_var.get()
+        )
+
+    def import_csv(self):
+        path = ask_import_path(self)
+        if path:
+            ImportDialog(self, 'products', path, on_done=self.load_products)
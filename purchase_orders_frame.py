@@ -0,0 +1,127 @@
+from datetime import datetime
+
+import ttkbootstrap as tb
+from ttkbootstrap import Frame, Label, Button, Treeview, Scrollbar, Combobox
+from ttkbootstrap.toast import ToastNotification
+
+import forecasting
+from import_dialog import ImportDialog, ask_import_path
+from repositories import purchasing
+
+STATUS_FILTERS = {'Open': purchasing.OPEN_STATUSES, 'All': None,
+                  'Received': ('received',), 'Cancelled': ('cancelled',)}
+
+
+class PurchaseOrdersFrame(Frame):
+    def __init__(self, master):
+        super().__init__(master, padding=10)
+        Label(self, text="Purchase Orders", font=("Helvetica", 16, "bold")).pack(pady=(0, 10))
+
+        bar = Frame(self)
+        Label(bar, text="Show:").pack(side='left')
+        self.status_var = tb.StringVar(value='Open')
+        status_cb = Combobox(bar, textvariable=self.status_var, state='readonly',
+                             values=list(STATUS_FILTERS), width=12)
+        status_cb.pack(side='left', padx=5)
+        status_cb.bind("<<ComboboxSelected>>", lambda e: self.load())
+        Button(bar, text="Suggest Orders", bootstyle="success", command=self.suggest_orders).pack(side='left', padx=5)
+        Button(bar, text="Import Price List", bootstyle="info-outline", command=self.import_prices).pack(side='left', padx=5)
+        Button(bar, text="Refresh", bootstyle="info", command=self.load).pack(side='left', padx=5)
+        bar.pack(fill='x', pady=5)
+
+        cols = ("ID", "PO No", "Supplier", "Order Date", "Expected", "Status", "Lines",
+                "Ordered", "Received", "Total Cost")
+        self.tree = self._make_tree(cols, "primary")
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.load_lines())
+
+        btn_frame = Frame(self)
+        Button(btn_frame, text="Mark Ordered", bootstyle="warning", command=self.mark_ordered).pack(side='left', padx=5)
+        Button(btn_frame, text="Receive All", bootstyle="success", command=self.receive_all).pack(side='left', padx=5)
+        Button(btn_frame, text="Cancel Order", bootstyle="danger", command=self.cancel_order).pack(side='left', padx=5)
+        btn_frame.pack(pady=5)
+
+        cols = ("Line", "Product ID", "SKU", "Product", "Ordered", "Received", "Unit Cost")
+        self.lines_tree = self._make_tree(cols, "secondary")
+
+        self.load()
+
+    def _make_tree(self, cols, style):
+        table_frame = Frame(self)
+        table_frame.pack(fill='both', expand=True, pady=5)
+        tree = Treeview(table_frame, columns=cols, show='headings', bootstyle=style)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor='center')
+        v_scroll = Scrollbar(table_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=v_scroll.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        v_scroll.grid(row=0, column=1, sticky='ns')
+        table_frame.rowconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+        return tree
+
+    def load(self):
+        for r in self.tree.get_children():
+            self.tree.delete(r)
+        for r in self.lines_tree.get_children():
+            self.lines_tree.delete(r)
+        for row in purchasing.list_orders(STATUS_FILTERS[self.status_var.get()]):
+            self.tree.insert('', 'end', values=row[:-1] + (f"{row.total_cost:,.2f}",))
+
+    def _selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            ToastNotification("Error", "Select a purchase order").show_toast()
+            return None
+        return int(self.tree.item(sel[0])['values'][0])
+
+    def load_lines(self):
+        for r in self.lines_tree.get_children():
+            self.lines_tree.delete(r)
+        sel = self.tree.selection()
+        if not sel:
+            return
+        for line in purchasing.order_lines(int(self.tree.item(sel[0])['values'][0])):
+            self.lines_tree.insert('', 'end', values=tuple(line))
+
+    def suggest_orders(self):
+        needs = forecasting.reorder_needs()
+        if not needs:
+            ToastNotification("Purchase Orders", "Nothing needs reordering").show_toast()
+            return
+        lines, unsupplied = purchasing.suggest(needs)
+        orders = purchasing.create_suggested_orders(lines, datetime.now().strftime('%Y-%m-%d'))
+        message = f"{len(orders)} draft orders with {len(lines):,} lines"
+        if unsupplied:
+            message += f"; {len(unsupplied):,} products have no supplier price"
+        ToastNotification("Purchase Orders", message).show_toast()
+        self.load()
+
+    def import_prices(self):
+        path = ask_import_path(self)
+        if path:
+            ImportDialog(self, 'prices', path)
+
+    def mark_ordered(self):
+        po_id = self._selected()
+        if po_id is not None:
+            purchasing.set_status(po_id, 'ordered')
+            self.load()
+
+    def receive_all(self):
+        po_id = self._selected()
+        if po_id is None:
+            return
+        try:
+            units = purchasing.receive(po_id)
+        except ValueError as e:
+            ToastNotification("Error", str(e)).show_toast()
+            return
+        ToastNotification("Purchase Orders", f"Received {units:,} units into stock").show_toast()
+        self.load()
+
+    def cancel_order(self):
+        po_id = self._selected()
+        if po_id is not None:
+            purchasing.set_status(po_id, 'cancelled')
+            self.load()
@@ -0,0 +1,190 @@
+import contextlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+SLOW_QUERY_MS = float(os.environ.get('SIS_SLOW_QUERY_MS', 50))
+MAX_SAMPLES = 10000
+
+log = logging.getLogger('sales_inventory.queries')
+
+_samples = deque(maxlen=MAX_SAMPLES)
+_lock = threading.Lock()
+_SKIP_FILES = (os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.py'),
+               os.path.abspath(contextlib.__file__))
+# queries are charged to the screen or job that called the repository, not
+# to the repository function or the with block that closed the connection
+_SKIP_DIRS = (os.path.join(os.path.dirname(os.path.abspath(__file__)), 'repositories') + os.sep,)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(?, ...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = os.path.abspath(frame.f_code.co_filename)
+        if path not in _SKIP_FILES and not path.startswith(_SKIP_DIRS):
+            break
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    owner = frame.f_locals.get('self')
+    name = frame.f_code.co_name
+    if owner is not None:
+        name = f"{type(owner).__name__}.{name}"
+    return f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params) -> str:
+    if params is None:
+        return '  (plan not captured for executemany)'
+    try:
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return f"(no plan: {e})"
+    return '\n'.join(f"  {row[-1]}" for row in rows)
+
+
+def _record(conn, sql, params, elapsed, rows, caller):
+    ms = elapsed * 1000.0
+    with _lock:
+        _samples.append((normalize_sql(sql), ms, rows, caller, time.time()))
+    if ms >= SLOW_QUERY_MS:
+        log.warning("slow query %.1f ms, %d rows, from %s\n%s\n%s",
+                    ms, rows, caller, sql.strip(), _explain(conn, sql, params))
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, elapsed, rows, caller = pending
+            _record(self.connection, sql, params, elapsed, rows, caller)
+
+    def _track(self, elapsed, rows=0, done=False):
+        if self._pending is not None:
+            sql, params, total, count, caller = self._pending
+            self._pending = (sql, params, total + elapsed, count + rows, caller)
+            if done:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        caller = _caller()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = (sql, parameters, time.perf_counter() - start, 0, caller)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        caller = _caller()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        _record(self.connection, sql, None, time.perf_counter() - start, max(self.rowcount, 0), caller)
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._track(time.perf_counter() - start, done=True)
+            raise
+        self._track(time.perf_counter() - start, 1)
+        return row
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._track(time.perf_counter() - start, row is not None, done=row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._track(time.perf_counter() - start, len(rows), done=not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._track(time.perf_counter() - start, len(rows), done=True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        if self._pending is not None:
+            self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def reset() -> None:
+    with _lock:
+        _samples.clear()
+
+
+def report(limit: Optional[int] = 20) -> list:
+    with _lock:
+        samples = list(_samples)
+    groups = {}
+    for sql, ms, rows, caller, _ in samples:
+        g = groups.get(sql)
+        if g is None:
+            g = groups[sql] = {'sql': sql, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                               'rows': 0, 'callers': {}}
+        g['calls'] += 1
+        g['total_ms'] += ms
+        g['max_ms'] = max(g['max_ms'], ms)
+        g['rows'] += rows
+        g['callers'][caller] = g['callers'].get(caller, 0) + 1
+    result = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+    for g in result:
+        g['avg_ms'] = g['total_ms'] / g['calls']
+    return result[:limit] if limit else result
+
+
+def format_report(limit: Optional[int] = 20) -> str:
+    lines = [f"{'total ms':>10} {'calls':>7} {'avg ms':>9} {'max ms':>9} {'rows':>9}  statement"]
+    for g in report(limit):
+        lines.append(f"{g['total_ms']:>10.1f} {g['calls']:>7} {g['avg_ms']:>9.2f} "
+                     f"{g['max_ms']:>9.2f} {g['rows']:>9}  {g['sql'][:120]}")
+        top = sorted(g['callers'].items(), key=lambda kv: kv[1], reverse=True)[:3]
+        for caller, n in top:
+            lines.append(f"{'':>49}  <- {caller} x{n}")
+    return '\n'.join(lines)
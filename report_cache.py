@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import database
+
+# Generated report files kept under reports/.cache next to the database,
+# addressed by a hash of the report kind, its parameters and the exact rows
+# that went into it. A repeat request for a period whose rows are unchanged
+# is a file copy; an edited, deleted or backdated sale changes the rows (the
+# analytics engine reloads when a loaded sale disappears), hence the key, so
+# nothing stale is served. Entries are evicted least recently used first once
+# the folder exceeds SIS_REPORT_CACHE_MB.
+
+# set SIS_REPORT_CACHE=0 to render every report afresh
+ENABLED = os.environ.get('SIS_REPORT_CACHE', '1') != '0'
+CACHE_DIR: Optional[str] = None  # None: reports/.cache beside database.DB_NAME
+MAX_BYTES = int(os.environ.get('SIS_REPORT_CACHE_MB', 200)) * 1024 * 1024
+VERSION = 1  # bump when the report layout changes
+
+
+def key(kind: str, params: Sequence, rows: Iterable[Sequence]) -> str:
+    digest = hashlib.sha256(repr((VERSION, kind, tuple(params))).encode())
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def cache_dir() -> str:
+    if CACHE_DIR is not None:
+        return CACHE_DIR
+    return os.path.join(os.path.dirname(os.path.abspath(database.DB_NAME)), 'reports', '.cache')
+
+
+def _entry(digest: str) -> str:
+    return os.path.join(cache_dir(), digest)
+
+
+def fetch(digest: str, targets: Callable[[int], str]) -> Optional[List[str]]:
+    # copy the cached files to targets(1), targets(2), ...; None on a miss
+    entry = _entry(digest)
+    try:
+        names = sorted(os.listdir(entry), key=lambda name: int(name.split('.')[0]))
+        paths = []
+        for n, name in enumerate(names, 1):
+            paths.append(targets(n))
+            shutil.copyfile(os.path.join(entry, name), paths[-1])
+        os.utime(entry)  # mark as recently used
+    except (FileNotFoundError, ValueError):
+        return None
+    return paths or None
+
+
+def store(digest: str, paths: Sequence[str]) -> None:
+    entry = _entry(digest)
+    if os.path.isdir(entry):
+        return
+    os.makedirs(cache_dir(), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir(), prefix='.tmp')
+    for n, path in enumerate(paths, 1):
+        shutil.copyfile(path, os.path.join(staging, f"{n}{os.path.splitext(path)[1]}"))
+    try:
+        os.rename(staging, entry)  # another process may have stored it first
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    evict()
+
+
+def evict(max_bytes: Optional[int] = None) -> None:
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    try:
+        listing = list(os.scandir(cache_dir()))
+    except FileNotFoundError:
+        return
+    for entry in listing:
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        try:
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((entry.stat().st_mtime, size, entry.path))
+        except FileNotFoundError:
+            continue
+        total += size
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def cached(kind: str, params: Sequence, rows: Sequence[Sequence], targets: Callable[[int], str],
+           render: Callable[[], List[str]]) -> List[str]:
+    if not ENABLED:
+        return render()
+    digest = key(kind, params, rows)
+    paths = fetch(digest, targets)
+    if paths is None:
+        paths = render()
+        store(digest, paths)
+    return paths
@@ -1,12 +1,15 @@
 import os
-import sqlite3
 from datetime import datetime
 
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Combobox, Button, Treeview, Scrollbar
 
-from database import get_connection
-from fpdf import FPDF
+import analytics
+import exports
+from export_dialog import ExportDialog, ask_data_path
+import api_client
+
+reports = api_client.backend('reports')
 
 class ReportFrame(Frame):
     def __init__(self, master):
@@ -41,6 +44,10 @@ class ReportFrame(Frame):
             controls, text="Export PDF",
             bootstyle="info", command=self.export_report_pdf
         ).pack(side='left', padx=(10,0))
+        Button(
+            controls, text="Export Data",
+            bootstyle="info-outline", command=self.export_report_data
+        ).pack(side='left', padx=(10,0))
 
         table_frame = Frame(self)
         table_frame.pack(fill='both', expand=True)
@@ -65,10 +72,7 @@ class ReportFrame(Frame):
         table_frame.columnconfigure(0, weight=1)
 
     def _load_report_years(self):
-        with get_connection() as conn:
-            years = [r[0] for r in conn.execute(
-                "SELECT DISTINCT strftime('%Y', date) FROM sales ORDER BY 1 DESC"
-            )]
+        years = reports.years()
         self.year_cb['values'] = years
         if years:
             self.year_cb.set(years[0])
@@ -80,42 +84,12 @@ class ReportFrame(Frame):
             tb.toast.ToastNotification("Error","Please select a year").show_toast()
             return
 
-        if month != 'All':
-            sql = """
-                SELECT
-                  p.name AS product,
-                  SUM(s.qty) AS total_qty,
-                  SUM(s.qty * p.cost_price) AS total_cost,
-                  SUM(s.qty * p.price) AS total_sales
-                FROM sales s
-                JOIN products p ON s.prod_id = p.id
-                WHERE strftime('%Y', s.date)=?
-                  AND strftime('%m', s.date)=?
-                  AND p.is_active = 1
-                  AND s.is_active = 1
-                GROUP BY p.name
-                ORDER BY p.name
-            """
-            params = [year, month]
+        # in thin-client mode the server uses its own engine
+        engine = None if api_client.remote() else analytics.get_engine()
+        if engine is not None:
+            rows = engine.refresh().product_summary(year, month)
         else:
-            sql = """
-                SELECT
-                  p.name AS product,
-                  SUM(s.qty) AS total_qty,
-                  SUM(s.qty * p.cost_price) AS total_cost,
-                  SUM(s.qty * p.price) AS total_sales
-                FROM sales s
-                JOIN products p ON s.prod_id = p.id
-                WHERE strftime('%Y', s.date)=?
-                  AND p.is_active = 1
-                  AND s.is_active = 1
-                GROUP BY p.name
-                ORDER BY p.name
-            """
-            params = [year]
-
-        with get_connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
+            rows = reports.product_summary(year, month)
 
         for item in self.report_tree.get_children():
             self.report_tree.delete(item)
@@ -136,37 +110,19 @@ class ReportFrame(Frame):
             tb.toast.ToastNotification("Error","Please select a year").show_toast()
             return
 
-        items = self.report_tree.get_children()
-        if not items:
-            tb.toast.ToastNotification("Error","No data to export").show_toast()
-            return
-
         folder = "reports"
         os.makedirs(folder, exist_ok=True)
         m_lbl = month if month!='All' else 'all'
-        fname = f"sales_report_{year}_{m_lbl}.pdf"
-        path = os.path.join(folder, fname)
-
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 16)
-        title = f"Sales Report for {year}" + (f"-{month}" if month!='All' else "")
-        pdf.cell(0, 10, title, ln=1)
-        pdf.ln(5)
-
-        pdf.set_font("Arial", "B", 12)
-        headers = ["Product","Total Qty","Total Cost","Total Sales"]
-        widths = [70,30,30,30]
-        for w,h in zip(widths, headers):
-            pdf.cell(w, 10, h, border=1)
-        pdf.ln()
-
-        pdf.set_font("Arial","",12)
-        for itm in items:
-            prod, qty, cost, sales = self.report_tree.item(itm)['values']
-            for w, v in zip(widths, [prod, qty, cost, sales]):
-                pdf.cell(w, 10, str(v), border=1)
-            pdf.ln()
-
-        pdf.output(path)
-        tb.toast.ToastNotification("Success", f"Exported to {path}").show_toast()
+        path = os.path.join(folder, f"sales_report_{year}_{m_lbl}.pdf")
+        ExportDialog(self, "Export Report", exports.export_report_pdf, path, year, month)
+
+    def export_report_data(self):
+        year = self.year_var.get()
+        month = self.month_var.get()
+        if not year:
+            tb.toast.ToastNotification("Error","Please select a year").show_toast()
+            return
+        m_lbl = month if month!='All' else 'all'
+        path = ask_data_path(self, f"sales_report_{year}_{m_lbl}", folder="reports")
+        if path:
+            ExportDialog(self, "Export Report", exports.export_report_data, path, year, month)
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional
+import sqlite3
+
+from database import get_connection
+
+
+@contextmanager
+def connection(conn: Optional[sqlite3.Connection] = None):
+    # Reuse the caller's connection (and transaction) when one is given,
+    # otherwise open one that commits on success like the frames always did,
+    # and close it (which runs PRAGMA optimize) rather than leave it to gc.
+    if conn is not None:
+        yield conn
+    else:
+        own = get_connection()
+        try:
+            with own:
+                yield own
+        finally:
+            own.close()
+
+
+def now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def chunks(cursor, size: int = 2000) -> Iterator[List[tuple]]:
+    # Stream a result set in fixed-size batches instead of fetchall().
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
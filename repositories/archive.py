@@ -0,0 +1,64 @@
+import os
+import sqlite3
+from typing import List, Optional
+
+import database
+from repositories import connection
+
+# Routing between the hot database and the sales archive. archiving.py moves
+# whole months of old sales into <db>_archive.db and sums them into
+# sales_archived; row listings read the archive only when their date range
+# starts before the archived boundary, through a UNION ALL of both tables
+# (a subquery rather than a temp view, so read-only connections can use it).
+
+SCHEMA = 'archive'
+
+
+def archive_path(db_path: Optional[str] = None) -> str:
+    base, ext = os.path.splitext(db_path or database.DB_NAME)
+    return f"{base}_archive{ext or '.db'}"
+
+
+def next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def archived_before(conn=None) -> Optional[str]:
+    # first month still complete in the hot table, or None before any archiving
+    with connection(conn) as c:
+        try:
+            month = c.execute('SELECT MAX(month) FROM sales_archive_log').fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+    return next_month(month) if month else None
+
+
+def attach(c: sqlite3.Connection, create: bool = False) -> bool:
+    # ATTACH the archive (no-op when attached); False if there is none yet
+    if any(row[1] == SCHEMA for row in c.execute('PRAGMA database_list')):
+        return True
+    path = archive_path()
+    if not create and not os.path.exists(path):
+        return False
+    c.execute(f'ATTACH DATABASE ? AS {SCHEMA}', (path,))
+    return True
+
+
+def sales_source(c: sqlite3.Connection, start: str = '') -> str:
+    # table (or subquery) a sales query should read for dates from `start` on
+    boundary = archived_before(c)
+    if boundary is None or (start and start[:7] >= boundary) or not attach(c):
+        return 'sales'
+    hot = database.table_columns(c, 'sales')
+    cold = set(database.table_columns(c, 'sales', SCHEMA))
+    # the archive may predate columns added to sales since
+    picked = ', '.join(col if col in cold else f'NULL AS {col}' for col in hot)
+    return (f"(SELECT {', '.join(hot)} FROM main.sales "
+            f"UNION ALL SELECT {picked} FROM {SCHEMA}.sales)")
+
+
+def rollup(conn=None) -> List[tuple]:
+    # (month, prod_id, is_active, qty, lines) of every archived month
+    with connection(conn) as c:
+        return c.execute('SELECT month, prod_id, is_active, qty, lines FROM sales_archived').fetchall()
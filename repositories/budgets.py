@@ -0,0 +1,89 @@
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from repositories import connection, now
+
+
+class BudgetStatus(NamedTuple):
+    department_id: int
+    department: str
+    budget: Optional[float]
+    actual: float
+    alert_pct: float
+
+    @property
+    def used_pct(self) -> Optional[float]:
+        return 100 * self.actual / self.budget if self.budget else None
+
+    @property
+    def status(self) -> str:
+        if self.budget is None:
+            return 'No budget'
+        if self.actual > self.budget:
+            return 'Over budget'
+        if self.used_pct >= self.alert_pct:
+            return 'Alert'
+        return 'OK'
+
+
+def current_period() -> str:
+    return date.today().strftime('%Y-%m')
+
+
+def periods(conn=None) -> List[str]:
+    # months with a budget or an expense, newest first
+    with connection(conn) as c:
+        return [r[0] for r in c.execute(
+            'SELECT period FROM department_budgets UNION SELECT period FROM department_expense_totals '
+            'ORDER BY 1 DESC'
+        )]
+
+
+def save_budget(department_id: int, period: str, amount: float, alert_pct: float = 90,
+                conn=None) -> None:
+    stamp = now()
+    with connection(conn) as c:
+        c.execute(
+            'INSERT INTO department_budgets (department_id, period, amount, alert_pct, created_at, updated_at) '
+            'VALUES (?,?,?,?,?,?) ON CONFLICT(department_id, period) DO UPDATE SET '
+            'amount=excluded.amount, alert_pct=excluded.alert_pct, updated_at=excluded.updated_at',
+            (department_id, period, amount, alert_pct, stamp, stamp)
+        )
+
+
+def delete_budget(department_id: int, period: str, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute('DELETE FROM department_budgets WHERE department_id=? AND period=?', (department_id, period))
+
+
+def budget_vs_actual(period: Optional[str] = None, conn=None) -> List[BudgetStatus]:
+    # Every department's budget and spend for one month, read from the
+    # rollup by primary key; independent of the number of expense rows.
+    period = period or current_period()
+    with connection(conn) as c:
+        return [BudgetStatus(*row) for row in c.execute('''
+            SELECT d.id, d.name, b.amount, IFNULL(t.total, 0), IFNULL(b.alert_pct, 90)
+            FROM departments d
+            LEFT JOIN department_budgets b ON b.department_id = d.id AND b.period = :period
+            LEFT JOIN department_expense_totals t ON t.department_id = d.id AND t.period = :period
+            ORDER BY d.name
+        ''', {'period': period})]
+
+
+def alerts(period: Optional[str] = None, conn=None) -> List[BudgetStatus]:
+    return [row for row in budget_vs_actual(period, conn=conn) if row.status in ('Alert', 'Over budget')]
+
+
+def department_alert(department_id: int, period: str, conn=None) -> Optional[BudgetStatus]:
+    # the department's status for one month if it is at or past its alert level
+    with connection(conn) as c:
+        row = c.execute('''
+            SELECT d.id, d.name, b.amount, IFNULL(t.total, 0), b.alert_pct
+            FROM department_budgets b
+            JOIN departments d ON d.id = b.department_id
+            LEFT JOIN department_expense_totals t ON t.department_id = b.department_id AND t.period = b.period
+            WHERE b.department_id = ? AND b.period = ?
+        ''', (department_id, period)).fetchone()
+    status = BudgetStatus(*row) if row else None
+    return status if status and status.status in ('Alert', 'Over budget') else None
+
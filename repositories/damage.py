@@ -0,0 +1,88 @@
+from typing import List, NamedTuple
+
+from repositories import connection, now, stock
+
+
+class DamageRow(NamedTuple):
+    id: int
+    product: str
+    date: str
+    qty: int
+    reason: str
+    created_at: str
+    updated_at: str
+    is_active: int
+
+
+def list_damage(term: str = '', product: str = '', from_date: str = '', to_date: str = '',
+                conn=None) -> List[DamageRow]:
+    query = """
+        SELECT d.id, p.name, d.date, d.qty, d.reason, d.created_at, d.updated_at, d.is_active
+        FROM damage_products d
+        JOIN products p ON d.prod_id = p.id
+        WHERE 1=1
+    """
+    params = []
+
+    if term:
+        query += " AND (p.name LIKE ? OR d.reason LIKE ?)"
+        like_term = f"%{term}%"
+        params.extend([like_term, like_term])
+    if product:
+        query += " AND p.name = ?"
+        params.append(product)
+    if from_date:
+        query += " AND d.date >= ?"
+        params.append(from_date)
+    if to_date:
+        query += " AND d.date <= ?"
+        params.append(to_date)
+
+    query += " ORDER BY d.id"
+
+    with connection(conn) as c:
+        return [DamageRow(*row) for row in c.execute(query, params)]
+
+
+def add_damage(prod_id: int, date: str, qty: int, reason: str, is_active: int, conn=None) -> int:
+    # damaged units leave stock
+    stamp = now()
+    with connection(conn) as c:
+        cur = c.execute(
+            'INSERT INTO damage_products(prod_id, date, qty, reason, created_at, updated_at, is_active) '
+            'VALUES(?,?,?,?,?,?,?)',
+            (prod_id, date, qty, reason, stamp, stamp, is_active)
+        )
+        _move(c, prod_id, date, -qty, cur.lastrowid)
+        return cur.lastrowid
+
+
+def update_damage(damage_id: int, prod_id: int, date: str, qty: int, reason: str,
+                  is_active: int, conn=None) -> None:
+    with connection(conn) as c:
+        old_pid, old_date, old_qty = c.execute(
+            'SELECT prod_id, date, qty FROM damage_products WHERE id=?', (damage_id,)
+        ).fetchone()
+        c.execute(
+            'UPDATE damage_products SET prod_id=?, date=?, qty=?, reason=?, updated_at=?, is_active=? WHERE id=?',
+            (prod_id, date, qty, reason, now(), is_active, damage_id)
+        )
+        if (old_pid, old_date, old_qty) != (prod_id, date, qty):
+            _move(c, old_pid, old_date, old_qty or 0, damage_id, 'edited')
+            _move(c, prod_id, date, -qty, damage_id, 'edited')
+
+
+def delete_damage(damage_id: int, conn=None) -> None:
+    with connection(conn) as c:
+        row = c.execute('SELECT prod_id, date, qty FROM damage_products WHERE id=?', (damage_id,)).fetchone()
+        c.execute('DELETE FROM damage_products WHERE id=?', (damage_id,))
+        if row:
+            _move(c, row[0], row[1], row[2] or 0, damage_id, 'deleted')
+
+
+def _move(c, prod_id, date, qty, damage_id, note=''):
+    if qty:
+        c.execute('UPDATE products SET quantity = quantity + ?, updated_at = ? WHERE id = ?',
+                  (qty, now(), prod_id))
+        stock.record(c, [stock.Movement(prod_id, date or stock.today(), qty, 'damage',
+                                        'damage_products', damage_id, note)])
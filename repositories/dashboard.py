@@ -0,0 +1,92 @@
+from typing import List, Tuple
+
+from repositories import connection
+
+# products at or below this many units count as low stock everywhere:
+# dashboard, low stock screen, reorder suggestions and chain figures
+LOW_STOCK_THRESHOLD = 5
+
+
+def _scalar(sql: str, params=(), conn=None):
+    with connection(conn) as c:
+        return c.execute(sql, params).fetchone()[0]
+
+
+def total_products(conn=None) -> int:
+    return _scalar("SELECT COUNT(*) FROM products WHERE is_active=1", conn=conn)
+
+
+def total_quantity(conn=None) -> int:
+    return _scalar("SELECT SUM(quantity) FROM products", conn=conn) or 0
+
+
+# sales rows plus the per-product rollup of archived months
+_ALL_SALES = "(SELECT prod_id, qty FROM sales UNION ALL SELECT prod_id, qty FROM sales_archived)"
+
+
+def total_sales(conn=None) -> float:
+    return _scalar(
+        f"SELECT SUM(s.qty * p.price) FROM {_ALL_SALES} s JOIN products p ON s.prod_id = p.id", conn=conn
+    ) or 0.0
+
+
+def total_categories(conn=None) -> int:
+    return _scalar("SELECT COUNT(*) FROM categories", conn=conn)
+
+
+def total_suppliers(conn=None) -> int:
+    return _scalar("SELECT COUNT(*) FROM suppliers", conn=conn)
+
+
+def total_expenses(conn=None) -> float:
+    # active expenses, from the per-department monthly rollup
+    return _scalar("SELECT TOTAL(total) FROM department_expense_totals", conn=conn)
+
+
+def top_quantity(conn=None) -> int:
+    return _scalar("SELECT MAX(quantity) FROM products", conn=conn) or 0
+
+
+def low_stock_count(threshold: int, conn=None) -> int:
+    return _scalar("SELECT COUNT(*) FROM products WHERE quantity <= ?", (threshold,), conn=conn) or 0
+
+
+def _pairs(sql: str, conn=None) -> Tuple[List, List]:
+    with connection(conn) as c:
+        data = c.execute(sql).fetchall()
+    if not data:
+        return [], []
+    labels, vals = zip(*data)
+    return list(labels), list(vals)
+
+
+def sales_by_category(conn=None) -> Tuple[List, List]:
+    return _pairs(
+        "SELECT c.name, SUM(s.qty * p.price)"
+        f" FROM {_ALL_SALES} s"
+        " JOIN products p ON s.prod_id = p.id"
+        " LEFT JOIN categories c ON p.category_id = c.id"
+        " GROUP BY c.name",
+        conn
+    )
+
+
+def expenses_by_department(conn=None) -> Tuple[List, List]:
+    return _pairs(
+        "SELECT d.name, SUM(t.total)"
+        " FROM department_expense_totals t"
+        " JOIN departments d ON t.department_id = d.id"
+        " GROUP BY d.name"
+        " HAVING SUM(t.total) > 0",
+        conn
+    )
+
+
+def low_stock(threshold: int, conn=None) -> List[tuple]:
+    # (id, sku, name, quantity) of active products at or below the threshold
+    with connection(conn) as c:
+        return c.execute(
+            "SELECT id, sku, name, quantity FROM products"
+            " WHERE is_active=1 AND quantity <= ? ORDER BY quantity, name",
+            (threshold,)
+        ).fetchall()
@@ -0,0 +1,105 @@
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
+
+from repositories import connection, now
+
+# Unpaid, active debts. Matches the WHERE of the partial index
+# idx_debts_open_due word for word so the planner can use it.
+OPEN_DEBT = "is_active = 1 AND lower(IFNULL(status, '')) != 'paid'"
+
+AGING_BUCKETS = ('Current', '1-30 days', '31-60 days', '61-90 days', '90+ days')
+
+
+class AgingBucket(NamedTuple):
+    label: str
+    count: int
+    amount: float
+
+
+class DebtRow(NamedTuple):
+    id: int
+    name: str
+    amount: float
+    due_date: str
+    status: str
+    created_at: str
+    updated_at: str
+    is_active: int
+
+
+def list_debts(term: str = '', due_date: str = '', active: Optional[bool] = None,
+               overdue: bool = False, conn=None) -> List[DebtRow]:
+    like = f"%{term}%"
+    query = (
+        "SELECT id, name, amount, due_date, status, created_at, updated_at, is_active "
+        "FROM debts WHERE (name LIKE ? OR status LIKE ?)"
+    )
+    params = [like, like]
+
+    if due_date:
+        query += " AND due_date = ?"
+        params.append(due_date)
+    if active is not None:
+        query += " AND is_active = ?"
+        params.append(1 if active else 0)
+    if overdue:
+        query += f" AND {OPEN_DEBT} AND due_date < ?"
+        params.append(date.today().isoformat())
+
+    query += " ORDER BY due_date"
+
+    with connection(conn) as c:
+        return [DebtRow(*row) for row in c.execute(query, params)]
+
+
+def add_debt(name: str, amount: float, due_date: str, status: str, is_active: int, conn=None) -> int:
+    stamp = now()
+    with connection(conn) as c:
+        cur = c.execute(
+            'INSERT INTO debts(name, amount, due_date, status, created_at, updated_at, is_active) '
+            'VALUES(?,?,?,?,?,?,?)',
+            (name, amount, due_date, status, stamp, stamp, is_active)
+        )
+        return cur.lastrowid
+
+
+def update_debt(debt_id: int, name: str, amount: float, due_date: str, status: str,
+                is_active: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute(
+            'UPDATE debts SET name=?, amount=?, due_date=?, status=?, updated_at=?, is_active=? WHERE id=?',
+            (name, amount, due_date, status, now(), is_active, debt_id)
+        )
+
+
+def aging(today: Optional[str] = None, conn=None) -> List[AgingBucket]:
+    # Open debts by days past due in one grouped pass over idx_debts_open_due;
+    # bucket edges are date strings, so no per-row date arithmetic. A debt
+    # with no due date is never overdue (as in overdue_total), so Current.
+    today = today or date.today().isoformat()
+    totals = {}
+    with connection(conn) as c:
+        for bucket, count, amount in c.execute(f"""
+            SELECT CASE
+                       WHEN due_date IS NULL OR due_date >= :today THEN 0
+                       WHEN due_date >= date(:today, '-30 days') THEN 1
+                       WHEN due_date >= date(:today, '-60 days') THEN 2
+                       WHEN due_date >= date(:today, '-90 days') THEN 3
+                       ELSE 4
+                   END AS bucket, COUNT(*), TOTAL(amount)
+            FROM debts
+            WHERE {OPEN_DEBT}
+            GROUP BY bucket
+        """, {'today': today}):
+            totals[bucket] = (count, amount)
+    return [AgingBucket(label, *totals.get(i, (0, 0.0))) for i, label in enumerate(AGING_BUCKETS)]
+
+
+def overdue_total(today: Optional[str] = None, conn=None) -> Tuple[int, float]:
+    # (count, amount) of open debts past their due date: a range scan on the
+    # partial index
+    with connection(conn) as c:
+        return c.execute(
+            f"SELECT COUNT(*), TOTAL(amount) FROM debts WHERE {OPEN_DEBT} AND due_date < ?",
+            (today or date.today().isoformat(),)
+        ).fetchone()
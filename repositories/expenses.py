@@ -0,0 +1,56 @@
+from typing import List, NamedTuple
+
+from repositories import connection, now
+
+
+class ExpenseRow(NamedTuple):
+    id: int
+    date: str
+    department: str
+    description: str
+    amount: float
+    created_at: str
+    updated_at: str
+    is_active: int
+
+
+def list_expenses(term: str = '', conn=None) -> List[ExpenseRow]:
+    query = (
+        "SELECT e.id, e.date, IFNULL(d.name, ''), e.description, e.amount, "
+        "e.created_at, e.updated_at, e.is_active "
+        "FROM expenses e LEFT JOIN departments d ON e.department_id = d.id"
+    )
+    params = ()
+    if term:
+        query += ' WHERE e.date LIKE ? OR e.description LIKE ?'
+        like = f"%{term}%"
+        params = (like, like)
+    with connection(conn) as c:
+        return [ExpenseRow(*row) for row in c.execute(query, params)]
+
+
+def add_expense(date: str, department_id: int, description: str, amount: float,
+                is_active: int, conn=None) -> int:
+    stamp = now()
+    with connection(conn) as c:
+        cur = c.execute(
+            'INSERT INTO expenses(date, department_id, description, amount, created_at, updated_at, is_active) '
+            'VALUES(?,?,?,?,?,?,?)',
+            (date, department_id, description, amount, stamp, stamp, is_active)
+        )
+        return cur.lastrowid
+
+
+def update_expense(expense_id: int, date: str, department_id: int, description: str,
+                   amount: float, is_active: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute(
+            'UPDATE expenses SET date=?, department_id=?, description=?, amount=?, updated_at=?, is_active=? '
+            'WHERE id=?',
+            (date, department_id, description, amount, now(), is_active, expense_id)
+        )
+
+
+def delete_expense(expense_id: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute('DELETE FROM expenses WHERE id=?', (expense_id,))
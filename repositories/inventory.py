@@ -0,0 +1,55 @@
+from typing import Iterator, List, Optional
+
+from repositories import chunks, connection
+from repositories.records import InventoryRow
+
+_INVENTORY_SQL = """
+        SELECT p.id, p.name, c.name AS category, p.price, p.quantity,
+               IFNULL((SELECT SUM(d.qty) FROM damage_products d WHERE d.prod_id = p.id), 0) AS damaged,
+               IFNULL((SELECT SUM(s.qty) FROM sales s WHERE s.prod_id = p.id), 0) AS sold
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE p.name LIKE ?
+        ORDER BY p.id
+"""
+
+# one warehouse: product_stock drives the scan through its warehouse index and
+# Qty is the stock held there
+_LOCATION_SQL = """
+        SELECT p.id, p.name, c.name AS category, p.price, ps.qty,
+               IFNULL((SELECT SUM(d.qty) FROM damage_products d WHERE d.prod_id = p.id), 0) AS damaged,
+               IFNULL((SELECT SUM(s.qty) FROM sales s WHERE s.prod_id = p.id), 0) AS sold
+        FROM product_stock ps
+        JOIN products p ON p.id = ps.product_id
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE ps.warehouse_id = ? AND ps.qty != 0 AND p.name LIKE ?
+        ORDER BY ps.product_id
+"""
+
+
+def _query(term: str, warehouse_id: Optional[int]):
+    if warehouse_id is None:
+        return _INVENTORY_SQL, (f"%{term}%",)
+    return _LOCATION_SQL, (warehouse_id, f"%{term}%")
+
+
+def list_inventory(term: str = '', warehouse_id: Optional[int] = None, conn=None) -> List[InventoryRow]:
+    with connection(conn) as c:
+        return [InventoryRow(*row) for row in c.execute(*_query(term, warehouse_id))]
+
+
+def count_inventory(term: str = '', warehouse_id: Optional[int] = None, conn=None) -> int:
+    with connection(conn) as c:
+        if warehouse_id is None:
+            return c.execute('SELECT COUNT(*) FROM products WHERE name LIKE ?', (f"%{term}%",)).fetchone()[0]
+        return c.execute(
+            'SELECT COUNT(*) FROM product_stock ps JOIN products p ON p.id = ps.product_id '
+            'WHERE ps.warehouse_id = ? AND ps.qty != 0 AND p.name LIKE ?',
+            (warehouse_id, f"%{term}%")
+        ).fetchone()[0]
+
+
+def iter_inventory(term: str = '', chunk: int = 2000, warehouse_id: Optional[int] = None,
+                   conn=None) -> Iterator[List[tuple]]:
+    with connection(conn) as c:
+        yield from chunks(c.execute(*_query(term, warehouse_id)), chunk)
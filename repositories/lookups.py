@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from repositories import connection
+
+
+def category_names(conn=None) -> List[str]:
+    with connection(conn) as c:
+        return [r[0] for r in c.execute('SELECT name FROM categories WHERE is_active=1')]
+
+
+def category_choices(conn=None) -> List[tuple]:
+    with connection(conn) as c:
+        return c.execute('SELECT id, name FROM categories WHERE is_active=1').fetchall()
+
+
+def category_id(name: str, conn=None) -> Optional[int]:
+    with connection(conn) as c:
+        row = c.execute('SELECT id FROM categories WHERE name=? AND is_active=1', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def department_choices(conn=None) -> List[tuple]:
+    with connection(conn) as c:
+        return c.execute('SELECT id, name FROM departments').fetchall()
+
+
+def department_id(name: str, conn=None) -> Optional[int]:
+    with connection(conn) as c:
+        row = c.execute('SELECT id FROM departments WHERE name=?', (name,)).fetchone()
+    return row[0] if row else None
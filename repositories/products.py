@@ -0,0 +1,89 @@
+from typing import Iterator, List, Optional
+
+from repositories import chunks, connection, now, stock
+from repositories.records import ProductRow
+
+
+_PRODUCTS_SQL = '''
+        SELECT p.id,p.sku,p.name,p.description,
+               c.name,p.cost_price,p.price,p.quantity,
+               w.name,CASE p.is_active WHEN 1 THEN 'Yes' ELSE 'No' END,
+               p.created_at,p.updated_at
+        FROM products p
+        LEFT JOIN categories c ON p.category_id=c.id
+        LEFT JOIN warehouses w ON p.warehouse_id=w.id
+        WHERE (p.name LIKE ? OR p.sku LIKE ?)
+'''
+
+
+def list_products(term: str = '', conn=None) -> List[ProductRow]:
+    term = f"%{term}%"
+    with connection(conn) as c:
+        return [ProductRow(*row) for row in c.execute(_PRODUCTS_SQL, (term, term))]
+
+
+def count_products(term: str = '', conn=None) -> int:
+    term = f"%{term}%"
+    with connection(conn) as c:
+        return c.execute(
+            'SELECT COUNT(*) FROM products p WHERE (p.name LIKE ? OR p.sku LIKE ?)', (term, term)
+        ).fetchone()[0]
+
+
+def iter_products(term: str = '', chunk: int = 2000, conn=None) -> Iterator[List[tuple]]:
+    term = f"%{term}%"
+    with connection(conn) as c:
+        yield from chunks(c.execute(_PRODUCTS_SQL, (term, term)), chunk)
+
+
+def list_names(conn=None) -> List[tuple]:
+    with connection(conn) as c:
+        return c.execute('SELECT id, name FROM products').fetchall()
+
+
+def list_prices(conn=None) -> List[tuple]:
+    # (id, name, cost_price, price) for every product
+    with connection(conn) as c:
+        return c.execute('SELECT id, name, cost_price, price FROM products').fetchall()
+
+
+def stock_levels(conn=None) -> List[tuple]:
+    # (id, sku, name, quantity, is_active) for every product
+    with connection(conn) as c:
+        return c.execute('SELECT id, sku, name, quantity, is_active FROM products').fetchall()
+
+
+def product_id(name: str, conn=None) -> Optional[int]:
+    with connection(conn) as c:
+        row = c.execute('SELECT id FROM products WHERE name=?', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def save_product(product_id: Optional[int], sku: str, name: str, description: str,
+                 category_id: int, cost: float, price: float, qty: int,
+                 warehouse_id: int, active: int, conn=None) -> int:
+    stamp = now()
+    with connection(conn) as c:
+        if product_id:
+            old_qty = c.execute('SELECT quantity FROM products WHERE id=?', (product_id,)).fetchone()[0]
+            c.execute(
+                'UPDATE products SET sku=?, name=?, description=?, category_id=?, cost_price=?, price=?, '
+                'quantity=?, warehouse_id=?, is_active=?, updated_at=? WHERE id=?',
+                (sku, name, description, category_id, cost, price, qty, warehouse_id, active, stamp, product_id)
+            )
+            stock.record(c, [stock.Movement(product_id, stock.today(), qty - (old_qty or 0), 'adjustment',
+                                            'products', product_id, 'edited')])
+            return product_id
+        cur = c.execute(
+            'INSERT INTO products (sku,name,description,category_id,cost_price,price,quantity,warehouse_id,'
+            'is_active,created_at,updated_at) VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+            (sku, name, description, category_id, cost, price, qty, warehouse_id, active, stamp, stamp)
+        )
+        stock.record(c, [stock.Movement(cur.lastrowid, stock.today(), qty, 'opening',
+                                        'products', cur.lastrowid)])
+        return cur.lastrowid
+
+
+def delete_product(product_id: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute('DELETE FROM products WHERE id=?', (product_id,))
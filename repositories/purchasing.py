@@ -0,0 +1,243 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from repositories import connection, now, stock
+
+OPEN_STATUSES = ('draft', 'ordered', 'partial')
+
+
+class OrderRow(NamedTuple):
+    id: int
+    po_no: str
+    supplier: str
+    order_date: str
+    expected_date: str
+    status: str
+    lines: int
+    qty_ordered: int
+    qty_received: int
+    total_cost: float
+
+
+class OrderLine(NamedTuple):
+    id: int
+    prod_id: int
+    sku: str
+    product: str
+    qty_ordered: int
+    qty_received: int
+    unit_cost: float
+
+
+class SuggestedLine(NamedTuple):
+    supplier_id: int
+    supplier: str
+    prod_id: int
+    qty: int
+    unit_cost: float
+
+
+# -- supplier price lists ----------------------------------------------------
+
+_UPSERT_PRICE = '''
+    INSERT INTO supplier_products (supplier_id, prod_id, supplier_sku, unit_cost, lead_time_days,
+                                   min_order_qty, is_preferred, created_at, updated_at, is_active)
+    VALUES (?,?,?,?,?,?,?,?,?,1)
+    ON CONFLICT(supplier_id, prod_id) DO UPDATE SET
+        supplier_sku=excluded.supplier_sku, unit_cost=excluded.unit_cost,
+        lead_time_days=excluded.lead_time_days, min_order_qty=excluded.min_order_qty,
+        is_preferred=excluded.is_preferred, updated_at=excluded.updated_at, is_active=1
+'''
+
+
+def save_prices(rows: Iterable[Sequence], conn=None) -> int:
+    # rows: (supplier_id, prod_id, supplier_sku, unit_cost, lead_time_days,
+    # min_order_qty, is_preferred); one executemany for a whole price list
+    stamp = now()
+    rows = [tuple(row) + (stamp, stamp) for row in rows]
+    with connection(conn) as c:
+        c.executemany(_UPSERT_PRICE, rows)
+    return len(rows)
+
+
+def supplier_prices(supplier_id: int, conn=None) -> List[tuple]:
+    with connection(conn) as c:
+        return c.execute(
+            'SELECT sp.prod_id, p.sku, p.name, sp.supplier_sku, sp.unit_cost, sp.lead_time_days, '
+            'sp.min_order_qty, sp.is_preferred FROM supplier_products sp '
+            'JOIN products p ON p.id = sp.prod_id '
+            'WHERE sp.supplier_id = ? AND sp.is_active = 1 ORDER BY p.name',
+            (supplier_id,)
+        ).fetchall()
+
+
+# -- orders --------------------------------------------------------------------
+
+def create_order(supplier_id: int, lines: Iterable[Tuple[int, int, Optional[float]]],
+                 order_date: str, expected_date: str = '', notes: str = '',
+                 status: str = 'draft', conn=None) -> int:
+    # lines: (prod_id, qty, unit_cost)
+    stamp = now()
+    with connection(conn) as c:
+        po_id = c.execute(
+            'INSERT INTO purchase_orders (supplier_id, order_date, expected_date, status, notes, '
+            'created_at, updated_at) VALUES (?,?,?,?,?,?,?)',
+            (supplier_id, order_date, expected_date, status, notes, stamp, stamp)
+        ).lastrowid
+        c.execute('UPDATE purchase_orders SET po_no=? WHERE id=?', (f"PO-{po_id:06d}", po_id))
+        c.executemany(
+            'INSERT INTO purchase_order_lines (po_id, prod_id, qty_ordered, unit_cost) VALUES (?,?,?,?)',
+            [(po_id, pid, qty, cost) for pid, qty, cost in lines]
+        )
+        return po_id
+
+
+def list_orders(status: Optional[Sequence[str]] = None, conn=None) -> List[OrderRow]:
+    where = ''
+    params: tuple = ()
+    if status:
+        where = f"WHERE o.status IN ({','.join('?' * len(status))})"
+        params = tuple(status)
+    with connection(conn) as c:
+        return [OrderRow(*row) for row in c.execute(f'''
+            SELECT o.id, o.po_no, s.name, o.order_date, o.expected_date, o.status,
+                   COUNT(l.id), COALESCE(SUM(l.qty_ordered), 0), COALESCE(SUM(l.qty_received), 0),
+                   COALESCE(SUM(l.qty_ordered * l.unit_cost), 0)
+            FROM purchase_orders o
+            JOIN suppliers s ON s.id = o.supplier_id
+            LEFT JOIN purchase_order_lines l ON l.po_id = o.id
+            {where}
+            GROUP BY o.id
+            ORDER BY o.id DESC
+        ''', params)]
+
+
+def order_lines(po_id: int, conn=None) -> List[OrderLine]:
+    with connection(conn) as c:
+        return [OrderLine(*row) for row in c.execute(
+            'SELECT l.id, l.prod_id, p.sku, p.name, l.qty_ordered, l.qty_received, l.unit_cost '
+            'FROM purchase_order_lines l JOIN products p ON p.id = l.prod_id '
+            'WHERE l.po_id = ? ORDER BY l.id',
+            (po_id,)
+        )]
+
+
+def set_status(po_id: int, status: str, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute('UPDATE purchase_orders SET status=?, updated_at=? WHERE id=?', (status, now(), po_id))
+
+
+def receive(po_id: int, quantities: Optional[Dict[int, int]] = None, received_date: str = '',
+            notes: str = '', conn=None) -> int:
+    # Books a goods receipt for a purchase order in one transaction: receipt
+    # lines, received quantities on the order lines and the stock increase,
+    # each as a single executemany. quantities maps order line id -> qty;
+    # None receives everything still outstanding. Returns units received.
+    stamp = now()
+    with connection(conn) as c:
+        status = c.execute('SELECT status FROM purchase_orders WHERE id=?', (po_id,)).fetchone()
+        if status is None:
+            raise ValueError(f"no purchase order {po_id}")
+        if status[0] not in OPEN_STATUSES:
+            raise ValueError(f"purchase order is {status[0]}")
+
+        outstanding = c.execute(
+            'SELECT id, prod_id, qty_ordered - qty_received FROM purchase_order_lines '
+            'WHERE po_id=? AND qty_received < qty_ordered',
+            (po_id,)
+        ).fetchall()
+        if quantities is None:
+            lines = outstanding
+        else:
+            lines = [(line_id, pid, min(quantities[line_id], left))
+                     for line_id, pid, left in outstanding if quantities.get(line_id, 0) > 0]
+        if not lines:
+            return 0
+
+        day = received_date or stamp[:10]
+        receipt_id = c.execute(
+            'INSERT INTO goods_receipts (po_id, received_date, notes, created_at) VALUES (?,?,?,?)',
+            (po_id, day, notes, stamp)
+        ).lastrowid
+        c.executemany(
+            'INSERT INTO goods_receipt_lines (receipt_id, po_line_id, prod_id, qty) VALUES (?,?,?,?)',
+            [(receipt_id, line_id, pid, qty) for line_id, pid, qty in lines]
+        )
+        c.executemany(
+            'UPDATE purchase_order_lines SET qty_received = qty_received + ? WHERE id = ?',
+            [(qty, line_id) for line_id, _, qty in lines]
+        )
+        per_product: Dict[int, int] = {}
+        for _, pid, qty in lines:
+            per_product[pid] = per_product.get(pid, 0) + qty
+        c.executemany(
+            'UPDATE products SET quantity = quantity + ?, updated_at = ? WHERE id = ?',
+            [(qty, stamp, pid) for pid, qty in per_product.items()]
+        )
+        stock.record(c, [stock.Movement(pid, day, qty, 'receipt', 'goods_receipts', receipt_id)
+                         for pid, qty in per_product.items()])
+        left = c.execute(
+            'SELECT COUNT(*) FROM purchase_order_lines WHERE po_id=? AND qty_received < qty_ordered',
+            (po_id,)
+        ).fetchone()[0]
+        c.execute('UPDATE purchase_orders SET status=?, updated_at=? WHERE id=?',
+                  ('partial' if left else 'received', stamp, po_id))
+        return sum(qty for _, _, qty in lines)
+
+
+# -- suggestions ---------------------------------------------------------------
+
+def suggest(needs: Dict[int, int], conn=None) -> Tuple[List[SuggestedLine], List[int]]:
+    # needs: prod_id -> units wanted. Picks one supplier per product (preferred,
+    # then cheapest, then quickest), less anything already on open orders,
+    # rounded up to the supplier's minimum, in a single query ordered by
+    # supplier. Returns the lines and the products no supplier carries.
+    with connection(conn) as c:
+        c.execute('CREATE TEMP TABLE IF NOT EXISTS reorder_needs (prod_id INTEGER PRIMARY KEY, qty INTEGER)')
+        c.execute('DELETE FROM temp.reorder_needs')
+        c.executemany('INSERT INTO temp.reorder_needs VALUES (?, ?)',
+                      [(pid, qty) for pid, qty in needs.items() if qty > 0])
+        rows = c.execute(f'''
+            WITH on_order AS (
+                SELECT l.prod_id, SUM(l.qty_ordered - l.qty_received) AS qty
+                FROM purchase_order_lines l
+                JOIN purchase_orders o ON o.id = l.po_id
+                WHERE o.status IN ({','.join('?' * len(OPEN_STATUSES))})
+                GROUP BY l.prod_id
+            ),
+            wanted AS (
+                SELECT n.prod_id, n.qty - COALESCE(oo.qty, 0) AS qty
+                FROM temp.reorder_needs n LEFT JOIN on_order oo ON oo.prod_id = n.prod_id
+            ),
+            ranked AS (
+                SELECT w.prod_id, w.qty, sp.supplier_id, s.name AS supplier, sp.unit_cost,
+                       sp.min_order_qty,
+                       ROW_NUMBER() OVER (PARTITION BY w.prod_id ORDER BY sp.is_preferred DESC,
+                                          sp.unit_cost, COALESCE(sp.lead_time_days, 1e9)) AS rank
+                FROM wanted w
+                JOIN supplier_products sp ON sp.prod_id = w.prod_id AND sp.is_active = 1
+                JOIN suppliers s ON s.id = sp.supplier_id AND s.is_active = 1
+                WHERE w.qty > 0
+            )
+            SELECT supplier_id, supplier, prod_id, MAX(qty, min_order_qty), unit_cost
+            FROM ranked WHERE rank = 1
+            ORDER BY supplier, prod_id
+        ''', OPEN_STATUSES).fetchall()
+        unsupplied = [r[0] for r in c.execute('''
+            SELECT n.prod_id FROM temp.reorder_needs n
+            WHERE NOT EXISTS (SELECT 1 FROM supplier_products sp
+                              JOIN suppliers s ON s.id = sp.supplier_id AND s.is_active = 1
+                              WHERE sp.prod_id = n.prod_id AND sp.is_active = 1)
+        ''')]
+        c.execute('DELETE FROM temp.reorder_needs')
+    return [SuggestedLine(*row) for row in rows], unsupplied
+
+
+def create_suggested_orders(lines: Sequence[SuggestedLine], order_date: str, conn=None) -> List[int]:
+    # one draft order per supplier, all in the same transaction
+    by_supplier: Dict[int, list] = {}
+    for line in lines:
+        by_supplier.setdefault(line.supplier_id, []).append((line.prod_id, line.qty, line.unit_cost))
+    with connection(conn) as c:
+        return [create_order(supplier_id, supplier_lines, order_date,
+                             notes="suggested from reorder points", conn=c)
+                for supplier_id, supplier_lines in by_supplier.items()]
@@ -0,0 +1,152 @@
+from array import array
+from datetime import date
+
+
+class Record:
+    # Fixed-layout rows: no per-instance __dict__, iterable so they can be
+    # handed straight to Treeview(values=...) or list()/tuple().
+    __slots__ = ()
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        fields = ', '.join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def _asdict(self):
+        return {n: getattr(self, n) for n in self.__slots__}
+
+
+class SaleRow(Record):
+    __slots__ = ('id', 'receipt_no', 'date', 'product', 'qty', 'cost', 'total',
+                 'notes', 'created_at', 'updated_at', 'is_active')
+
+    def __init__(self, id, receipt_no, date, product, qty, cost, total,
+                 notes, created_at, updated_at, is_active):
+        self.id = id
+        self.receipt_no = receipt_no
+        self.date = date
+        self.product = product
+        self.qty = qty
+        self.cost = cost
+        self.total = total
+        self.notes = notes
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.is_active = is_active
+
+
+class ProductRow(Record):
+    __slots__ = ('id', 'sku', 'name', 'description', 'category', 'cost_price', 'price',
+                 'quantity', 'warehouse', 'active', 'created_at', 'updated_at')
+
+    def __init__(self, id, sku, name, description, category, cost_price, price,
+                 quantity, warehouse, active, created_at, updated_at):
+        self.id = id
+        self.sku = sku
+        self.name = name
+        self.description = description
+        self.category = category
+        self.cost_price = cost_price
+        self.price = price
+        self.quantity = quantity
+        self.warehouse = warehouse
+        self.active = active
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class InventoryRow(Record):
+    __slots__ = ('id', 'name', 'category', 'price', 'quantity', 'damaged', 'sold')
+
+    def __init__(self, id, name, category, price, quantity, damaged, sold):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.price = price
+        self.quantity = quantity
+        self.damaged = damaged
+        self.sold = sold
+
+
+def sale_rows(cursor):
+    # Dates, product names, notes and timestamps repeat heavily across sales;
+    # share one string object per distinct value instead of one per row.
+    pool = {}
+    share = pool.setdefault
+    return [
+        SaleRow(sid, receipt, share(day, day), share(product, product), qty, cost, total,
+                share(notes, notes), share(created, created), share(updated, updated), active)
+        for sid, receipt, day, product, qty, cost, total, notes, created, updated, active in cursor
+    ]
+
+
+class SalesColumns:
+    # Column-per-array store for bulk sales history: ~21 bytes per row
+    # instead of a Python object per row. Dates are kept as proleptic
+    # Gregorian ordinals so they can be bucketed without parsing strings.
+    __slots__ = ('id', 'day', 'prod_id', 'qty', 'is_active')
+
+    def __init__(self):
+        self.id = array('q')
+        self.day = array('i')
+        self.prod_id = array('i')
+        self.qty = array('i')
+        self.is_active = array('b')
+
+    def __len__(self):
+        return len(self.id)
+
+    def append(self, sale_id, day, prod_id, qty, is_active):
+        self.id.append(sale_id)
+        self.day.append(_ordinal(day))
+        self.prod_id.append(prod_id)
+        self.qty.append(qty)
+        self.is_active.append(1 if is_active else 0)
+
+    def extend(self, rows):
+        # rows of (id, day ordinal, prod_id, qty, is_active), all ints
+        rows = list(rows)
+        if not rows:
+            return
+        ids, days, pids, qtys, actives = zip(*rows)
+        self.id.extend(ids)
+        self.day.extend(days)
+        self.prod_id.extend(pids)
+        self.qty.extend(qtys)
+        self.is_active.extend(actives)
+
+    def __getitem__(self, i):
+        return (self.id[i], date.fromordinal(self.day[i]).isoformat(), self.prod_id[i],
+                self.qty[i], self.is_active[i])
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.id, self.day, self.prod_id, self.qty, self.is_active))
+
+
+_ordinal_cache = {}
+
+
+def _ordinal(day) -> int:
+    if isinstance(day, int):
+        return day
+    try:
+        return _ordinal_cache[day]
+    except KeyError:
+        value = date.fromisoformat(day[:10]).toordinal() if day else 0
+        if len(_ordinal_cache) < 100000:
+            _ordinal_cache[day] = value
+        return value
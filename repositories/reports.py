@@ -0,0 +1,97 @@
+from typing import Iterator, List, NamedTuple
+
+from repositories import chunks, connection
+
+
+class ReportRow(NamedTuple):
+    product: str
+    total_qty: int
+    total_cost: float
+    total_sales: float
+
+
+def years(conn=None) -> List[str]:
+    with connection(conn) as c:
+        return [r[0] for r in c.execute(
+            "SELECT strftime('%Y', date) FROM sales"
+            " UNION SELECT substr(month, 1, 4) FROM sales_archived ORDER BY 1 DESC"
+        )]
+
+
+def _summary_query(year: str, month: str):
+    month_clause = "AND strftime('%m', date)=?" if month != 'All' else ''
+    params = [year, month] if month != 'All' else [year]
+    # archived months come from their per-product rollup
+    first, last = (f"{year}-{month}", f"{year}-{month}") if month != 'All' else (f"{year}-01", f"{year}-12")
+    sql = f"""
+        SELECT
+          p.name AS product,
+          SUM(s.qty) AS total_qty,
+          SUM(s.qty * p.cost_price) AS total_cost,
+          SUM(s.qty * p.price) AS total_sales
+        FROM (
+          SELECT prod_id, qty FROM sales
+          WHERE strftime('%Y', date)=?
+            {month_clause}
+            AND is_active = 1
+          UNION ALL
+          SELECT prod_id, qty FROM sales_archived
+          WHERE month BETWEEN ? AND ? AND is_active = 1
+        ) s
+        JOIN products p ON s.prod_id = p.id
+        WHERE p.is_active = 1
+        GROUP BY p.name
+        ORDER BY p.name
+    """
+    return sql, params + [first, last]
+
+
+def product_summary(year: str, month: str = 'All', conn=None) -> List[ReportRow]:
+    sql, params = _summary_query(year, month)
+    with connection(conn) as c:
+        return [ReportRow(*row) for row in c.execute(sql, params)]
+
+
+def iter_product_summary(year: str, month: str = 'All', chunk: int = 2000,
+                         conn=None) -> Iterator[List[tuple]]:
+    sql, params = _summary_query(year, month)
+    with connection(conn) as c:
+        yield from chunks(c.execute(sql, params), chunk)
+
+
+def sales_id_range(conn=None):
+    with connection(conn) as c:
+        return c.execute("SELECT MIN(id), MAX(id) FROM sales").fetchone()
+
+
+def monthly_quantities(first_id: int, last_id: int, start: str, end: str,
+                       conn=None) -> List[tuple]:
+    # (month, prod_id, qty) for active sales in an id slice and [start, end);
+    # cost and sales follow from qty since prices are per product
+    with connection(conn) as c:
+        return c.execute("""
+            SELECT substr(date, 1, 7), prod_id, SUM(qty)
+            FROM sales
+            WHERE id BETWEEN ? AND ?
+              AND date >= ? AND date < ?
+              AND is_active = 1
+            GROUP BY 1, 2
+        """, (first_id, last_id, start, end)).fetchall()
+
+
+def archived_quantities(start: str, end: str, conn=None) -> List[tuple]:
+    # (month, prod_id, qty) of active archived sales in [start, end), the
+    # rollup counterpart of monthly_quantities
+    with connection(conn) as c:
+        return c.execute("""
+            SELECT month, prod_id, qty FROM sales_archived
+            WHERE month >= substr(?, 1, 7) AND month < substr(?, 1, 7) AND is_active = 1
+        """, (start, end)).fetchall()
+
+
+def active_prices(conn=None) -> List[tuple]:
+    # (id, name, cost_price, price) of the products the reports include
+    with connection(conn) as c:
+        return c.execute(
+            'SELECT id, name, cost_price, price FROM products WHERE is_active = 1'
+        ).fetchall()
@@ -0,0 +1,165 @@
+from typing import Iterator, List, Optional
+
+from repositories import archive, chunks, connection, now, stock
+from repositories.records import SaleRow, SalesColumns, sale_rows
+
+
+def _sales_filter(term: str, start: str, end: str, active: Optional[bool],
+                  product_clause: str = "p.name LIKE ?"):
+    where = [product_clause]
+    params = [f"%{term}%"]
+
+    if start and end:
+        where += ["s.date BETWEEN ? AND ?"]
+        params += [start, end]
+    elif start:
+        where += ["s.date >= ?"]
+        params += [start]
+    elif end:
+        where += ["s.date <= ?"]
+        params += [end]
+
+    if active is not None:
+        where += ["s.is_active = ?"]
+        params += [1 if active else 0]
+
+    return ' AND '.join(where), params
+
+
+_SALES_SQL = """
+        SELECT s.id, s.receipt_no, s.date, p.name, s.qty, p.cost_price,
+               (s.qty * p.price) AS total,
+               s.notes, s.created_at, s.updated_at, s.is_active
+          FROM {source} s
+          JOIN products p ON s.prod_id = p.id
+         WHERE {where}
+      ORDER BY s.date DESC
+"""
+
+
+def list_sales(term: str = '', start: str = '', end: str = '',
+               active: Optional[bool] = None, conn=None) -> List[SaleRow]:
+    where, params = _sales_filter(term, start, end, active)
+    with connection(conn) as c:
+        source = archive.sales_source(c, start)
+        return sale_rows(c.execute(_SALES_SQL.format(source=source, where=where), params))
+
+
+def count_sales(term: str = '', start: str = '', end: str = '',
+                active: Optional[bool] = None, conn=None) -> int:
+    where, params = _sales_filter(term, start, end, active)
+    with connection(conn) as c:
+        source = archive.sales_source(c, start)
+        return c.execute(
+            f"SELECT COUNT(*) FROM {source} s JOIN products p ON s.prod_id = p.id WHERE {where}", params
+        ).fetchone()[0]
+
+
+def iter_sales(term: str = '', start: str = '', end: str = '', active: Optional[bool] = None,
+               chunk: int = 2000, conn=None) -> Iterator[List[tuple]]:
+    # Same rows as list_sales, as plain tuples in batches, for exports.
+    where, params = _sales_filter(term, start, end, active)
+    with connection(conn) as c:
+        source = archive.sales_source(c, start)
+        yield from chunks(c.execute(_SALES_SQL.format(source=source, where=where), params), chunk)
+
+
+def iter_sale_records(term: str = '', start: str = '', end: str = '', active: Optional[bool] = None,
+                      chunk: int = 50000, conn=None) -> Iterator[List[tuple]]:
+    # Bulk variant for data exports: sales columns only, in id order (walks the
+    # primary key, no sort), with product fields left to the caller:
+    # (id, receipt_no, date, prod_id, qty, notes, created_at, updated_at, is_active)
+    # unary + keeps the planner on the rowid scan instead of probing
+    # idx_sales_prod_qty per product and sorting the whole result afterwards
+    where, params = _sales_filter(term, start, end, active,
+                                  "+s.prod_id IN (SELECT id FROM products p WHERE p.name LIKE ?)")
+    sql = """
+        SELECT s.id, s.receipt_no, s.date, s.prod_id, s.qty, s.notes,
+               s.created_at, s.updated_at, s.is_active
+          FROM {source} s
+         WHERE {where}
+      ORDER BY s.id
+    """
+    with connection(conn) as c:
+        source = archive.sales_source(c, start)
+        yield from chunks(c.execute(sql.format(source=source, where=where), params), chunk)
+
+
+def add_sale(receipt_no: str, date: str, prod_id: int, qty: int, notes: str,
+             is_active: int, conn=None) -> int:
+    stamp = now()
+    with connection(conn) as c:
+        cur = c.execute(
+            'INSERT INTO sales (receipt_no, date, prod_id, qty, notes, '
+            'created_at, updated_at, is_active) VALUES (?,?,?,?,?,?,?,?)',
+            (receipt_no, date, prod_id, qty, notes, stamp, stamp, is_active)
+        )
+        c.execute(
+            'UPDATE products SET quantity = quantity - ?, updated_at = ? WHERE id = ?',
+            (qty, stamp, prod_id)
+        )
+        stock.record(c, [stock.Movement(prod_id, date or stock.today(), -qty, 'sale',
+                                        'sales', cur.lastrowid)])
+        return cur.lastrowid
+
+
+def update_sale(sale_id: int, receipt_no: str, qty: int, notes: str,
+                is_active: int, conn=None) -> None:
+    stamp = now()
+    with connection(conn) as c:
+        row = c.execute('SELECT qty, prod_id, date FROM sales WHERE id = ?', (sale_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Sale {sale_id} is archived or no longer exists")
+        old_qty, old_pid, date = row
+
+        diff = qty - old_qty
+        if diff != 0:
+            c.execute(
+                'UPDATE products SET quantity = quantity - ?, updated_at = ? WHERE id = ?',
+                (diff, stamp, old_pid)
+            )
+            stock.record(c, [stock.Movement(old_pid, date or stock.today(), -diff, 'sale',
+                                            'sales', sale_id, 'edited')])
+
+        c.execute(
+            'UPDATE sales SET receipt_no = ?, qty = ?, notes = ?, is_active = ?, updated_at = ? '
+            'WHERE id = ?',
+            (receipt_no, qty, notes, is_active, stamp, sale_id)
+        )
+
+
+def delete_sale(sale_id: int, conn=None) -> None:
+    # the sold units go back on the shelf, like lowering the qty to zero
+    with connection(conn) as c:
+        row = c.execute('SELECT qty, prod_id, date FROM sales WHERE id = ?', (sale_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Sale {sale_id} is archived or no longer exists")
+        c.execute('DELETE FROM sales WHERE id = ?', (sale_id,))
+        if row and row[0]:
+            qty, pid, date = row
+            c.execute('UPDATE products SET quantity = quantity + ?, updated_at = ? WHERE id = ?',
+                      (qty, now(), pid))
+            stock.record(c, [stock.Movement(pid, date or stock.today(), qty, 'sale',
+                                            'sales', sale_id, 'deleted')])
+
+
+# day ordinal computed by SQLite (julianday of 0001-01-01 is 1721424.5);
+# unparseable dates and missing values load as 0
+COLUMNS_SQL = (
+    'SELECT id, IFNULL(CAST(julianday(date) - 1721424.5 AS INTEGER), 0), '
+    'IFNULL(prod_id, 0), IFNULL(qty, 0), CASE WHEN is_active THEN 1 ELSE 0 END FROM sales'
+)
+
+
+def load_columns(after_id: int = 0, columns: Optional[SalesColumns] = None,
+                 chunk: int = 50000, conn=None) -> SalesColumns:
+    # Bulk-load (or extend) the columnar sales cache with rows newer than after_id.
+    columns = columns if columns is not None else SalesColumns()
+    with connection(conn) as c:
+        cur = c.execute(COLUMNS_SQL + ' WHERE id > ? ORDER BY id', (after_id,))
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            columns.extend(rows)
+    return columns
@@ -0,0 +1,160 @@
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from repositories import connection, now
+
+KINDS = ('opening', 'sale', 'damage', 'receipt', 'transfer', 'adjustment')
+
+
+class Movement(NamedTuple):
+    prod_id: int
+    moved_at: str
+    qty: int
+    kind: str
+    ref_table: Optional[str] = None
+    ref_id: Optional[int] = None
+    note: str = ''
+
+
+class Discrepancy(NamedTuple):
+    prod_id: int
+    name: str
+    quantity: int
+    ledger: int
+
+
+def today() -> str:
+    return date.today().isoformat()
+
+
+def _shift_snapshots(c, changes: Iterable[Sequence]) -> None:
+    # changes: (prod_id, moved_at, qty). Snapshots on or after a backdated
+    # movement's date move by the same amount, so they stay exact without a
+    # rebuild.
+    latest = c.execute('SELECT MAX(snapshot_date) FROM stock_snapshots').fetchone()[0]
+    if latest is not None:
+        c.executemany(
+            'UPDATE stock_snapshots SET qty = qty + ? WHERE prod_id = ? AND snapshot_date >= ?',
+            [(qty, pid, day) for pid, day, qty in changes if day <= latest]
+        )
+
+
+def record(c, movements: Iterable[Movement]) -> int:
+    # Append movements on the caller's connection, inside its transaction.
+    rows = [tuple(m) for m in movements if m.qty]
+    if not rows:
+        return 0
+    stamp = now()
+    c.executemany(
+        'INSERT INTO stock_movements (prod_id, moved_at, qty, kind, ref_table, ref_id, note, created_at) '
+        'VALUES (?,?,?,?,?,?,?,?)',
+        [r + (stamp,) for r in rows]
+    )
+    _shift_snapshots(c, (r[:3] for r in rows))
+    return len(rows)
+
+
+def record_select(c, select_sql: str, params: Sequence = ()) -> int:
+    # Set-based variant for bulk writers: select_sql yields
+    # (prod_id, moved_at, qty, kind, ref_table, ref_id, note) rows.
+    moves = f'WITH m (prod_id, moved_at, qty, kind, ref_table, ref_id, note) AS ({select_sql}) '
+    if c.execute('SELECT 1 FROM stock_snapshots LIMIT 1').fetchone():
+        _shift_snapshots(c, c.execute(
+            moves + 'SELECT prod_id, moved_at, SUM(qty) FROM m GROUP BY 1, 2', params
+        ).fetchall())
+    return c.execute(
+        moves + 'INSERT INTO stock_movements (prod_id, moved_at, qty, kind, ref_table, ref_id, note, created_at) '
+        'SELECT *, ? FROM m WHERE qty != 0',
+        tuple(params) + (now(),)
+    ).rowcount
+
+
+def history(prod_id: int, start: str = '', end: str = '', conn=None) -> List[tuple]:
+    # (id, moved_at, qty, kind, ref_table, ref_id, note) oldest first
+    with connection(conn) as c:
+        return c.execute(
+            'SELECT id, moved_at, qty, kind, ref_table, ref_id, note FROM stock_movements '
+            'WHERE prod_id = ? AND moved_at >= ? AND moved_at <= ? ORDER BY moved_at, id',
+            (prod_id, start or '0000', end or '9999')
+        ).fetchall()
+
+
+def _base(c, as_of: str) -> Optional[str]:
+    return c.execute('SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date <= ?',
+                     (as_of,)).fetchone()[0]
+
+
+_BALANCES = '''
+    SELECT prod_id, SUM(qty) AS qty FROM (
+        SELECT prod_id, qty FROM stock_snapshots WHERE snapshot_date = :base
+        UNION ALL
+        SELECT prod_id, qty FROM stock_movements
+        WHERE moved_at > COALESCE(:base, '') AND moved_at <= :as_of
+    ) GROUP BY prod_id
+'''
+
+
+def stock_on(as_of: str, conn=None) -> Dict[int, int]:
+    # prod_id -> units on hand at the end of as_of: the latest snapshot on or
+    # before that date plus the movements between the two
+    with connection(conn) as c:
+        base = _base(c, as_of)
+        return dict(c.execute(_BALANCES, {'base': base, 'as_of': as_of}))
+
+
+def product_stock_on(prod_id: int, as_of: str, conn=None) -> int:
+    with connection(conn) as c:
+        base = _base(c, as_of)
+        snap = c.execute('SELECT qty FROM stock_snapshots WHERE snapshot_date = ? AND prod_id = ?',
+                         (base, prod_id)).fetchone() if base else None
+        moved = c.execute(
+            'SELECT TOTAL(qty) FROM stock_movements WHERE prod_id = ? AND moved_at > ? AND moved_at <= ?',
+            (prod_id, base or '', as_of)
+        ).fetchone()[0]
+        return (snap[0] if snap else 0) + int(moved)
+
+
+def take_snapshot(as_of: Optional[str] = None, conn=None) -> int:
+    # Balances at the end of as_of (default today), rolled forward from the
+    # previous snapshot in one statement. Returns the number of rows written.
+    as_of = as_of or today()
+    with connection(conn) as c:
+        base = _base(c, as_of)
+        if base == as_of:
+            base = c.execute('SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date < ?',
+                             (as_of,)).fetchone()[0]
+        c.execute('DELETE FROM stock_snapshots WHERE snapshot_date = ?', (as_of,))
+        return c.execute(
+            'INSERT INTO stock_snapshots (snapshot_date, prod_id, qty) '
+            f'SELECT :as_of, * FROM ({_BALANCES})',
+            {'base': base, 'as_of': as_of}
+        ).rowcount
+
+
+def prune_snapshots(keep_after: str, conn=None) -> int:
+    # drop snapshots older than keep_after, keeping the newest of those so
+    # balances before keep_after still start from a snapshot
+    with connection(conn) as c:
+        anchor = _base(c, keep_after)
+        return c.execute('DELETE FROM stock_snapshots WHERE snapshot_date < ?',
+                         (anchor or keep_after,)).rowcount
+
+
+def reconcile(fix: bool = False, conn=None) -> List[Discrepancy]:
+    # Products whose quantity disagrees with the ledger, in one set-based
+    # query. fix=True posts adjustments so the ledger matches the products.
+    with connection(conn) as c:
+        latest = today()
+        base = _base(c, latest)
+        latest = max(latest, c.execute('SELECT MAX(moved_at) FROM stock_movements').fetchone()[0] or latest)
+        rows = [Discrepancy(*row) for row in c.execute(f'''
+            SELECT p.id, p.name, p.quantity, COALESCE(l.qty, 0)
+            FROM products p
+            LEFT JOIN ({_BALANCES}) l ON l.prod_id = p.id
+            WHERE COALESCE(p.quantity, 0) != COALESCE(l.qty, 0)
+            ORDER BY p.id
+        ''', {'base': base, 'as_of': latest})]
+        if fix and rows:
+            record(c, [Movement(r.prod_id, today(), (r.quantity or 0) - r.ledger, 'adjustment',
+                                note='reconciled to product quantity') for r in rows])
+        return rows
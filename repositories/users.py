@@ -0,0 +1,83 @@
+import string
+from typing import List, Optional
+
+import database
+from auth import hash_password
+from repositories import connection
+
+# SQLite's NOCASE collation only folds ASCII letters; prefixes are folded the
+# same way so the range bounds match what the indexes compare
+_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def columns(conn=None) -> List[str]:
+    with connection(conn) as c:
+        return database.table_columns(c, 'users')
+
+
+def display_columns(conn=None) -> List[str]:
+    cols = columns(conn)
+    for extra in ('created_at', 'updated_at'):
+        if extra not in cols:
+            cols.append(extra)
+    return cols
+
+
+def _prefix(column: str, prefix: str, params: list) -> str:
+    # column starts with prefix, as a range the NOCASE index can seek; the
+    # upper bound appends the highest character rather than bumping the last
+    # one, which NOCASE could fold back into range ('@' + 1 is 'A', i.e. 'a')
+    low = prefix.translate(_FOLD)
+    params += [low, low + chr(0x10FFFF)]
+    return f"({column} COLLATE NOCASE >= ? AND {column} COLLATE NOCASE < ?)"
+
+
+def search_users(term: str = '', conn=None) -> List[tuple]:
+    # term is a prefix of the username, first or last name; "first last"
+    # matches both names
+    with connection(conn) as c:
+        phys_cols = columns(c)
+        select_parts = phys_cols.copy()
+        for extra in ('created_at', 'updated_at'):
+            if extra in phys_cols:
+                select_parts.append(f"COALESCE({extra}, '') as {extra}")
+            else:
+                select_parts.append(f"'' as {extra}")
+        sql = f"SELECT {', '.join(select_parts)} FROM users"
+        params = []
+        words = term.split()
+        if len(words) > 1:
+            sql += (f" WHERE {_prefix('first_name', words[0], params)}"
+                    f" AND {_prefix('last_name', ' '.join(words[1:]), params)}")
+        elif words:
+            sql += " WHERE " + " OR ".join(_prefix(col, words[0], params)
+                                          for col in ('username', 'first_name', 'last_name'))
+        return c.execute(sql, params).fetchall()
+
+
+def add_user(first_name: str, last_name: str, username: str, password: str, role: str,
+             is_active: int, conn=None) -> int:
+    with connection(conn) as c:
+        cur = c.execute(
+            "INSERT INTO users (first_name, last_name, username, password, role, is_active) VALUES (?,?,?,?,?,?)",
+            (first_name, last_name, username, hash_password(password), role, is_active)
+        )
+        return cur.lastrowid
+
+
+def update_user(user_id: int, first_name: str, last_name: str, username: str, role: str,
+                is_active: int, password: Optional[str] = None, conn=None) -> None:
+    parts = ["first_name=?", "last_name=?", "username=?", "role=?", "is_active=?"]
+    params = [first_name, last_name, username, role, is_active]
+    if password:
+        parts.insert(3, "password=?")
+        params.insert(3, hash_password(password))
+    parts.append("updated_at=strftime('%Y-%m-%d %H:%M:%S','now')")
+    params.append(user_id)
+    with connection(conn) as c:
+        c.execute(f"UPDATE users SET {', '.join(parts)} WHERE id=?", params)
+
+
+def delete_user(user_id: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute('DELETE FROM users WHERE id=?', (user_id,))
@@ -0,0 +1,139 @@
+from typing import List, NamedTuple, Optional
+
+from repositories import connection, now, stock
+
+
+class WarehouseRow(NamedTuple):
+    id: int
+    name: str
+    location: str
+    capacity: int
+    stock_units: int
+    created_at: str
+    updated_at: str
+    is_active: int
+
+
+def list_warehouses(term: str = '', conn=None) -> List[WarehouseRow]:
+    like = f"%{term}%"
+    query = (
+        "SELECT w.id, w.name, w.location, w.capacity, COALESCE(u.units, 0), w.created_at, w.updated_at, "
+        "w.is_active FROM warehouses w LEFT JOIN warehouse_usage u ON u.warehouse_id = w.id "
+        "WHERE w.name LIKE ? OR w.location LIKE ? ORDER BY w.id"
+    )
+    with connection(conn) as c:
+        return [WarehouseRow(*row) for row in c.execute(query, (like, like))]
+
+
+def active_names(conn=None) -> List[str]:
+    with connection(conn) as c:
+        return [r[0] for r in c.execute('SELECT name FROM warehouses WHERE is_active=1')]
+
+
+def active_choices(conn=None) -> List[tuple]:
+    with connection(conn) as c:
+        return c.execute('SELECT id, name FROM warehouses WHERE is_active=1').fetchall()
+
+
+def warehouse_id(name: str, conn=None) -> Optional[int]:
+    with connection(conn) as c:
+        row = c.execute('SELECT id FROM warehouses WHERE name=? AND is_active=1', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def add_warehouse(name: str, location: str, capacity: int, is_active: int, conn=None) -> int:
+    stamp = now()
+    with connection(conn) as c:
+        cur = c.execute(
+            'INSERT INTO warehouses(name, location, capacity, created_at, updated_at, is_active) '
+            'VALUES(?,?,?,?,?,?)',
+            (name, location, capacity, stamp, stamp, is_active)
+        )
+        return cur.lastrowid
+
+
+def update_warehouse(warehouse_id: int, name: str, location: str, capacity: int,
+                     is_active: int, conn=None) -> None:
+    with connection(conn) as c:
+        c.execute(
+            'UPDATE warehouses SET name=?, location=?, capacity=?, updated_at=?, is_active=? WHERE id=?',
+            (name, location, capacity, now(), is_active, warehouse_id)
+        )
+
+
+class LocationStock(NamedTuple):
+    product_id: int
+    sku: str
+    product: str
+    warehouse_id: int
+    warehouse: str
+    qty: int
+
+
+_LOCATION_SQL = '''
+    SELECT ps.product_id, p.sku, p.name, ps.warehouse_id, w.name, ps.qty
+    FROM product_stock ps
+    JOIN products p ON p.id = ps.product_id
+    JOIN warehouses w ON w.id = ps.warehouse_id
+'''
+
+
+def warehouse_stock(warehouse_id: int, conn=None) -> List[LocationStock]:
+    # one warehouse's products through idx_product_stock_warehouse
+    with connection(conn) as c:
+        return [LocationStock(*row) for row in c.execute(
+            _LOCATION_SQL + 'WHERE ps.warehouse_id = ? AND ps.qty != 0 ORDER BY ps.product_id',
+            (warehouse_id,)
+        )]
+
+
+def product_locations(product_id: int, conn=None) -> List[LocationStock]:
+    with connection(conn) as c:
+        return [LocationStock(*row) for row in c.execute(
+            _LOCATION_SQL + 'WHERE ps.product_id = ? AND ps.qty != 0 ORDER BY w.name',
+            (product_id,)
+        )]
+
+
+def transfer(product_id: int, from_id: int, to_id: int, qty: int, transfer_date: str = '',
+             notes: str = '', conn=None) -> int:
+    # Moves qty units between two warehouses in one transaction; the total on
+    # products is unchanged. Refuses to take more than the source holds or to
+    # fill the destination past its capacity. Returns the transfer id.
+    if qty <= 0:
+        raise ValueError("transfer quantity must be positive")
+    if from_id == to_id:
+        raise ValueError("source and destination are the same warehouse")
+    day = transfer_date or stock.today()
+    with connection(conn) as c:
+        # the write opens the transaction, so the capacity read below is current
+        taken = c.execute(
+            'UPDATE product_stock SET qty = qty - ? WHERE product_id = ? AND warehouse_id = ? AND qty >= ?',
+            (qty, product_id, from_id, qty)
+        ).rowcount
+        if not taken:
+            raise ValueError("not enough stock at the source warehouse")
+        dest = c.execute(
+            'SELECT w.capacity, COALESCE(u.units, 0), w.is_active FROM warehouses w '
+            'LEFT JOIN warehouse_usage u ON u.warehouse_id = w.id WHERE w.id=?',
+            (to_id,)
+        ).fetchone()
+        if dest is None or not dest[2]:
+            raise ValueError("destination warehouse is not active")
+        if dest[1] + qty > dest[0]:
+            raise ValueError(f"destination has room for {max(0, dest[0] - dest[1]):,} units")
+        c.execute(
+            'INSERT INTO product_stock (product_id, warehouse_id, qty) VALUES (?,?,?) '
+            'ON CONFLICT(product_id, warehouse_id) DO UPDATE SET qty = qty + excluded.qty',
+            (product_id, to_id, qty)
+        )
+        transfer_id = c.execute(
+            'INSERT INTO stock_transfers (prod_id, from_warehouse_id, to_warehouse_id, qty, transfer_date, '
+            'notes, created_at) VALUES (?,?,?,?,?,?,?)',
+            (product_id, from_id, to_id, qty, day, notes, now())
+        ).lastrowid
+        stock.record(c, [
+            stock.Movement(product_id, day, -qty, 'transfer', 'stock_transfers', transfer_id, f"out of {from_id}"),
+            stock.Movement(product_id, day, qty, 'transfer', 'stock_transfers', transfer_id, f"into {to_id}"),
+        ])
+        return transfer_id
@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import analytics
+import database
+import maintenance
+from jobs import Cancelled
+
+# Retention for soft-deleted rows. A row that has been inactive (is_active = 0,
+# untouched since) for longer than its table's policy is removed, BATCH rows
+# per transaction so the tills are never locked out for long. Inactive sales
+# are summed into sales_archived first, as archiving.py does for whole
+# months, so the dashboard totals and the analytics history that still count
+# them do not change. Tables whose inactive rows are still counted somewhere
+# without such a rollup (damage_products: the inventory's damaged column) are
+# not purged, and reference data only goes once nothing points at it.
+
+BATCH = 2000
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class Policy(NamedTuple):
+    days: int
+    keep: str = ''                                # rows that stay however long inactive
+    referenced_by: Tuple[Tuple[str, str], ...] = ()   # (table, column) holding a row in place
+
+
+_PRODUCT_REFERENCES = tuple((t, 'prod_id') for t in (
+    'sales', 'sales_archived', 'damage_products', 'stock_movements', 'stock_snapshots',
+    'stock_transfers', 'purchase_order_lines', 'goods_receipt_lines', 'supplier_products'))
+
+# in purge order: supplier prices go before the products they point at
+POLICIES: Dict[str, Policy] = {
+    'sales': Policy(365, keep="prod_id IS NULL OR date IS NULL OR date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'"),
+    'expenses': Policy(365),
+    'debts': Policy(365),
+    'supplier_products': Policy(180),
+    # total_quantity counts inactive products' stock, so only empty ones go
+    'products': Policy(730, keep='quantity != 0', referenced_by=_PRODUCT_REFERENCES),
+}
+
+
+class PurgeResult(NamedTuple):
+    table: str
+    cutoff: str
+    rows: int
+    # dry run: pages the rows take up (reclaimable by VACUUM); otherwise the
+    # pages that came free, which incremental vacuum hands back
+    pages: int
+    dry_run: bool
+
+
+def _exists(c: sqlite3.Connection, table: str) -> bool:
+    return c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def _where(c: sqlite3.Connection, table: str, policy: Policy) -> str:
+    parts = ['is_active = 0', 'updated_at < ?']
+    if policy.keep:
+        parts.append(f'NOT ({policy.keep})')
+    parts += [f'NOT EXISTS (SELECT 1 FROM {ref} WHERE {ref}.{col} = {table}.id)'
+              for ref, col in policy.referenced_by if _exists(c, ref)]
+    return ' AND '.join(parts)
+
+
+def _pages(c: sqlite3.Connection, table: str, rows: int) -> int:
+    # the table's and its indexes' pages, pro rata; 0 without the dbstat table
+    total = c.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    if not rows or not total:
+        return 0
+    names = [table] + [r[1] for r in c.execute(f'PRAGMA index_list({table})')]
+    try:
+        pages = c.execute(f"SELECT COUNT(*) FROM dbstat WHERE name IN ({', '.join('?' * len(names))})",
+                          names).fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    return round(pages * rows / total)
+
+
+def _roll_up_sales(c: sqlite3.Connection, where: str, params: tuple) -> None:
+    c.execute(f'''
+        INSERT INTO sales_archived (month, prod_id, is_active, qty, lines)
+        SELECT substr(date, 1, 7), prod_id, 0, IFNULL(SUM(qty), 0), COUNT(*) FROM sales WHERE {where}
+        GROUP BY 1, 2
+        ON CONFLICT(month, prod_id, is_active) DO UPDATE SET
+            qty = qty + excluded.qty, lines = lines + excluded.lines
+    ''', params)
+
+
+def purge(tables: Optional[List[str]] = None, days: Optional[int] = None, dry_run: bool = False,
+          batch: int = BATCH, compact: bool = True, today: Optional[datetime] = None,
+          progress: Progress = None, cancel: Optional[threading.Event] = None) -> List[PurgeResult]:
+    # days overrides every policy's retention; compact hands the freed pages
+    # back to the file system afterwards
+    tables = [t for t in POLICIES if tables is None or t in tables]
+    today = today or datetime.now()
+    conn = database.get_connection()
+    results = []
+    sales_purged = False
+    try:
+        outbox = _exists(conn, 'change_outbox')
+        for done, table in enumerate(tables):
+            policy = POLICIES[table]
+            if not _exists(conn, table):
+                continue
+            cutoff = (today - timedelta(days=policy.days if days is None else days)).strftime('%Y-%m-%d %H:%M:%S')
+            where = _where(conn, table, policy)
+            if dry_run:
+                rows = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', (cutoff,)).fetchone()[0]
+                results.append(PurgeResult(table, cutoff, rows, _pages(conn, table, rows), True))
+            else:
+                free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                rows = last = 0
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        raise Cancelled()
+                    with conn:
+                        ids = [r[0] for r in conn.execute(
+                            f'SELECT id FROM {table} WHERE id > ? AND {where} ORDER BY id LIMIT ?',
+                            (last, cutoff, batch))]
+                        if not ids:
+                            break
+                        # the batch is exactly the matching rows up to its last id
+                        part, params = f'id > ? AND id <= ? AND {where}', (last, ids[-1], cutoff)
+                        last = ids[-1]
+                        mark = conn.execute('SELECT IFNULL(MAX(seq), 0) FROM change_outbox').fetchone()[0] \
+                            if outbox else 0
+                        if table == 'sales':
+                            _roll_up_sales(conn, part, params)
+                        rows += conn.execute(f'DELETE FROM {table} WHERE {part}', params).rowcount
+                        if table == 'sales' and outbox:
+                            # head office keeps its copy, as with archived sales
+                            conn.execute("DELETE FROM change_outbox WHERE seq > ? AND table_name = 'sales' "
+                                         "AND op = 'delete'", (mark,))
+                sales_purged = sales_purged or (table == 'sales' and rows > 0)
+                free = conn.execute('PRAGMA freelist_count').fetchone()[0] - free_before
+                results.append(PurgeResult(table, cutoff, rows, max(free, 0), False))
+            if progress:
+                progress(done + 1, len(tables))
+        if compact and not dry_run and any(r.rows for r in results):
+            maintenance.incremental_vacuum(conn, pages=0)
+    finally:
+        conn.close()
+        if sales_purged:
+            # the cached history still holds the purged rows as sales
+            analytics.invalidate()
+    return results
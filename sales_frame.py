@@ -7,10 +7,15 @@ from ttkbootstrap.widgets import DateEntry, Checkbutton
 from ttkbootstrap.toast import ToastNotification
 from tkinter import IntVar
 
-from fpdf import FPDF
-from database import get_connection
+import exports
+from export_dialog import ExportDialog, ask_data_path
+from import_dialog import ImportDialog, ask_import_path
+import api_client
 from report_frame import ReportFrame
 
+products = api_client.backend('products')
+sales = api_client.backend('sales')
+
 
 class SalesFrame(Frame):
     def __init__(self, master, inventory_frame=None, current_user_role='user'):
@@ -121,6 +126,12 @@ class SalesFrame(Frame):
         Button(btn_frame, text="Export PDF",
                bootstyle="success", command=self.export_pdf)\
             .pack(side='left', padx=5)
+        Button(btn_frame, text="Export Data",
+               bootstyle="success-outline", command=self.export_data)\
+            .pack(side='left', padx=5)
+        Button(btn_frame, text="Import CSV",
+               bootstyle="info-outline", command=self.import_csv)\
+            .pack(side='left', padx=5)
 
         btn_frame.pack(pady=5)
 
@@ -160,60 +171,27 @@ class SalesFrame(Frame):
         if self.is_admin:
             self.update_btn.state(['disabled'])
 
-        prods = get_connection().execute(
-            'SELECT id, name FROM products'
-        ).fetchall()
         self.vars['product']['values'] = [
-            f"{pid}: {name}" for pid, name in prods
+            f"{pid}: {name}" for pid, name in products.list_names()
         ]
 
         for r in self.tree.get_children():
             self.tree.delete(r)
 
-        term = f"%{self.search_var.get().strip()}%"
-        start = self.start_date.entry.get().strip()
-        end   = self.end_date.entry.get().strip()
         active_filter = self.filter_active_var.get()
+        rows = sales.list_sales(
+            term=self.search_var.get().strip(),
+            start=self.start_date.entry.get().strip(),
+            end=self.end_date.entry.get().strip(),
+            active={'Active': True, 'Inactive': False}.get(active_filter)
+        )
 
-        where = ["p.name LIKE ?"]
-        params = [term]
-
-        if start and end:
-            where += ["s.date BETWEEN ? AND ?"]
-            params += [start, end]
-        elif start:
-            where += ["s.date >= ?"]
-            params += [start]
-        elif end:
-            where += ["s.date <= ?"]
-            params += [end]
-
-        if active_filter == 'Active':
-            where += ["s.is_active = 1"]
-        elif active_filter == 'Inactive':
-            where += ["s.is_active = 0"]
-
-        cols = ["s.id", "s.receipt_no", "s.date", "p.name", "s.qty"]
-        if self.is_admin:
-            cols.append("p.cost_price")
-        cols += [
-            "(s.qty * p.price) AS total",
-            "s.notes", "s.created_at", "s.updated_at", "s.is_active"
-        ]
-
-        sql = f"""
-            SELECT {', '.join(cols)}
-              FROM sales s
-              JOIN products p ON s.prod_id = p.id
-             WHERE {' AND '.join(where)}
-          ORDER BY s.date DESC
-        """
-
-        with get_connection() as conn:
-            for row in conn.execute(sql, params):
-                vals = list(row)
-                vals[-1] = "Yes" if vals[-1] else "No"
-                self.tree.insert('', 'end', values=vals)
+        for row in rows:
+            vals = list(row)
+            if not self.is_admin:
+                del vals[5]
+            vals[-1] = "Yes" if vals[-1] else "No"
+            self.tree.insert('', 'end', values=vals)
 
     def clear_form(self):
         for key, widget in self.vars.items():
@@ -287,20 +265,9 @@ class SalesFrame(Frame):
 
         pid = int(vals['product'].split(':', 1)[0])
         q   = int(vals['qty'])
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        with get_connection() as conn:
-            conn.execute(
-                'INSERT INTO sales (receipt_no, date, prod_id, qty, notes, '
-                'created_at, updated_at, is_active) VALUES (?,?,?,?,?,?,?,?)',
-                (vals['receipt_no'], vals['date'], pid, q,
-                 vals['notes'], now, now, vals['is_active'])
-            )
-            conn.execute(
-                'UPDATE products SET quantity = quantity - ? WHERE id = ?',
-                (q, pid)
-            )
-            conn.commit()
+
+        sales.add_sale(vals['receipt_no'], vals['date'], pid, q,
+                       vals['notes'], vals['is_active'])
 
         self.clear_form()
         self.load_sales()
@@ -320,39 +287,12 @@ class SalesFrame(Frame):
             'notes':      self.vars['notes'].get(),
             'is_active':  self.vars['is_active'].get()
         }
-        new_receipt = vals['receipt_no']
-        new_qty     = vals['qty']
-        new_notes   = vals['notes']
-        new_active  = vals['is_active']
-        now         = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        with get_connection() as conn:
-            old_qty, old_pid = conn.execute(
-                'SELECT qty, prod_id FROM sales WHERE id = ?',
-                (self.current_id,)
-            ).fetchone()
-
-            diff = new_qty - old_qty
-            if diff != 0:
-                conn.execute(
-                    'UPDATE products '
-                    'SET quantity = quantity - ? '
-                    'WHERE id = ?',
-                    (diff, old_pid)
-                )
-
-            conn.execute(
-                'UPDATE sales '
-                'SET receipt_no = ?, '
-                    'qty        = ?, '
-                    'notes      = ?, '
-                    'is_active  = ?, '
-                    'updated_at = ? '
-                'WHERE id = ?',
-                (new_receipt, new_qty, new_notes, new_active, now, self.current_id)
-            )
-
-            conn.commit()
+        try:
+            sales.update_sale(self.current_id, vals['receipt_no'], vals['qty'],
+                              vals['notes'], vals['is_active'])
+        except (ValueError, api_client.ApiClientError) as e:
+            ToastNotification("Error", str(e)).show_toast()
+            return
 
         ToastNotification("Success", "Sale updated").show_toast()
 
@@ -371,38 +311,44 @@ class SalesFrame(Frame):
         if not sel:
             return
         sid = self.tree.item(sel[0])['values'][0]
-        with get_connection() as conn:
-            conn.execute('DELETE FROM sales WHERE id = ?', (sid,))
-            conn.commit()
+        try:
+            sales.delete_sale(sid)
+        except (ValueError, api_client.ApiClientError) as e:
+            ToastNotification("Error", str(e)).show_toast()
+            return
 
         self.clear_form()
         self.load_sales()
         if self.inventory_frame:
             self.inventory_frame.load_inventory()
 
+    def _export_filters(self):
+        active_filter = self.filter_active_var.get()
+        return dict(
+            term=self.search_var.get().strip(),
+            start=self.start_date.entry.get().strip(),
+            end=self.end_date.entry.get().strip(),
+            active={'Active': True, 'Inactive': False}.get(active_filter),
+            include_cost=self.is_admin
+        )
+
     def export_pdf(self):
-        headers = [self.tree.heading(c)['text'] for c in self.tree['columns']]
-        data    = [self.tree.item(i)['values'] for i in self.tree.get_children()]
-
-        out_dir = "reports"
-        os.makedirs(out_dir, exist_ok=True)
-
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        epw = pdf.w - pdf.l_margin - pdf.r_margin
-        col_w = epw / len(headers)
-
-        for h in headers:
-            pdf.cell(col_w, 10, str(h), border=1)
-        pdf.ln()
-
-        for row in data:
-            for item in row:
-                pdf.cell(col_w, 8, str(item), border=1)
-            pdf.ln()
-
-        fn   = f"sales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        path = os.path.join(out_dir, fn)
-        pdf.output(path)
-        ToastNotification("Exported", f"Saved to {path}").show_toast()
+        # exports what the current filters select, straight from the database
+        ExportDialog(self, "Export Sales", exports.export_sales_pdf,
+                     exports.timestamped("reports", "sales"), **self._export_filters())
+
+    def export_data(self):
+        path = ask_data_path(self, "sales")
+        if path:
+            ExportDialog(self, "Export Sales", exports.export_sales_data, path,
+                         **self._export_filters())
+
+    def import_csv(self):
+        path = ask_import_path(self)
+        if path:
+            ImportDialog(self, 'sales', path, on_done=self._after_import)
+
+    def _after_import(self):
+        self.load_sales()
+        if self.inventory_frame:
+            self.inventory_frame.load_inventory()
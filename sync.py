@@ -0,0 +1,164 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from repositories import archive
+
+# Ships a store's changes to a head-office database. Triggers from
+# db/migrate_outbox.py log every insert, update and delete of the synced
+# tables in change_outbox; a sync reads the changes after the store's
+# watermark at head office, looks up the current state of each changed row
+# once and writes it into store_<table> keyed by (store_id, id). Each batch
+# and its new watermark commit together at head office, so an interrupted
+# sync resumes where it stopped and replaying a batch changes nothing.
+
+SYNCED_TABLES = ['sales', 'products', 'expenses', 'debts', 'damage_products']
+BATCH = 5000
+CHUNK = 500  # ids per IN (...) lookup, under SQLite's parameter limit
+
+Progress = Optional[Callable[[int, int], None]]
+
+
+class SyncResult(NamedTuple):
+    store_id: str
+    store_name: str
+    from_seq: int
+    to_seq: int
+    upserts: int
+    deletes: int
+    batches: int
+
+
+def store_identity(conn: sqlite3.Connection) -> tuple:
+    try:
+        info = dict(conn.execute('SELECT key, value FROM store_info'))
+    except sqlite3.OperationalError:
+        info = {}
+    if 'store_id' not in info:
+        raise ValueError("the store database has no change outbox; run the migrations first")
+    return info['store_id'], info.get('store_name') or info['store_id'][:8]
+
+
+def set_store_name(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute("INSERT INTO store_info (key, value) VALUES ('store_name', ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (name,))
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    return [(r[1], r[2]) for r in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def ensure_head_office(hq: sqlite3.Connection, store: sqlite3.Connection) -> Dict[str, List[str]]:
+    # mirror tables follow the store's columns; columns a newer store schema
+    # added are appended, so stores on different versions can share one file
+    hq.execute('''
+        CREATE TABLE IF NOT EXISTS sync_stores (
+            store_id TEXT PRIMARY KEY,
+            name TEXT,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            synced_at TEXT,
+            rows_synced INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    columns = {}
+    for table in SYNCED_TABLES:
+        cols = _columns(store, table)
+        mirror = f'store_{table}'
+        defs = ', '.join(f'{name} {decl}' for name, decl in cols)
+        hq.execute(f'CREATE TABLE IF NOT EXISTS {mirror} (store_id TEXT NOT NULL, {defs}, '
+                   f'PRIMARY KEY (store_id, id))')
+        have = {name for name, _ in _columns(hq, mirror)}
+        for name, decl in cols:
+            if name not in have:
+                hq.execute(f'ALTER TABLE {mirror} ADD COLUMN {name} {decl}')
+        columns[table] = [name for name, _ in cols]
+    return columns
+
+
+def _upsert_sql(table: str, cols: List[str]) -> str:
+    updates = ', '.join(f'{c} = excluded.{c}' for c in cols if c != 'id')
+    return (f"INSERT INTO store_{table} (store_id, {', '.join(cols)}) "
+            f"VALUES (?{', ?' * len(cols)}) ON CONFLICT (store_id, id) DO UPDATE SET {updates}")
+
+
+def _current_rows(store: sqlite3.Connection, table: str, cols: List[str], ids: List[int],
+                  schema: str = 'main') -> Dict[int, tuple]:
+    found = {}
+    for i in range(0, len(ids), CHUNK):
+        part = ids[i:i + CHUNK]
+        sql = f"SELECT {', '.join(cols)} FROM {schema}.{table} WHERE id IN ({', '.join('?' * len(part))})"
+        for row in store.execute(sql, part):
+            found[row[cols.index('id')]] = row
+    return found
+
+
+def _attach_archive(store: sqlite3.Connection, store_path: str) -> bool:
+    # archived sales left the store's sales table but not the chain's books
+    path = archive.archive_path(store_path)
+    if not os.path.exists(path):
+        return False
+    store.execute(f'ATTACH DATABASE ? AS {archive.SCHEMA}', (path,))
+    return store.execute(f"SELECT 1 FROM {archive.SCHEMA}.sqlite_master WHERE name = 'sales'").fetchone() is not None
+
+
+def sync(store_path: str, hq_path: str, name: Optional[str] = None, batch: int = BATCH,
+         prune: bool = False, progress: Progress = None) -> SyncResult:
+    store = sqlite3.connect(store_path, isolation_level=None)
+    hq = sqlite3.connect(hq_path)
+    try:
+        if name:
+            set_store_name(store, name)
+        store_id, store_name = store_identity(store)
+        archived = _attach_archive(store, store_path)
+        with hq:
+            columns = ensure_head_office(hq, store)
+            hq.execute('INSERT INTO sync_stores (store_id, name) VALUES (?, ?) '
+                       'ON CONFLICT(store_id) DO UPDATE SET name = excluded.name', (store_id, store_name))
+        from_seq = hq.execute('SELECT last_seq FROM sync_stores WHERE store_id = ?', (store_id,)).fetchone()[0]
+        upserts = deletes = batches = 0
+        upsert_sql = {t: _upsert_sql(t, cols) for t, cols in columns.items()}
+
+        # one read transaction: the outbox and the rows it points at are read
+        # from the same snapshot
+        store.execute('BEGIN')
+        to_seq = store.execute('SELECT IFNULL(MAX(seq), 0) FROM change_outbox').fetchone()[0]
+        # latest change per row, oldest first: once a batch is applied every
+        # change up to its last seq has been shipped, which is the watermark
+        changes = store.execute(
+            'SELECT table_name, row_id, MAX(seq) AS last FROM change_outbox '
+            'WHERE seq > ? AND seq <= ? GROUP BY table_name, row_id ORDER BY last',
+            (from_seq, to_seq)).fetchall()
+        total = len(changes)
+        for start in range(0, total, batch):
+            part = changes[start:start + batch]
+            by_table: Dict[str, List[int]] = {}
+            for table, row_id, _ in part:
+                by_table.setdefault(table, []).append(row_id)
+            with hq:
+                for table, ids in by_table.items():
+                    if table not in columns:
+                        continue
+                    rows = _current_rows(store, table, columns[table], ids)
+                    if table == 'sales' and archived and len(rows) < len(ids):
+                        rows.update(_current_rows(store, table, columns[table],
+                                                  [i for i in ids if i not in rows], archive.SCHEMA))
+                    hq.executemany(upsert_sql[table], ((store_id,) + tuple(r) for r in rows.values()))
+                    gone = [(store_id, i) for i in ids if i not in rows]
+                    hq.executemany(f'DELETE FROM store_{table} WHERE store_id = ? AND id = ?', gone)
+                    upserts += len(rows)
+                    deletes += len(gone)
+                hq.execute('UPDATE sync_stores SET last_seq = ?, synced_at = ?, rows_synced = rows_synced + ? '
+                           'WHERE store_id = ?',
+                           (part[-1][2], datetime.now().strftime('%Y-%m-%d %H:%M:%S'), len(part), store_id))
+            batches += 1
+            if progress:
+                progress(start + len(part), total)
+        store.execute('COMMIT')
+        if prune:
+            # only safe when this head office is the store's only peer
+            store.execute('DELETE FROM change_outbox WHERE seq <= ?', (to_seq,))
+        return SyncResult(store_id, store_name, from_seq, max(from_seq, to_seq), upserts, deletes, batches)
+    finally:
+        store.close()
+        hq.close()
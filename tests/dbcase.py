@@ -0,0 +1,55 @@
+import contextlib
+import io
+import os
+import runpy
+import shutil
+import tempfile
+import unittest
+
+import analytics
+import database
+from repositories import sales
+
+
+class DatabaseTestCase(unittest.TestCase):
+    # a fresh, fully migrated system.db in a scratch folder per test; the
+    # migration scripts open 'system.db' relative to the working directory
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='sis-test-')
+        self.cwd = os.getcwd()
+        self.db_name = database.DB_NAME
+        os.chdir(self.tmp)
+        database.DB_NAME = os.path.join(self.tmp, 'system.db')
+        database.invalidate_columns()
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.create_schema()
+            # receipt_no/notes come from a script apply_migrations() does not run
+            runpy.run_path(os.path.join(os.path.dirname(database.__file__), 'db', 'migrate_add_receipt.py'),
+                           run_name='__main__')
+            database.apply_migrations()
+
+    def tearDown(self):
+        analytics.invalidate()
+        database.DB_NAME = self.db_name
+        database.invalidate_columns()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def execute(self, sql, params=()):
+        with contextlib.closing(database.get_connection()) as conn, conn:
+            return conn.execute(sql, params).lastrowid
+
+
+class TwoSalesTestCase(DatabaseTestCase):
+    # one product with two June 2025 sales, the second of which tests delete
+
+    def setUp(self):
+        super().setUp()
+        self.execute("INSERT INTO categories (name) VALUES ('Tools')")
+        self.execute("INSERT INTO warehouses (name, location, capacity) VALUES ('Main', 'Here', 100)")
+        self.prod_id = self.execute(
+            "INSERT INTO products (sku, name, category_id, cost_price, price, quantity, warehouse_id) "
+            "VALUES ('H1', 'Hammer', 1, 11.37, 14.63, 50, 1)")
+        self.kept = sales.add_sale('R1', '2025-06-03', self.prod_id, 2, '', 1)
+        self.deleted = sales.add_sale('R2', '2025-06-04', self.prod_id, 1, '', 1)
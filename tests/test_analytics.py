@@ -0,0 +1,21 @@
+import unittest
+
+import analytics
+from repositories import reports, sales
+from tests.dbcase import TwoSalesTestCase
+
+
+@unittest.skipUnless(analytics.available(), "analytics needs numpy")
+class DeletedSaleTest(TwoSalesTestCase):
+    def test_refresh_drops_a_deleted_sale(self):
+        engine = analytics.get_engine().refresh()
+        self.assertEqual(engine.product_summary('2025', '06')[0][1], 3)
+        sales.delete_sale(self.deleted)
+        rows = engine.refresh().product_summary('2025', '06')
+        self.assertEqual([tuple(r) for r in rows],
+                         [tuple(r) for r in reports.product_summary('2025', '06')])
+        self.assertEqual(rows[0][1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
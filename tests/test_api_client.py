@@ -0,0 +1,44 @@
+import socket
+import threading
+import unittest
+
+import api_client
+
+
+class DroppedReplyTest(unittest.TestCase):
+    # a server that reads each request and hangs up without answering, as
+    # when the reply to a committed write is lost
+
+    def setUp(self):
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.received = []
+        threading.Thread(target=self._serve, daemon=True).start()
+        self.client = api_client.ApiClient(f"http://127.0.0.1:{self.listener.getsockname()[1]}", timeout=5)
+
+    def tearDown(self):
+        self.listener.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            with conn:
+                self.received.append(conn.recv(65536).split(b' ', 1)[0])
+
+    def test_write_is_not_sent_twice(self):
+        with self.assertRaises(ConnectionError):
+            self.client.request('POST', '/api/sales', body={'qty': 1})
+        self.assertEqual(self.received, [b'POST'])
+
+    def test_read_is_retried_once(self):
+        with self.assertRaises(ConnectionError):
+            self.client.request('GET', '/api/sales')
+        self.assertEqual(self.received, [b'GET', b'GET'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import http.client
+import json
+import threading
+import unittest
+
+import api_server
+from tests.dbcase import DatabaseTestCase
+
+
+class KeepAliveTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = api_server.ApiServer(port=0, readers=1)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def request(self, method, path, body=None):
+        self.client.request(method, path, body=body and json.dumps(body),
+                            headers={'Content-Type': 'application/json'})
+        response = self.client.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_error_reply_consumes_the_body(self):
+        self.assertEqual(self.request('POST', '/api/nothing', {'qty': 1})[0], 404)
+        self.assertEqual(self.request('PUT', '/api/health', {'qty': 1})[0], 405)
+        status, body = self.request('GET', '/api/health')
+        self.assertEqual(status, 200)
+        self.assertTrue(body['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import backup
+import database
+from tests.dbcase import DatabaseTestCase
+
+
+class WalBackupTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        conn = sqlite3.connect(database.DB_NAME)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.close()
+
+    def test_backups_leave_no_wal_files(self):
+        before = set(os.listdir(tempfile.gettempdir()))
+        results = backup.backup(dest=os.path.join(self.tmp, 'backups'), keep=1) \
+            + backup.backup(dest=os.path.join(self.tmp, 'backups'), compress=True, keep=1)
+        self.assertTrue(all(r.verified for r in results))
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'backups')), [os.path.basename(results[-1].path)])
+        self.assertEqual(results[1].removed, [results[0].path])
+        self.assertFalse({n for n in set(os.listdir(tempfile.gettempdir())) - before
+                          if n.endswith(('-wal', '-shm'))})
+
+    def test_backup_is_not_in_wal_mode(self):
+        path = backup.backup(dest=os.path.join(self.tmp, 'backups'))[0].path
+        conn = sqlite3.connect(path)
+        try:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import contextlib
+import os
+import shutil
+import sqlite3
+
+import backup
+import consolidation
+import database
+from repositories import sales
+from tests.dbcase import DatabaseTestCase
+
+
+class FindStoresTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.execute("INSERT INTO categories (name) VALUES ('Tools')")
+        self.execute("INSERT INTO warehouses (name, location, capacity) VALUES ('Main', 'Here', 100)")
+        prod_id = self.execute(
+            "INSERT INTO products (sku, name, category_id, cost_price, price, quantity, warehouse_id) "
+            "VALUES ('H1', 'Hammer', 1, 11.37, 14.63, 50, 1)")
+        sales.add_sale('R1', '2025-06-03', prod_id, 2, '', 1)
+        # store1 with its archive and a backup; store2 a store of its own
+        self.chain = os.path.join(self.tmp, 'chain')
+        store1 = os.path.join(self.chain, 'store1')
+        os.makedirs(store1)
+        self.store1 = os.path.join(store1, 'system.db')
+        shutil.copyfile(database.DB_NAME, self.store1)
+        shutil.copyfile(database.DB_NAME, os.path.join(store1, 'system_archive.db'))
+        backup.backup(dest=os.path.join(store1, 'backups'), db_path=self.store1)
+        os.makedirs(os.path.join(self.chain, 'store2'))
+        self.store2 = os.path.join(self.chain, 'store2', 'system.db')
+        shutil.copyfile(database.DB_NAME, self.store2)
+        with contextlib.closing(sqlite3.connect(self.store2)) as conn, conn:
+            conn.execute("UPDATE store_info SET value = 'other' WHERE key = 'store_id'")
+
+    def test_archives_and_backups_are_not_stores(self):
+        self.assertEqual(consolidation.find_stores([os.path.dirname(self.store1)]), [self.store1])
+        self.assertEqual(consolidation.find_stores([self.chain]), [self.store1, self.store2])
+
+    def test_copies_of_a_store_count_once(self):
+        copy = os.path.join(self.tmp, 'store1-copy.db')
+        shutil.copyfile(self.store1, copy)
+        chain = consolidation.consolidate([self.chain, copy], workers=1)
+        self.assertEqual(sorted(s.path for s in chain.stores), [self.store1, self.store2])
+        self.assertAlmostEqual(chain.sales, 2 * 2 * 14.63)
@@ -0,0 +1,26 @@
+import unittest
+
+from repositories import debts
+from tests.dbcase import DatabaseTestCase
+
+
+class AgingTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        debts.add_debt('No date', 10.0, None, 'Unpaid', 1)
+        debts.add_debt('Late', 20.0, '2025-01-01', 'Unpaid', 1)
+        debts.add_debt('Due', 40.0, '2025-06-30', 'Unpaid', 1)
+
+    def test_debt_without_due_date_is_current(self):
+        buckets = {b.label: (b.count, b.amount) for b in debts.aging('2025-06-15')}
+        self.assertEqual(buckets['Current'], (2, 50.0))
+        self.assertEqual(buckets['90+ days'], (1, 20.0))
+
+    def test_aging_agrees_with_overdue_total(self):
+        overdue = [b for b in debts.aging('2025-06-15') if b.label != 'Current']
+        self.assertEqual((sum(b.count for b in overdue), sum(b.amount for b in overdue)),
+                         tuple(debts.overdue_total('2025-06-15')))
+
+
+if __name__ == '__main__':
+    unittest.main()
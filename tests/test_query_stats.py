@@ -0,0 +1,23 @@
+import contextlib
+import unittest
+
+import database
+import query_stats
+from repositories import users
+from tests.dbcase import DatabaseTestCase
+
+
+class CallerTest(DatabaseTestCase):
+    def test_queries_are_charged_past_the_repository(self):
+        query_stats.reset()
+        with contextlib.closing(database.get_connection(instrumented=True)) as conn:
+            users.search_users('jo', conn=conn)
+        callers = {c for g in query_stats.report(None) for c in g['callers']}
+        self.assertTrue(callers)
+        for caller in callers:
+            self.assertTrue(caller.startswith('CallerTest.test_queries_are_charged_past_the_repository '
+                                              '(test_query_stats.py:'), caller)
+
+
+if __name__ == '__main__':
+    unittest.main()
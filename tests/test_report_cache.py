@@ -0,0 +1,24 @@
+import os
+import unittest
+
+import analytics
+import exports
+import report_cache
+from repositories import sales
+from tests.dbcase import TwoSalesTestCase
+
+
+@unittest.skipUnless(analytics.available(), "analytics needs numpy")
+class ReportCacheTest(TwoSalesTestCase):
+    def test_deleted_sale_misses_the_report_cache(self):
+        path = os.path.join(self.tmp, 'report.pdf')
+        exports.export_report_pdf(path, '2025', '06')
+        sales.delete_sale(self.deleted)
+        exports.export_report_pdf(path, '2025', '06')
+        entries = [e for e in os.listdir(report_cache.cache_dir()) if not e.startswith('.')]
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(report_cache.cache_dir().startswith(self.tmp))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+import database
+from repositories import users
+from tests.dbcase import DatabaseTestCase
+
+
+class PrefixSearchTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for username in ('jo@x', 'jo_x', 'JOA', 'jo?z', 'job'):
+            self.execute("INSERT INTO users (first_name, last_name, username, password, role) "
+                         "VALUES ('First', 'Last', ?, 'x', 'cashier')", (username,))
+
+    def usernames(self, term):
+        col = users.columns().index('username')
+        return sorted(row[col] for row in users.search_users(term))
+
+    def test_punctuation_below_A_is_not_folded_into_range(self):
+        # '@' + 1 is 'A', which NOCASE compares as 'a'
+        self.assertEqual(self.usernames('jo@'), ['jo@x'])
+        self.assertEqual(self.usernames('jo?'), ['jo?z'])
+
+    def test_prefix_ignores_case(self):
+        self.assertEqual(self.usernames('Jo'), ['JOA', 'jo?z', 'jo@x', 'jo_x', 'job'])
+        self.assertEqual(self.usernames('joa'), ['JOA'])
+
+    def test_search_uses_the_index(self):
+        params = []
+        where = users._prefix('username', 'jo@', params)
+        with database.get_connection() as conn:
+            plan = ' '.join(r[3] for r in conn.execute(f'EXPLAIN QUERY PLAN SELECT * FROM users WHERE {where}',
+                                                       params))
+        self.assertIn('idx_users_username_nocase', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
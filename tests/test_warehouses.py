@@ -0,0 +1,53 @@
+import contextlib
+import os
+import runpy
+
+import database
+from repositories import damage, sales, warehouses
+from tests.dbcase import DatabaseTestCase
+
+
+class LocationStockTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.execute("INSERT INTO categories (name) VALUES ('Tools')")
+        self.a = self.execute("INSERT INTO warehouses (name, location, capacity) VALUES ('A', 'Here', 100)")
+        self.b = self.execute("INSERT INTO warehouses (name, location, capacity) VALUES ('B', 'There', 100)")
+        self.prod_id = self.execute(
+            "INSERT INTO products (sku, name, category_id, cost_price, price, quantity, warehouse_id) "
+            "VALUES ('H1', 'Hammer', 1, 11.37, 14.63, 10, ?)", (self.a,))
+
+    def stock(self):
+        return {r.warehouse: r.qty for r in warehouses.product_locations(self.prod_id)}
+
+    def usage(self):
+        with contextlib.closing(database.get_connection()) as conn:
+            return dict(conn.execute('SELECT warehouse_id, units FROM warehouse_usage'))
+
+    def test_sale_after_transfer_takes_from_where_the_stock_is(self):
+        warehouses.transfer(self.prod_id, self.a, self.b, 10)
+        sales.add_sale('R1', '2025-06-03', self.prod_id, 3, '', 1)
+        self.assertEqual(self.stock(), {'B': 7})
+        self.assertEqual(self.usage(), {self.a: 0, self.b: 7})
+
+    def test_home_is_emptied_first(self):
+        warehouses.transfer(self.prod_id, self.a, self.b, 6)
+        damage.add_damage(self.prod_id, '2025-06-03', 5, 'dropped', 1)
+        self.assertEqual(self.stock(), {'B': 5})
+        self.assertEqual(self.usage(), {self.a: 0, self.b: 5})
+
+    def test_receipts_go_home(self):
+        warehouses.transfer(self.prod_id, self.a, self.b, 10)
+        self.execute('UPDATE products SET quantity = quantity + 4 WHERE id = ?', (self.prod_id,))
+        self.assertEqual(self.stock(), {'A': 4, 'B': 10})
+
+    def test_migration_repairs_negative_home_stock(self):
+        warehouses.transfer(self.prod_id, self.a, self.b, 10)
+        self.execute('UPDATE products SET quantity = 7 WHERE id = ?', (self.prod_id,))
+        # what the old trigger left behind after selling 3
+        self.execute('UPDATE product_stock SET qty = -3 WHERE warehouse_id = ?', (self.a,))
+        self.execute('UPDATE product_stock SET qty = 10 WHERE warehouse_id = ?', (self.b,))
+        runpy.run_path(os.path.join(os.path.dirname(database.__file__), 'db', 'migrate_warehouse_stock.py'),
+                       run_name='__main__')
+        self.assertEqual(self.stock(), {'B': 7})
+        self.assertEqual(self.usage(), {self.a: 0, self.b: 7})
@@ -1,9 +1,8 @@
-import hashlib
 import sqlite3
 import ttkbootstrap as tb
 from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Combobox, Scrollbar
 from ttkbootstrap.toast import ToastNotification
-from database import get_connection
+from repositories import users
 
 class UsersFrame(Frame):
     def __init__(self, master, current_user_role):
@@ -20,15 +19,7 @@ class UsersFrame(Frame):
         Button(search_bar, text="Go", bootstyle="primary", command=self.load_users).pack(side='left')
         search_bar.pack(fill='x', pady=(0,15))
 
-        with get_connection() as conn:
-            cols_info = conn.execute(f"PRAGMA table_info({self.table_name})").fetchall()
-        phys_cols = [col[1] for col in cols_info]
-        display_cols = phys_cols.copy()
-        if 'created_at' not in phys_cols:
-            display_cols.append('created_at')
-        if 'updated_at' not in phys_cols:
-            display_cols.append('updated_at')
-        self.display_cols = display_cols
+        self.display_cols = users.display_columns()
 
         table_frame = Frame(self)
         table_frame.pack(fill='both', expand=True, pady=(0,15))
@@ -69,31 +60,7 @@ class UsersFrame(Frame):
         self.load_users()
 
     def load_users(self):
-        term = self.search_var.get().strip()
-        with get_connection() as conn:
-            cols_info = conn.execute(f"PRAGMA table_info({self.table_name})").fetchall()
-        phys_cols = [col[1] for col in cols_info]
-        select_parts = phys_cols.copy()
-        if 'created_at' in phys_cols:
-            select_parts.append("COALESCE(created_at, '') as created_at")
-        else:
-            select_parts.append("'' as created_at")
-        if 'updated_at' in phys_cols:
-            select_parts.append("COALESCE(updated_at, '') as updated_at")
-        else:
-            select_parts.append("'' as updated_at")
-        sql = f"SELECT {', '.join(select_parts)} FROM {self.table_name}"
-        params = []
-        if term:
-            where_clauses = []
-            for c in phys_cols + ['created_at','updated_at']:
-                where_clauses.append(f"CAST({c} AS TEXT) LIKE ?")
-                params.append(f"%{term}%")
-            sql += " WHERE " + " OR ".join(where_clauses)
-
-        with get_connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
-
+        rows = users.search_users(self.search_var.get().strip())
         self.tree.delete(*self.tree.get_children())
         for row in rows:
             self.tree.insert('', 'end', values=row)
@@ -117,23 +84,17 @@ class UsersFrame(Frame):
         role = self.role.get(); is_active = 1 if self.is_active_var.get() else 0
         if not all([fn, ln, un, pw, role]):
             ToastNotification("Error", "All fields are required").show_toast(); return
-        hashed = hashlib.sha256(pw.encode()).hexdigest()
-        with get_connection() as conn:
-            try:
-                conn.execute(
-                    "INSERT INTO users (first_name, last_name, username, password, role, is_active) VALUES (?,?,?,?,?,?)",
-                    (fn, ln, un, hashed, role, is_active)
-                )
-                conn.commit(); self.load_users(); ToastNotification("Success", "User added").show_toast()
-            except sqlite3.IntegrityError:
-                ToastNotification("Error", "Username already exists").show_toast()
+        try:
+            users.add_user(fn, ln, un, pw, role, is_active)
+            self.load_users(); ToastNotification("Success", "User added").show_toast()
+        except sqlite3.IntegrityError:
+            ToastNotification("Error", "Username already exists").show_toast()
 
     def delete_user(self):
         sel = self.tree.selection();
         if not sel: return
         uid = self.tree.item(sel[0])['values'][0]
-        with get_connection() as conn:
-            conn.execute('DELETE FROM users WHERE id=?', (uid,)); conn.commit()
+        users.delete_user(uid)
         self.load_users(); ToastNotification("Deleted", "User removed").show_toast()
 
     def update_user(self):
@@ -146,18 +107,9 @@ class UsersFrame(Frame):
         role = self.role.get(); is_active = 1 if self.is_active_var.get() else 0
         if not all([fn, ln, un, role]):
             ToastNotification("Error", "Fields cannot be empty").show_toast(); return
-        parts = ["first_name=?", "last_name=?", "username=?", "role=?", "is_active=?"]
-        params = [fn, ln, un, role, is_active]
-        if pw:
-            hashed = hashlib.sha256(pw.encode()).hexdigest()
-            parts.insert(3, "password=?"); params.insert(3, hashed)
-        parts.append("updated_at=strftime('%Y-%m-%d %H:%M:%S','now')")
-        sql = f"UPDATE users SET {', '.join(parts)} WHERE id=?"
-        params.append(uid)
-        with get_connection() as conn:
-            try:
-                conn.execute(sql, params); conn.commit()
-                self.load_users(); ToastNotification("Updated", "User details updated").show_toast()
-                self.password.delete(0,'end')
-            except sqlite3.IntegrityError:
-                ToastNotification("Error", "Username conflict").show_toast()
+        try:
+            users.update_user(uid, fn, ln, un, role, is_active, password=pw or None)
+            self.load_users(); ToastNotification("Updated", "User details updated").show_toast()
+            self.password.delete(0,'end')
+        except sqlite3.IntegrityError:
+            ToastNotification("Error", "Username conflict").show_toast()
@@ -1,10 +1,8 @@
-import sqlite3
-from datetime import datetime
 import ttkbootstrap as tb
-from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar
+from ttkbootstrap import Frame, Label, Entry, Button, Treeview, Scrollbar, Combobox
 from ttkbootstrap.widgets import Checkbutton
 from tkinter import IntVar
-from database import get_connection
+from repositories import warehouses
 
 class WarehouseFrame(Frame):
     def __init__(self, master):
@@ -22,7 +20,7 @@ class WarehouseFrame(Frame):
 
         table_frame = Frame(self)
         table_frame.pack(fill='both', expand=True, pady=(0,10))
-        cols = ("ID","Name","Location","Capacity","Created At","Updated At","Active")
+        cols = ("ID","Name","Location","Capacity","Stock","Used %","Created At","Updated At","Active")
         self.tree = Treeview(table_frame, columns=cols, show='headings', bootstyle="table")
         for c in cols:
             self.tree.heading(c, text=c)
@@ -71,21 +69,48 @@ class WarehouseFrame(Frame):
         Button(btn_frame, text="Refresh", bootstyle="info", command=self.load_warehouses).pack(side='left', padx=5)
         btn_frame.pack(pady=5)
 
+        Label(self, text="Stock in selected warehouse").pack(anchor='w')
+        stock_frame = Frame(self)
+        stock_frame.pack(fill='both', expand=True, pady=(0,5))
+        cols = ("Product ID","SKU","Product","Qty")
+        self.stock_tree = Treeview(stock_frame, columns=cols, show='headings', bootstyle="info", height=6)
+        for c in cols:
+            self.stock_tree.heading(c, text=c)
+            self.stock_tree.column(c, anchor='center')
+        s_scroll = Scrollbar(stock_frame, orient='vertical', command=self.stock_tree.yview)
+        self.stock_tree.configure(yscrollcommand=s_scroll.set)
+        self.stock_tree.grid(row=0, column=0, sticky='nsew')
+        s_scroll.grid(row=0, column=1, sticky='ns')
+        stock_frame.rowconfigure(0, weight=1)
+        stock_frame.columnconfigure(0, weight=1)
+        self.stock_tree.bind("<<TreeviewSelect>>", lambda e: self.on_stock_select())
+
+        transfer_frame = Frame(self)
+        Label(transfer_frame, text="Product ID:").pack(side='left')
+        self.transfer_product = Entry(transfer_frame, width=10)
+        self.transfer_product.pack(side='left', padx=5)
+        Label(transfer_frame, text="To:").pack(side='left')
+        self.transfer_to = Combobox(transfer_frame, state='readonly', width=20)
+        self.transfer_to.pack(side='left', padx=5)
+        Label(transfer_frame, text="Qty:").pack(side='left')
+        self.transfer_qty = Entry(transfer_frame, width=8)
+        self.transfer_qty.pack(side='left', padx=5)
+        Button(transfer_frame, text="Transfer", bootstyle="success", command=self.transfer_stock).pack(side='left', padx=5)
+        transfer_frame.pack(pady=5)
+
         self.load_warehouses()
 
     def load_warehouses(self):
         for r in self.tree.get_children():
             self.tree.delete(r)
-        term = f"%{self.search_var.get().strip()}%"
-        query = (
-            "SELECT id, name, location, capacity, created_at, updated_at, is_active "
-            "FROM warehouses WHERE name LIKE ? OR location LIKE ? ORDER BY id"
-        )
-        with get_connection() as conn:
-            for row in conn.execute(query, (term, term)):
-                r = list(row)
-                r[-1] = 'Yes' if r[-1] else 'No'
-                self.tree.insert('', 'end', values=r)
+        for row in warehouses.list_warehouses(self.search_var.get().strip()):
+            r = list(row)
+            r[-1] = 'Yes' if r[-1] else 'No'
+            used = f"{100 * row.stock_units / row.capacity:.1f}" if row.capacity else '-'
+            r.insert(5, used)
+            self.tree.insert('', 'end', values=r)
+        self.transfer_to['values'] = warehouses.active_names()
+        self.load_stock()
 
     def clear_form(self):
         for attr, widget in self.vars.items():
@@ -107,9 +132,9 @@ class WarehouseFrame(Frame):
             'name': vals[1],
             'location': vals[2],
             'capacity': vals[3],
-            'created_at': vals[4],
-            'updated_at': vals[5],
-            'is_active': 1 if vals[6]=='Yes' else 0
+            'created_at': vals[6],
+            'updated_at': vals[7],
+            'is_active': 1 if vals[8]=='Yes' else 0
         }
         for attr, widget in self.vars.items():
             if attr == 'is_active':
@@ -120,6 +145,43 @@ class WarehouseFrame(Frame):
                 widget.insert(0, data[attr])
                 if attr in ('created_at','updated_at'):
                     widget.state(['readonly'])
+        self.load_stock()
+
+    def load_stock(self):
+        for r in self.stock_tree.get_children():
+            self.stock_tree.delete(r)
+        if not hasattr(self, 'current_id'):
+            return
+        for row in warehouses.warehouse_stock(self.current_id):
+            self.stock_tree.insert('', 'end', values=(row.product_id, row.sku, row.product, row.qty))
+
+    def on_stock_select(self):
+        sel = self.stock_tree.selection()
+        if sel:
+            self.transfer_product.delete(0,'end')
+            self.transfer_product.insert(0, self.stock_tree.item(sel[0])['values'][0])
+
+    def transfer_stock(self):
+        if not hasattr(self, 'current_id'):
+            tb.toast.ToastNotification("Error", "Select the warehouse to transfer from").show_toast()
+            return
+        to_id = warehouses.warehouse_id(self.transfer_to.get())
+        try:
+            product_id = int(self.transfer_product.get().strip())
+            qty = int(self.transfer_qty.get().strip())
+        except ValueError:
+            tb.toast.ToastNotification("Error", "Product ID and Qty must be valid integers").show_toast()
+            return
+        if to_id is None:
+            tb.toast.ToastNotification("Error", "Select the destination warehouse").show_toast()
+            return
+        try:
+            warehouses.transfer(product_id, self.current_id, to_id, qty)
+        except ValueError as e:
+            tb.toast.ToastNotification("Error", str(e)).show_toast()
+            return
+        self.transfer_qty.delete(0,'end')
+        self.load_warehouses()
 
     def add_warehouse(self):
         name = self.vars['name'].get().strip()
@@ -136,14 +198,7 @@ class WarehouseFrame(Frame):
             tb.toast.ToastNotification("Error", "Capacity must be a valid integer").show_toast()
             return
 
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            conn.execute(
-                'INSERT INTO warehouses(name, location, capacity, created_at, updated_at, is_active) '
-                'VALUES(?,?,?,?,?,?)',
-                (name, loc, cap_int, now, now, active)
-            )
-            conn.commit()
+        warehouses.add_warehouse(name, loc, cap_int, active)
         self.clear_form()
         self.load_warehouses()
 
@@ -164,13 +219,6 @@ class WarehouseFrame(Frame):
             tb.toast.ToastNotification("Error", "Capacity must be a valid integer").show_toast()
             return
 
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with get_connection() as conn:
-            conn.execute(
-                'UPDATE warehouses SET name=?, location=?, capacity=?, updated_at=?, is_active=? '
-                'WHERE id=?',
-                (name, loc, cap_int, now, active, self.current_id)
-            )
-            conn.commit()
+        warehouses.update_warehouse(self.current_id, name, loc, cap_int, active)
         self.clear_form()
         self.load_warehouses()